@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Report the CPU time spent per historian update against an in-memory SQLite
+database, with statement logging and kwargs normalization as they were
+before (eager formatting, kwargs normalized twice) and as they are now.
+Logging stays at the default WARNING level, as in production.  Use
+--profile to also print the functions with the most cumulative time.
+"""
+
+from flow_workflow.historian import storage
+from historian_upsert import SQLiteHistorianStorage, updates
+
+import argparse
+import cProfile
+import pstats
+import re
+import time
+
+
+def legacy_execute_and_log(transaction, statement, **kwargs):
+    statement_kwargs = storage.get_updated_statement_kwargs(**kwargs)
+    legacy_log_statement(statement, **statement_kwargs)
+    return transaction.execute(statement, **kwargs)
+
+
+def legacy_log_statement(statement, **kwargs):
+    debug_statement = statement
+    for name, value in kwargs.items():
+        debug_statement = re.sub(r':' + name, str(value), debug_statement)
+    debug_statement = re.sub('\n', ' ', debug_statement)
+    storage.LOG.debug("EXECUTING: %s", debug_statement)
+
+
+def run_updates(historian_storage, update_infos):
+    for update_info in update_infos:
+        historian_storage.update(update_info)
+
+
+def cpu_per_update(legacy, instances, updates_per_instance, profile):
+    original = storage.execute_and_log
+    if legacy:
+        storage.execute_and_log = legacy_execute_and_log
+
+    try:
+        historian_storage = SQLiteHistorianStorage(
+                connection_string='sqlite:///:memory:', owner='WORKFLOW',
+                pool_size=1)
+        update_infos = list(updates(instances, updates_per_instance))
+
+        profiler = cProfile.Profile() if profile else None
+        begin = time.clock()
+        if profiler:
+            profiler.runcall(run_updates, historian_storage, update_infos)
+        else:
+            run_updates(historian_storage, update_infos)
+        cpu = time.clock() - begin
+
+    finally:
+        storage.execute_and_log = original
+
+    return cpu / len(update_infos), profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--instances', type=int, default=2000)
+    parser.add_argument('--updates-per-instance', type=int, default=3)
+    parser.add_argument('--profile', action='store_true')
+    arguments = parser.parse_args()
+
+    for label, legacy in [('before', True), ('after', False)]:
+        cpu, profiler = cpu_per_update(legacy, arguments.instances,
+                arguments.updates_per_instance, arguments.profile)
+        print '%-8s %10.1f usec CPU/update' % (label, 1e6 * cpu)
+        if profiler:
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Measure historian updates per second against an in-memory SQLite database,
+inserting the workflow_historian row with the dialect's single statement
+upsert and with the old insert-then-catch-IntegrityError fallback.
+
+Every instance first receives a 'new' update and then <updates-per-instance>
+status updates.  The instance id cache is cleared before each update so that
+each one has to find out, through the database, whether the row exists.
+"""
+
+from collections import defaultdict
+from flow_workflow.historian.operation_data import OperationData
+from flow_workflow.historian.status import Status
+from flow_workflow.historian.storage import WorkflowHistorianStorage
+
+import argparse
+import time
+
+
+SCHEMA = [
+"""
+CREATE TABLE WORKFLOW.WORKFLOW_INSTANCE (
+    WORKFLOW_INSTANCE_ID integer primary key not null,
+    PARENT_INSTANCE_ID integer,
+    PEER_INSTANCE_ID integer,
+    CURRENT_EXECUTION_ID integer,
+    WORKFLOW_PLAN_ID integer not null,
+    NAME varchar not null,
+    INPUT_STORED varchar,
+    OUTPUT_STORED varchar,
+    PARALLEL_INDEX integer,
+    PARENT_EXECUTION_ID integer,
+    INTENTION varchar
+)
+""",
+"""
+CREATE TABLE WORKFLOW.WORKFLOW_INSTANCE_EXECUTION (
+    WORKFLOW_EXECUTION_ID integer primary key not null,
+    WORKFLOW_INSTANCE_ID integer not null,
+    STATUS varchar not null,
+    START_TIME timestamp,
+    END_TIME timestamp,
+    EXIT_CODE integer,
+    STDOUT varchar,
+    STDERR varchar,
+    IS_DONE integer,
+    IS_RUNNING integer,
+    DISPATCH_ID varchar,
+    CPU_TIME float,
+    MAX_MEMORY integer,
+    MAX_SWAP integer,
+    MAX_PROCESSES integer,
+    MAX_THREADS integer,
+    USER_NAME varchar
+)
+""",
+"""
+CREATE TABLE WORKFLOW.WORKFLOW_HISTORIAN (
+    NET_KEY varchar not null,
+    OPERATION_ID integer not null,
+    COLOR integer not null,
+    WORKFLOW_INSTANCE_ID integer,
+    PRIMARY KEY (NET_KEY, OPERATION_ID, COLOR)
+)
+""",
+]
+
+
+STATUSES = ['scheduled', 'running', 'done']
+
+
+class SQLiteHistorianStorage(WorkflowHistorianStorage):
+    def __init__(self, *args, **kwargs):
+        WorkflowHistorianStorage.__init__(self, *args, **kwargs)
+        self._ids = defaultdict(int)
+
+        with self.engine.begin() as conn:
+            conn.execute("ATTACH DATABASE ':memory:' as WORKFLOW")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _next_id(self, transaction, sequence_name):
+        self._ids[sequence_name] += 1
+        return self._ids[sequence_name]
+
+
+def updates(instances, updates_per_instance):
+    for operation_id in xrange(instances):
+        operation_data = OperationData(net_key='benchmark',
+                operation_id=operation_id, color=0)
+        for status in ['new'] + STATUSES[:updates_per_instance]:
+            yield {
+                'operation_data': operation_data,
+                'status': Status(status),
+                'name': 'operation %d' % operation_id,
+                'workflow_plan_id': 1,
+            }
+
+
+def updates_per_second(use_upsert, instances, updates_per_instance):
+    storage = SQLiteHistorianStorage(connection_string='sqlite:///:memory:',
+            owner='WORKFLOW', pool_size=1)
+    if not use_upsert:
+        storage.upsert_statement = None
+
+    count = 0
+    begin = time.time()
+    for update_info in updates(instances, updates_per_instance):
+        storage._instance_ids.clear()
+        storage.update(update_info)
+        count += 1
+
+    return count / (time.time() - begin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--instances', type=int, default=2000)
+    parser.add_argument('--updates-per-instance', type=int, default=3,
+            choices=range(len(STATUSES) + 1))
+    arguments = parser.parse_args()
+
+    for label, use_upsert in [('insert, catch IntegrityError', False),
+            ('upsert', True)]:
+        print '%-30s %10.1f updates/s' % (label, updates_per_second(
+            use_upsert, arguments.instances, arguments.updates_per_instance))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Time the construction of ModelAdapters, and of their future operations and
+future nets, for synthetic models of increasing size.  Each model has
+<operations> command operations and about <links-per-operation> links into
+each of them, and is compared with the link scanning implementation that the
+link indexes replaced.
+"""
+
+from collections import defaultdict
+from flow_workflow.adapter_base import NullAdapter
+from flow_workflow.entities.model.adapters import ModelAdapter
+from flow_workflow.future_operation import NullFutureOperation
+from lxml import etree
+
+import argparse
+import random
+import time
+
+
+class LegacyModelAdapter(ModelAdapter):
+    @property
+    def output_properties(self):
+        results = []
+        for link in self.links:
+            if link.to_operation == 'output connector':
+                results.append(link.to_property)
+        return results
+
+    @property
+    def edges(self):
+        edges = defaultdict(set)
+        for link in self.links:
+            edges[link.from_operation].add(link.to_operation)
+        return edges
+
+    def _calculated_child_input_connections(self, child_name):
+        input_connections = defaultdict(dict)
+        for link in self.links:
+            if link.to_operation == child_name:
+                src = self.child_operation_id(link.from_operation)
+                input_connections[src][link.to_property] = link.from_property
+        return input_connections
+
+    def _calculated_child_output_properties(self, child_name):
+        output_properties = []
+        for link in self.links:
+            if link.from_operation == child_name:
+                output_properties.append(link.from_property)
+        return output_properties
+
+
+OPERATION_TEMPLATE = '''
+  <operation name="%s">
+    <operationtype commandClass="NullCommand"
+                   typeClass="Workflow::OperationType::Command" />
+  </operation>'''
+
+LINK_TEMPLATE = '''
+  <link fromOperation="%s" fromProperty="%s"
+        toOperation="%s" toProperty="%s" />'''
+
+
+def synthetic_model(operations, links_per_operation, seed=0):
+    rng = random.Random(seed)
+    names = ['op %d' % i for i in xrange(operations)]
+
+    parts = ['<operation name="synthetic" logDir="/tmp">']
+    parts.extend(OPERATION_TEMPLATE % name for name in names)
+
+    for i, name in enumerate(names):
+        sources = ['input connector'] + names[:i]
+        for j in xrange(links_per_operation):
+            source = rng.choice(sources)
+            parts.append(LINK_TEMPLATE % (source, 'result', name,
+                'param_%d' % j))
+
+    for name in names[-links_per_operation:]:
+        parts.append(LINK_TEMPLATE % (name, 'result', 'output connector',
+            'out_%s' % name.replace(' ', '_')))
+
+    parts.append('''
+  <operationtype typeClass="Workflow::OperationType::Model">
+    <outputproperty>result</outputproperty>
+  </operationtype>
+</operation>''')
+
+    return etree.XML(''.join(parts))
+
+
+def construct(cls, xml):
+    adapter = cls(xml=xml, operation_id=0, parent=NullAdapter())
+    adapter.future_operations(NullFutureOperation(),
+            input_connections={}, output_properties=[])
+    adapter.future_net({})
+
+
+def best_time(cls, xml, repeat):
+    times = []
+    for i in xrange(repeat):
+        begin = time.time()
+        construct(cls, xml)
+        times.append(time.time() - begin)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+            default=[10, 100, 500, 2000])
+    parser.add_argument('--links-per-operation', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    arguments = parser.parse_args()
+
+    print '%10s %10s %12s %12s' % ('operations', 'links', 'legacy (s)',
+            'indexed (s)')
+    for size in arguments.sizes:
+        xml = synthetic_model(size, arguments.links_per_operation)
+        legacy = best_time(LegacyModelAdapter, xml, arguments.repeat)
+        indexed = best_time(ModelAdapter, xml, arguments.repeat)
+        print '%10d %10d %12.3f %12.3f' % (size, len(xml.findall('link')),
+                legacy, indexed)
+
+
+if __name__ == '__main__':
+    main()
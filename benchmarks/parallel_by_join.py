@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Measure how long ParallelByJoin takes to gather one output property from N
+parallel children, comparing one load_output per child with the bulk
+load_output_many path.
+
+Requires a running redis server; every net it creates is deleted afterwards.
+"""
+
+from flow.petri_net.net import Net
+from flow_workflow import factory
+from flow_workflow import future_operation
+from flow_workflow.parallel_id import ParallelIdentifier
+
+import argparse
+import redis
+import time
+
+
+OPERATION_ID = 42
+PROPERTY_NAME = 'result'
+
+
+def create_operation(net, parallel_size, parent_parallel_id):
+    fop = future_operation.FutureOperation(
+            operation_class='direct_storage',
+            operation_id=OPERATION_ID,
+            name='joined operation',
+            parent=future_operation.NullFutureOperation(),
+            input_connections={},
+            output_properties=[PROPERTY_NAME],
+            log_dir='/tmp')
+    fop.save(net)
+    operation = factory.load_operation(net, OPERATION_ID)
+
+    parallel_ids = child_parallel_ids(parent_parallel_id, parallel_size)
+    operation.store_output_many(PROPERTY_NAME,
+            ['value %d' % i for i in xrange(parallel_size)], parallel_ids)
+
+    return operation
+
+
+def child_parallel_ids(parent_parallel_id, parallel_size):
+    return [parent_parallel_id.child_identifier(OPERATION_ID, i)
+            for i in xrange(parallel_size)]
+
+
+def gather_one_by_one(operation, parallel_ids):
+    return [operation.load_output(PROPERTY_NAME, parallel_id)
+            for parallel_id in parallel_ids]
+
+
+def gather_bulk(operation, parallel_ids):
+    return operation.load_output_many(PROPERTY_NAME, parallel_ids)
+
+
+def time_gather(gather, operation, parallel_ids):
+    begin = time.time()
+    gather(operation, parallel_ids)
+    return time.time() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=6379)
+    parser.add_argument('--sizes', type=int, nargs='+',
+            default=[10, 1000, 100000])
+    parser.add_argument('--skip-one-by-one', action='store_true',
+            help='Only time the bulk gather')
+    arguments = parser.parse_args()
+
+    connection = redis.StrictRedis(host=arguments.host, port=arguments.port)
+    parent_parallel_id = ParallelIdentifier([[7, 3]])
+
+    print '%10s %15s %15s' % ('N', 'one-by-one (s)', 'bulk (s)')
+    for parallel_size in arguments.sizes:
+        net = Net.create(connection)
+        try:
+            operation = create_operation(net, parallel_size,
+                    parent_parallel_id)
+            parallel_ids = child_parallel_ids(parent_parallel_id,
+                    parallel_size)
+
+            if arguments.skip_one_by_one:
+                one_by_one = float('nan')
+            else:
+                one_by_one = time_gather(gather_one_by_one, operation,
+                        parallel_ids)
+            bulk = time_gather(gather_bulk, operation, parallel_ids)
+
+            print '%10d %15.4f %15.4f' % (parallel_size, one_by_one, bulk)
+        finally:
+            net.delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Compare ParallelIdentifier with the OrderedDict based implementation it
+replaced.  For each workload this reports the time per iteration and the
+number of garbage collected objects that stay allocated while the results of
+10,000 iterations are kept alive.
+"""
+
+from collections import OrderedDict
+from flow_workflow.parallel_id import ParallelIdentifier
+
+import argparse
+import gc
+import json
+import timeit
+
+
+class LegacyParallelIdentifier(object):
+    def __init__(self, parallel_id=[]):
+        self._entries = OrderedDict([(int(op_id), int(par_idx))
+                for op_id, par_idx in parallel_id])
+
+    @property
+    def index(self):
+        if self._entries:
+            return self._entries.values()[-1]
+
+    def refers_to(self, operation):
+        return int(operation.operation_id) in self._entries
+
+    @property
+    def _parent_entries(self):
+        parent_entries = OrderedDict(self._entries)
+        parent_entries.popitem()
+        return parent_entries
+
+    @property
+    def parent_identifier(self):
+        return LegacyParallelIdentifier(self._parent_entries.iteritems())
+
+    def _child_entries(self, operation_id, parallel_idx):
+        if int(operation_id) in self._entries:
+            raise ValueError('operation_id already in ParallelIdentifier '
+                    'op_id (%r) in %r' % (operation_id, self._entries))
+
+        child_entries = OrderedDict(self._entries)
+        child_entries[int(operation_id)] = int(parallel_idx)
+        return child_entries
+
+    def child_identifier(self, operation_id, parallel_idx):
+        return LegacyParallelIdentifier(self._child_entries(
+            operation_id, parallel_idx).iteritems())
+
+    @property
+    def stack_iterator(self):
+        current_id = self
+        while len(current_id):
+            yield current_id
+            current_id = current_id.parent_identifier
+        yield current_id
+
+    def __iter__(self):
+        return self._entries.iteritems()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def serialize(self):
+        return json.dumps(list(self))
+
+
+ENTRIES = [[4, 7], [6, 2], [8, 3]]
+
+
+def construct(cls, parent):
+    return cls(ENTRIES)
+
+
+def child(cls, parent):
+    return parent.child_identifier(10, 5)
+
+
+def stack(cls, parent):
+    return [list(pid) for pid in parent.stack_iterator]
+
+
+def construct_and_stack(cls, parent):
+    return [list(pid) for pid in cls(ENTRIES).stack_iterator]
+
+
+WORKLOADS = [
+    ('construct', construct),
+    ('child_identifier', child),
+    ('stack_iterator', stack),
+    ('construct + stack', construct_and_stack),
+]
+
+
+def retained_objects(workload, cls, parent, iterations=10000):
+    gc.collect()
+    before = len(gc.get_objects())
+    results = [workload(cls, parent) for i in xrange(iterations)]
+    gc.collect()
+    after = len(gc.get_objects())
+    del results
+    return after - before
+
+
+def time_per_iteration(workload, cls, parent, iterations):
+    timer = timeit.Timer(lambda: workload(cls, parent))
+    return min(timer.repeat(repeat=3, number=iterations)) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=100000)
+    arguments = parser.parse_args()
+
+    print '%-20s %-10s %12s %18s' % ('workload', 'class', 'usec/iter',
+            'objects/10k iter')
+    for name, workload in WORKLOADS:
+        for cls in [LegacyParallelIdentifier, ParallelIdentifier]:
+            parent = cls(ENTRIES)
+            usec = 1e6 * time_per_iteration(workload, cls, parent,
+                    arguments.iterations)
+            objects = retained_objects(workload, cls, parent)
+            label = 'legacy' if cls is LegacyParallelIdentifier else 'new'
+            print '%-20s %-10s %12.3f %18d' % (name, label, usec, objects)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,15 @@
 #!/usr/bin/env genome-perl
 
 use Data::Dumper;
-use File::Slurp qw/read_file/;
+use File::Basename qw/dirname/;
+use File::Slurp qw/read_file write_file/;
 use Flow;
 use IO::File;
+use IO::Select;
+use IO::Socket::UNIX;
 use JSON;
 use POSIX;
+use Socket qw/SOCK_STREAM SOMAXCONN SOL_SOCKET SO_PEERCRED/;
 use Switch;
 use above 'Genome';
 
@@ -214,9 +218,58 @@ sub run_command {
     Flow::write_outputs($outputs_file, $outputs);
 }
 
+sub run_shortcut_batch {
+    validate_arguments(["shortcut-batch", "<package>", "<inputs.json>",
+        "<outputs.json>"], @_);
+
+    my ($pkg, $inputs_file, $outputs_file) = @_;
+
+    print STDERR "=========\n";
+    print STDERR "Attempting to shortcut command $pkg for a batch of "
+        . "inputs...\n";
+    print STDERR "vvvvvvvvv\n";
+
+    eval "use $pkg";
+
+    if (!$pkg->can('shortcut')) {
+        exit_wrapper("$pkg does not support method 'shortcut'\n");
+    }
+
+    # Each member is shortcut on its own: one that fails or crashes is
+    # reported as not shortcut, so that it is executed later.
+    my $members = $json->decode(read_file($inputs_file));
+    my @outputs;
+    for my $i (0 .. $#$members) {
+        my $inputs = Flow::decode_io_hash($members->[$i]);
+
+        my $cmd = eval { $pkg->create(%$inputs) };
+        my $ret = $cmd && eval { $cmd->shortcut() };
+        if ($@) {
+            print STDERR "Member $i of $pkg crashed in shortcut: $@\n";
+        }
+
+        if ($ret) {
+            commit();
+            push @outputs, Flow::encode_io_hash(
+                get_command_outputs($cmd, $pkg));
+        } else {
+            rollback();
+            push @outputs, undef;
+        }
+    }
+
+    my $shortcut_count = grep { defined } @outputs;
+    print_exit_message(sprintf("Shortcut %d of %d members of command %s...\n",
+        $shortcut_count, scalar(@outputs), $pkg));
+
+    write_file($outputs_file, $json->encode(\@outputs))
+        || die "Failed to write outputs file";
+}
+
 my %_WRAPPED_FUNCTIONS = (
     'command' => \&run_command,
     'event' => \&run_event,
+    'shortcut-batch' => \&run_shortcut_batch,
 );
 
 sub safely_wrap {
@@ -251,23 +304,248 @@ sub _commit_or_rollback {
     }
 }
 
-# --- Main ---
-if (@ARGV == 0) {
-    print STDERR "Usage: $0 <action> <args>\n";
-    exit(1);
+# --- Worker pool ---
+# 'serve' keeps Genome loaded and forks a worker for every request made on a
+# unix socket, so that requests do not pay for loading it.  Requests and
+# replies are frames: a 4 byte big-endian length followed by that many bytes.
+# A request is a JSON object {"argv": [...], "env": {...}, "cwd": "..."}
+# holding the arguments this script would otherwise have been run with.  The
+# reply is a series of frames starting with "O" (stdout) or "E" (stderr),
+# followed by one starting with "X" and holding the exit code.
+#
+# Workers run whatever they are asked to as the user running the pool, so the
+# socket is only accessible to that user: it is created with mode 0600 in a
+# directory nobody else can write to, and connections from other users are
+# refused.
+
+sub read_exactly {
+    my ($handle, $length) = @_;
+
+    my $data = '';
+    while (length($data) < $length) {
+        my $read = sysread($handle, $data, $length - length($data),
+            length($data));
+        return undef unless $read;
+    }
+    return $data;
+}
+
+sub read_frame {
+    my $handle = shift;
+
+    my $header = read_exactly($handle, 4);
+    return undef unless defined $header;
+    return read_exactly($handle, unpack('N', $header));
+}
+
+sub write_frame {
+    my ($handle, $data) = @_;
+
+    my $frame = pack('N', length($data)) . $data;
+    while (length($frame)) {
+        my $written = syswrite($handle, $frame);
+        return 0 unless $written;
+        substr($frame, 0, $written) = '';
+    }
+    return 1;
+}
+
+sub peer_uid {
+    my $connection = shift;
+
+    my $credentials = getsockopt($connection, SOL_SOCKET, SO_PEERCRED);
+    return undef unless defined $credentials;
+
+    my ($pid, $uid, $gid) = unpack('i3', $credentials);
+    return $uid;
+}
+
+sub private_socket {
+    my $socket_path = shift;
+
+    my $directory = dirname($socket_path);
+    unless (-d $directory) {
+        mkdir($directory, 0700) or die "Cannot create $directory: $!";
+    }
+    my @status = stat($directory) or die "Cannot stat $directory: $!";
+    if ($status[4] != $> || $status[2] & 022) {
+        die "Refusing to serve on $socket_path, $directory must belong to "
+            . "this user and not be writable by anyone else\n";
+    }
+
+    unlink($socket_path);
+    my $old_umask = umask(077);
+    my $server = IO::Socket::UNIX->new(Local => $socket_path,
+        Type => SOCK_STREAM, Listen => SOMAXCONN);
+    my $error = $!;
+    umask($old_umask);
+    die "Cannot listen on $socket_path: $error" unless $server;
+
+    chmod(0600, $socket_path) or die "Cannot chmod $socket_path: $!";
+    return $server;
+}
+
+sub exit_code_of {
+    my $status = shift;
+
+    return WIFEXITED($status) ? WEXITSTATUS($status) : 128 + WTERMSIG($status);
+}
+
+sub run_worker {
+    my ($request, $stdout, $stderr) = @_;
+
+    $SIG{PIPE} = 'DEFAULT';
+    open(STDIN, '<', '/dev/null') or die "Cannot reopen STDIN: $!";
+    open(STDOUT, '>&', $stdout) or die "Cannot redirect STDOUT: $!";
+    open(STDERR, '>&', $stderr) or die "Cannot redirect STDERR: $!";
+    STDOUT->autoflush(1);
+    STDERR->autoflush(1);
+
+    %ENV = %{$request->{env}};
+    if (defined $request->{cwd}) {
+        chdir($request->{cwd}) or die "Cannot chdir to $request->{cwd}: $!";
+    }
+    $0 = join(' ', 'workflow-wrapper.pl', @{$request->{argv}});
+
+    run_action(@{$request->{argv}});
+    exit(0);
 }
 
-my $action = shift @ARGV;
+sub handle_request {
+    my $connection = shift;
 
-switch ($action) {
-    case('command') {
-        safely_wrap('command', @ARGV);
+    my $request = eval { $json->decode(read_frame($connection)) };
+    unless (ref($request) eq 'HASH' && ref($request->{argv}) eq 'ARRAY') {
+        die "Invalid workflow-wrapper request\n";
     }
+    $request->{env} ||= {};
+
+    pipe(my $stdout_reader, my $stdout_writer) or die "Cannot pipe: $!";
+    pipe(my $stderr_reader, my $stderr_writer) or die "Cannot pipe: $!";
+
+    my $pid = fork();
+    die "Cannot fork worker: $!" unless defined $pid;
+    if ($pid == 0) {
+        close($connection);
+        close($stdout_reader);
+        close($stderr_reader);
+        eval { run_worker($request, $stdout_writer, $stderr_writer) };
+        print STDERR $@;
+        POSIX::_exit(1);
+    }
+    close($stdout_writer);
+    close($stderr_writer);
+
+    my %kinds = (fileno($stdout_reader) => 'O', fileno($stderr_reader) => 'E');
+    my $select = IO::Select->new($stdout_reader, $stderr_reader, $connection);
+    my $open_streams = 2;
+    my $client_lost = 0;
+    while ($open_streams) {
+        for my $handle ($select->can_read()) {
+            if ($handle == $connection) {
+                # the client sends nothing after its request, so it is gone
+                kill('TERM', $pid);
+                $select->remove($connection);
+                $client_lost = 1;
+                next;
+            }
+
+            my $kind = $kinds{fileno($handle)};
+            my $read = sysread($handle, my $data, 65536);
+            if ($read) {
+                $client_lost ||= !write_frame($connection, $kind . $data);
+            } else {
+                $select->remove($handle);
+                close($handle);
+                $open_streams--;
+            }
+        }
+    }
+
+    waitpid($pid, 0);
+    write_frame($connection, 'X' . exit_code_of($?)) unless $client_lost;
+}
 
-    case ('event') {
-        safely_wrap('event', @ARGV);
+sub serve {
+    validate_arguments(["serve", "<socket>", "<max_workers>"], @_);
+
+    my ($socket_path, $max_workers) = @_;
+
+    my $server = private_socket($socket_path);
+    $SIG{PIPE} = 'IGNORE';
+
+    print STDERR sprintf("%s Serving workflow-wrapper requests on %s with "
+        . "at most %d workers\n", now(), $socket_path, $max_workers);
+
+    my %handlers;
+    while (1) {
+        while ((my $pid = waitpid(-1, WNOHANG)) > 0) {
+            delete $handlers{$pid};
+        }
+        while (keys(%handlers) >= $max_workers) {
+            my $pid = waitpid(-1, 0);
+            if ($pid > 0) {
+                delete $handlers{$pid};
+            } else {
+                %handlers = ();
+            }
+        }
+
+        my $connection = $server->accept() or next;
+
+        my $uid = peer_uid($connection);
+        if (!defined($uid) || $uid != $>) {
+            print STDERR sprintf("%s Refusing connection from uid %s\n",
+                now(), defined($uid) ? $uid : 'unknown');
+            close($connection);
+            next;
+        }
+
+        my $pid = fork();
+        if (!defined $pid) {
+            print STDERR "Cannot fork request handler: $!\n";
+        } elsif ($pid == 0) {
+            close($server);
+            eval { handle_request($connection) };
+            print STDERR $@ if $@;
+            POSIX::_exit(0);
+        } else {
+            $handlers{$pid} = 1;
+        }
+        close($connection);
     }
-    else {
-        die "Unknown action $action";
+}
+
+sub run_action {
+    my $action = shift;
+
+    switch ($action) {
+        case('command') {
+            safely_wrap('command', @_);
+        }
+
+        case ('event') {
+            safely_wrap('event', @_);
+        }
+
+        case ('shortcut-batch') {
+            safely_wrap('shortcut-batch', @_);
+        }
+        else {
+            die "Unknown action $action";
+        }
     }
 }
+
+# --- Main ---
+if (@ARGV == 0) {
+    print STDERR "Usage: $0 <action> <args>\n";
+    exit(1);
+}
+
+if ($ARGV[0] eq 'serve') {
+    shift @ARGV;
+    serve(@ARGV);
+} else {
+    run_action(@ARGV);
+}
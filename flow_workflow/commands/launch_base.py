@@ -5,8 +5,11 @@ from flow.service_locator import ServiceLocator
 from flow.util.exit import exit_process
 from flow.exit_codes import EXECUTE_ERROR
 from flow_workflow import factory
+from flow_workflow import io
+from flow_workflow.compiled_workflow import CompiledWorkflow
+from flow_workflow.compiled_workflow import CompiledWorkflowCache
 from flow_workflow.completion import MonitoringCompletionHandler
-from flow_workflow.entities.workflow.adapters import WorkflowAdapter
+from flow_workflow.factory import operation_variable_name
 from flow_workflow.future_operation import ForeignFutureOperation
 from flow_workflow.future_operation import NullFutureOperation
 from flow_workflow.historian.operation_data import OperationData
@@ -21,6 +24,7 @@ import json
 import logging
 import os
 import pwd
+import time
 
 
 LOG = logging.getLogger(__name__)
@@ -116,7 +120,7 @@ class LaunchWorkflowCommandBase(CommandBase):
 
         if block:
             if self.complete():
-                self.write_outputs(net, workflow.child_adapter.operation_id,
+                self.write_outputs(net, workflow.operation_id,
                         workflow.output_properties,
                         parsed_arguments.outputs_file)
 
@@ -154,18 +158,15 @@ class LaunchWorkflowCommandBase(CommandBase):
             return False
 
     def construct_net(self, xml_filename, inputs_filename, resources_filename):
-        xml = load_xml(xml_filename)
+        begin_time = time.time()
         inputs = load_inputs(inputs_filename)
-        resources = load_resources(resources_filename)
-
-        workflow = WorkflowAdapter(xml, inputs,
-                local_workflow=self.local_workflow)
-
-        future_net = workflow.future_net(resources)
+        workflow = self.compile_workflow(xml_filename, inputs.keys(),
+                resources_filename)
 
         # XXX Update builder to use injector
         builder = Builder(self.storage)
-        stored_net = builder.store(future_net, self.variables, self.constants)
+        stored_net = builder.store(workflow.future_net, self.variables,
+                self.constants)
         LOG.info('Created net with key (%s)', stored_net.key)
 
         if self.operation_data:
@@ -175,17 +176,52 @@ class LaunchWorkflowCommandBase(CommandBase):
         else:
             parent_future_op = NullFutureOperation()
 
-        future_operations = workflow.future_operations(parent_future_op,
-                input_connections=None, output_properties=None)
+        future_operations = workflow.future_operations(parent_future_op)
 
+        variables = {}
         for future_operation in future_operations:
-            future_operation.save(stored_net)
-        workflow.store_inputs(stored_net)
+            variables[operation_variable_name(future_operation.operation_id)
+                    ] = future_operation.as_dict(default_net_key=stored_net.key)
+        variables.update(workflow.input_variables(inputs))
+        io.store_variables(stored_net, variables)
+
+        start_place_index = builder.future_places[
+                workflow.future_net.start_place]
 
-        start_place_index = builder.future_places[future_net.start_place]
+        LOG.info('Constructed net (%s) with %d operations in %.3f seconds',
+                stored_net.key, len(future_operations),
+                time.time() - begin_time)
 
         return workflow, stored_net, start_place_index
 
+    def compile_workflow(self, xml_filename, input_names, resources_filename):
+        xml_text = load_text(xml_filename)
+        resources = load_resources(resources_filename)
+
+        cache = self.compiled_workflow_cache
+        if cache:
+            key = CompiledWorkflowCache.key(xml_text, resources, input_names,
+                    self.local_workflow)
+            workflow = cache.get(key)
+            if workflow is not None:
+                LOG.debug('Compiled workflow cache hit (%s)', key)
+                return workflow
+
+        workflow = CompiledWorkflow.compile(etree.XML(xml_text), input_names,
+                resources, local_workflow=self.local_workflow)
+        if cache:
+            cache.put(key, workflow)
+
+        return workflow
+
+    @property
+    def compiled_workflow_cache(self):
+        directory = os.environ.get('FLOW_WORKFLOW_COMPILED_CACHE_DIR')
+        if directory:
+            return CompiledWorkflowCache(directory)
+        else:
+            return None
+
     def write_outputs(self, net, operation_id, output_properties, outputs_file):
         if outputs_file:
             op = factory.load_operation(net=net, operation_id=operation_id)
@@ -229,10 +265,12 @@ class LaunchWorkflowCommandBase(CommandBase):
 
 
 def load_xml(filename):
-    with open(filename) as f:
-        xml = etree.XML(f.read())
+    return etree.XML(load_text(filename))
+
 
-    return xml
+def load_text(filename):
+    with open(filename) as f:
+        return f.read()
 
 
 def load_inputs(filename):
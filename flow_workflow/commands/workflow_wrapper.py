@@ -7,10 +7,12 @@ from flow.util.exit import exit_process
 from flow.exit_codes import EXECUTE_ERROR
 from flow_workflow import factory
 from flow_workflow import io
+from flow_workflow import perl_worker
 from flow_workflow.parallel_id import ParallelIdentifier
 from injector import inject
 from tempfile import NamedTemporaryFile
 from twisted.internet import defer
+from twisted.internet.error import ConnectError
 
 import copy
 import flow.interfaces
@@ -34,9 +36,27 @@ CMDLINE_BUILDERS = {
         'event':_build_event_cmdline,
         }
 
+
+# Number of parallel-by members shortcut by each perl_wrapper process
+SHORTCUT_CHUNK_SIZE = 500
+
 @inject(perl_wrapper=setting('workflow.perl_wrapper'),
+        perl_worker_socket=setting('workflow.perl_worker_socket'),
         storage=flow.interfaces.IStorage)
 class WorkflowWrapperCommand(CommandBase):
+    """
+    Runs one shortcut or execute attempt of a perl command or event.  When
+    perl_worker_socket is set and a worker pool ('workflow-wrapper.pl serve')
+    is listening there, the attempt runs in a worker forked from the pool,
+    which already has Genome loaded; otherwise perl_wrapper is started.
+
+    With --shortcut-parallel-by, shortcut is tried for every member of a
+    parallel-by on that property, SHORTCUT_CHUNK_SIZE members per perl
+    process, and the outcome is recorded for each member.  A member's own
+    shortcut attempt then reports the recorded outcome without running perl.
+    Members of a chunk whose perl process fails have no recorded outcome and
+    try to shortcut on their own.
+    """
     injector_modules = [RedisConfiguration]
 
     @staticmethod
@@ -56,12 +76,27 @@ class WorkflowWrapperCommand(CommandBase):
         parser.add_argument('--parallel-id', default='[]',
                 help='used to look up inputs')
 
+        parser.add_argument('--shortcut-parallel-by',
+                help='shortcut every member of a parallel-by on this '
+                'property')
+
     def _execute(self, parsed_arguments):
         net = rom.get_object(self.storage, parsed_arguments.net_key)
 
         parallel_id = ParallelIdentifier.deserialize(
                 parsed_arguments.parallel_id)
 
+        if parsed_arguments.shortcut_parallel_by:
+            return self._shortcut_parallel_by(parsed_arguments, net=net,
+                    parallel_id=parallel_id)
+
+        if parsed_arguments.method == 'shortcut':
+            shortcut = io.load_shortcut_result(net,
+                    operation_id=parsed_arguments.operation_id,
+                    parallel_id=parallel_id)
+            if shortcut is not None:
+                return self._batched_shortcut(shortcut)
+
         _execute_deferred = defer.Deferred()
 
         inputs_file = NamedTemporaryFile()
@@ -69,17 +104,12 @@ class WorkflowWrapperCommand(CommandBase):
         write_inputs(inputs_file, net=net, parallel_id=parallel_id,
                 operation_id=parsed_arguments.operation_id)
 
-        cmdline = copy.copy(self.perl_wrapper)
         cmdline_builder = CMDLINE_BUILDERS[
                 parsed_arguments.action_type]
-        cmdline.extend(cmdline_builder(parsed_arguments.method,
-            parsed_arguments.action_id, inputs_file, outputs_file))
+        wrapper_args = cmdline_builder(parsed_arguments.method,
+            parsed_arguments.action_id, inputs_file, outputs_file)
 
-
-        LOG.info('Executing (%s): %s', socket.gethostname(),
-                " ".join(cmdline))
-        logannotator = LogAnnotator(cmdline)
-        deferred = logannotator.start()
+        deferred = self._run_wrapper(wrapper_args)
         deferred.addCallback(self._finish,
                 parsed_arguments=parsed_arguments,
                 inputs_file=inputs_file,
@@ -91,6 +121,113 @@ class WorkflowWrapperCommand(CommandBase):
 
         return _execute_deferred
 
+    def _batched_shortcut(self, shortcut):
+        if shortcut:
+            LOG.info('Shortcut by a batched shortcut attempt.')
+            self.exit_code = 0
+        else:
+            LOG.info('A batched shortcut attempt found no shortcut.')
+            self.exit_code = 1
+
+        return defer.succeed(None)
+
+    def _shortcut_parallel_by(self, parsed_arguments, net, parallel_id):
+        operation = factory.load_operation(net,
+                parsed_arguments.operation_id)
+        members = parallel_by_members(operation,
+                parsed_arguments.shortcut_parallel_by, parallel_id)
+
+        deferred = defer.succeed(0)
+        for begin in xrange(0, len(members), SHORTCUT_CHUNK_SIZE):
+            deferred.addCallback(self._shortcut_chunk, net=net,
+                    operation_id=parsed_arguments.operation_id,
+                    action_id=parsed_arguments.action_id,
+                    members=members[begin:begin + SHORTCUT_CHUNK_SIZE])
+        deferred.addCallback(self._shortcut_parallel_by_finished)
+        deferred.addErrback(self._exit)
+
+        return deferred
+
+    def _shortcut_chunk(self, previous_exit_code, net, operation_id,
+            action_id, members):
+        inputs_file = NamedTemporaryFile()
+        outputs_file = NamedTemporaryFile()
+        json.dump([inputs for member_parallel_id, inputs in members],
+                inputs_file)
+        inputs_file.flush()
+
+        deferred = self._run_wrapper(['shortcut-batch', action_id,
+            inputs_file.name, outputs_file.name])
+        deferred.addCallback(self._shortcut_chunk_finished, net=net,
+                operation_id=operation_id, members=members,
+                inputs_file=inputs_file, outputs_file=outputs_file,
+                previous_exit_code=previous_exit_code)
+
+        return deferred
+
+    def _shortcut_chunk_finished(self, exit_code, net, operation_id, members,
+            inputs_file, outputs_file, previous_exit_code):
+        if exit_code == 0:
+            store_shortcut_outputs(outputs_file, net=net,
+                    operation_id=operation_id,
+                    parallel_ids=[member_parallel_id
+                        for member_parallel_id, inputs in members])
+        else:
+            # Nothing is recorded for these members, so each of them tries
+            # to shortcut on its own.
+            LOG.warning("Non-zero exit-code: %s from perl_wrapper while "
+                    "shortcutting %d members starting at %r, continuing "
+                    "with the remaining members.", exit_code, len(members),
+                    members[0][0])
+
+        inputs_file.close()
+        outputs_file.close()
+
+        return previous_exit_code or exit_code
+
+    def _shortcut_parallel_by_finished(self, exit_code):
+        self.exit_code = exit_code
+
+    def _run_wrapper(self, wrapper_args):
+        if self.perl_worker_socket:
+            return self._run_in_worker(wrapper_args)
+        else:
+            return self._run_perl(wrapper_args)
+
+    def _run_perl(self, wrapper_args):
+        cmdline = copy.copy(self.perl_wrapper)
+        cmdline.extend(wrapper_args)
+
+        LOG.info('Executing (%s): %s', socket.gethostname(),
+                " ".join(cmdline))
+        logannotator = LogAnnotator(cmdline)
+        return logannotator.start()
+
+    def _run_in_worker(self, wrapper_args):
+        LOG.info('Executing (%s) in perl worker pool %s: %s',
+                socket.gethostname(), self.perl_worker_socket,
+                " ".join(wrapper_args))
+        # The worker's output is annotated just like that of a perl_wrapper
+        # process started by LogAnnotator.
+        annotator = LogAnnotator(self.perl_wrapper + list(wrapper_args))
+        deferred = perl_worker.run(self.perl_worker_socket, wrapper_args,
+                stdout=_AnnotatedStream(annotator.outReceived),
+                stderr=_AnnotatedStream(annotator.errReceived))
+        deferred.addErrback(self._worker_failed, wrapper_args)
+        return deferred
+
+    def _worker_failed(self, failure, wrapper_args):
+        if failure.check(ConnectError):
+            LOG.warning("No perl worker pool is listening on %s (%s), "
+                    "starting perl_wrapper instead.", self.perl_worker_socket,
+                    failure.getErrorMessage())
+            return self._run_perl(wrapper_args)
+
+        # The attempt may have had side effects, so it is not retried.
+        failure.trap(perl_worker.WorkerLostError)
+        LOG.error("%s", failure.getErrorMessage())
+        return EXECUTE_ERROR
+
     def _finish(self, exit_code, parsed_arguments, inputs_file, outputs_file, parallel_id,
             net, _execute_deferred):
         self.exit_code = exit_code
@@ -113,6 +250,18 @@ class WorkflowWrapperCommand(CommandBase):
         exit_process(EXECUTE_ERROR)
 
 
+class _AnnotatedStream(object):
+    """
+    File-like object handing everything written to it to <received>, one of
+    LogAnnotator's outReceived or errReceived.
+    """
+    def __init__(self, received):
+        self.write = received
+
+    def flush(self):
+        pass
+
+
 def write_inputs(file_object, net, parallel_id, operation_id):
     operation = factory.load_operation(net, operation_id)
     inputs = operation.load_inputs(parallel_id)
@@ -128,3 +277,43 @@ def read_and_store_outputs(file_obj, net, operation_id, parallel_id):
 
     io.store_outputs(net=net, operation_id=operation_id,
             outputs=outputs, parallel_id=parallel_id)
+
+
+def parallel_by_members(operation, parallel_property, parallel_id):
+    """
+    Return the (parallel_id, inputs) of each member that a parallel-by on
+    <parallel_property> of <operation> at <parallel_id> will have.
+    """
+    inputs = operation.load_inputs(parallel_id)
+
+    members = []
+    for parallel_idx, value in enumerate(inputs[parallel_property]):
+        member_inputs = dict(inputs)
+        member_inputs[parallel_property] = value
+        members.append((parallel_id.child_identifier(operation.operation_id,
+            parallel_idx), member_inputs))
+
+    return members
+
+
+def store_shortcut_outputs(file_obj, net, operation_id, parallel_ids):
+    """
+    Store the outputs of the members that a batched shortcut attempt
+    shortcut, and then whether each of <parallel_ids> was shortcut.
+    """
+    member_outputs = json.load(file_obj)
+    if len(member_outputs) != len(parallel_ids):
+        raise ValueError('Expected outputs of %d members, got %d' %
+                (len(parallel_ids), len(member_outputs)))
+
+    variables = {}
+    results = {}
+    for parallel_id, outputs in zip(parallel_ids, member_outputs):
+        if outputs is not None:
+            variables.update(io.output_variables(operation_id, outputs,
+                parallel_id=parallel_id))
+        results[parallel_id] = outputs is not None
+
+    io.store_variables(net, variables)
+    io.store_shortcut_results(net, operation_id=operation_id,
+            results=results)
@@ -0,0 +1,181 @@
+from flow_workflow import io
+from flow_workflow.entities.workflow.adapters import WorkflowAdapter
+from flow_workflow.future_operation import NullFutureOperation
+
+import cPickle
+import flow_workflow
+import hashlib
+import json
+import logging
+import os
+import pkg_resources
+import stat
+import tempfile
+
+
+LOG = logging.getLogger(__name__)
+
+
+# Bump whenever the pickled layout of CompiledWorkflow changes.  Changes to
+# the code building the future nets are covered by code_version.
+CACHE_FORMAT_VERSION = 1
+
+
+_CODE_VERSION = None
+
+
+def code_version():
+    """
+    Return a digest of the flow_workflow sources and the installed flow
+    version, so that compiled workflows cached by other code are not used.
+    """
+    global _CODE_VERSION
+    if _CODE_VERSION is None:
+        digest = hashlib.sha1()
+        try:
+            digest.update(pkg_resources.get_distribution('flow').version)
+        except pkg_resources.DistributionNotFound:
+            pass
+
+        package_directory = os.path.dirname(
+                os.path.abspath(flow_workflow.__file__))
+        for directory, subdirectories, filenames in sorted(
+                os.walk(package_directory)):
+            subdirectories.sort()
+            for filename in sorted(filenames):
+                if filename.endswith('.py'):
+                    path = os.path.join(directory, filename)
+                    digest.update(os.path.relpath(path, package_directory))
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+
+        _CODE_VERSION = digest.hexdigest()
+
+    return _CODE_VERSION
+
+
+def _is_private(path, file_type):
+    """
+    Return whether <path> is a <file_type> (stat.S_ISDIR or stat.S_ISREG),
+    owned by this user and not writable by anyone else.
+    """
+    status = os.lstat(path)
+    return (file_type(status.st_mode) and status.st_uid == os.getuid()
+            and not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+
+class CompiledWorkflow(object):
+    """
+    Everything launching a workflow needs from the adapters: the future net
+    and the future operations, built without reference to a stored net.
+    """
+    def __init__(self, future_net, future_operations, root_operation,
+            input_storage_operation_id, operation_id, output_properties):
+        self.future_net = future_net
+        self._future_operations = future_operations
+        self._root_operation = root_operation
+        self.input_storage_operation_id = input_storage_operation_id
+        self.operation_id = operation_id
+        self.output_properties = output_properties
+
+    @classmethod
+    def compile(cls, xml, input_names, resources, local_workflow=False):
+        workflow = WorkflowAdapter(xml, {name: None for name in input_names},
+                local_workflow=local_workflow)
+        future_net = workflow.future_net(resources)
+
+        root_operation = NullFutureOperation()
+        future_operations = workflow.future_operations(root_operation,
+                input_connections=None, output_properties=None)
+
+        return cls(future_net=future_net,
+                future_operations=future_operations,
+                root_operation=root_operation,
+                input_storage_operation_id=
+                    workflow.inputs_storage_adapter.operation_id,
+                operation_id=workflow.child_adapter.operation_id,
+                output_properties=workflow.output_properties)
+
+    def future_operations(self, parent_future_operation):
+        """
+        Return the future operations, with the top level operations made
+        children of <parent_future_operation>.
+        """
+        for future_operation in self._future_operations:
+            if future_operation.parent is self._root_operation:
+                future_operation.parent = parent_future_operation
+                parent_future_operation.add_child(future_operation)
+        self._root_operation = parent_future_operation
+
+        return self._future_operations
+
+    def input_variables(self, inputs):
+        return io.output_variables(
+                operation_id=self.input_storage_operation_id, outputs=inputs)
+
+
+class CompiledWorkflowCache(object):
+    """
+    On-disk cache of pickled CompiledWorkflows, keyed by a digest of
+    everything that goes into compiling them.  Since unpickling can run
+    arbitrary code, entries are only loaded when both they and the
+    directory belong to this user and nobody else can write to them.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    @staticmethod
+    def key(xml_text, resources, input_names, local_workflow):
+        digest = hashlib.sha1()
+        digest.update(json.dumps([CACHE_FORMAT_VERSION, code_version(),
+            sorted(input_names), bool(local_workflow), resources],
+            sort_keys=True))
+        digest.update(xml_text)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if not (_is_private(self.directory, stat.S_ISDIR)
+                    and _is_private(path, stat.S_ISREG)):
+                LOG.warning('Ignoring compiled workflow (%s), it or its '
+                        'directory is not private to this user', path)
+                return None
+
+            with open(path, 'rb') as f:
+                return cPickle.load(f)
+
+        except (IOError, OSError):
+            return None
+
+        except Exception:
+            LOG.warning('Ignoring unreadable compiled workflow (%s)', path,
+                    exc_info=True)
+            return None
+
+    def put(self, key, compiled_workflow):
+        try:
+            data = cPickle.dumps(compiled_workflow, cPickle.HIGHEST_PROTOCOL)
+        except Exception:
+            LOG.warning('Could not pickle compiled workflow, not caching it',
+                    exc_info=True)
+            return
+
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0700)
+
+            # Write to a temporary file and rename it into place so that
+            # concurrent submissions never read a partial entry.
+            fd, temp_path = tempfile.mkstemp(dir=self.directory,
+                    suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.rename(temp_path, self._path(key))
+
+        except (IOError, OSError):
+            LOG.warning('Could not write compiled workflow to cache (%s)',
+                    self.directory, exc_info=True)
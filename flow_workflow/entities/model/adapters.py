@@ -55,6 +55,7 @@ class ModelAdapter(adapter_base.ParallelXMLAdapterBase):
             self._add_child(child)
 
         self.links = map(Link, self.xml.findall('link'))
+        self._index_links()
 
         LOG.debug('child operation ids for model (%s): %s',
                 self.operation_id, self._child_operation_ids)
@@ -63,22 +64,36 @@ class ModelAdapter(adapter_base.ParallelXMLAdapterBase):
         self.children.append(child)
         self._child_operation_ids[child.name] = child.operation_id
 
+    def _index_links(self):
+        # Index links by operation name once, so that per-child queries are
+        # proportional to that child's links rather than to the whole model.
+        self._links_from = defaultdict(list)
+        self._links_to = defaultdict(list)
+        self._edges = defaultdict(set)
+        for link in self.links:
+            from_operation = link.from_operation
+            to_operation = link.to_operation
+            self._links_from[from_operation].append(link)
+            self._links_to[to_operation].append(link)
+            self._edges[from_operation].add(to_operation)
+
+    def links_from(self, operation_name):
+        return self._links_from.get(operation_name, [])
+
+    def links_to(self, operation_name):
+        return self._links_to.get(operation_name, [])
+
     @property
     def output_properties(self):
-        results = []
-        for link in self.links:
-            if link.to_operation == 'output connector':
-                results.append(link.to_property)
-        return results
+        return [link.to_property
+                for link in self.links_to('output connector')]
 
     @property
     def edges(self):
-        edges = defaultdict(set)
-        for link in self.links:
-            edges[link.from_operation].add(link.to_operation)
-
-        #return transitive_reduction(edges)
-        return edges
+        # Callers get their own copy, so they cannot change the link index.
+        #return transitive_reduction(self._edges)
+        return {source: set(destinations)
+                for source, destinations in self._edges.iteritems()}
 
     def child_operation_id(self, child_name):
         return self._child_operation_ids[child_name]
@@ -91,10 +106,9 @@ class ModelAdapter(adapter_base.ParallelXMLAdapterBase):
 
     def _calculated_child_input_connections(self, child_name):
         input_connections = defaultdict(dict)
-        for link in self.links:
-            if link.to_operation == child_name:
-                src = self.child_operation_id(link.from_operation)
-                input_connections[src][link.to_property] = link.from_property
+        for link in self.links_to(child_name):
+            src = self.child_operation_id(link.from_operation)
+            input_connections[src][link.to_property] = link.from_property
 
         return input_connections
 
@@ -105,12 +119,7 @@ class ModelAdapter(adapter_base.ParallelXMLAdapterBase):
             return self._calculated_child_output_properties(child_name)
 
     def _calculated_child_output_properties(self, child_name):
-        output_properties = []
-        for link in self.links:
-            if link.from_operation == child_name:
-                output_properties.append(link.from_property)
-
-        return output_properties
+        return [link.from_property for link in self.links_from(child_name)]
 
     def subnets(self, resources):
         child_nets = {}
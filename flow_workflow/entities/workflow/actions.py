@@ -1,4 +1,6 @@
 from flow.petri_net.actions.base import BasicActionBase
+from flow.petri_net.actions.expire import ExpireNetAction
+from flow_workflow import factory
 
 
 class NotificationAction(BasicActionBase):
@@ -9,3 +11,8 @@ class NotificationAction(BasicActionBase):
                 net, status=self.args['status'])
         return map(net.token, active_tokens), deferred
 
+
+class ExpireWorkflowNetAction(ExpireNetAction):
+    def execute(self, net, *args, **kwargs):
+        factory.forget_operations(net.key)
+        return ExpireNetAction.execute(self, net, *args, **kwargs)
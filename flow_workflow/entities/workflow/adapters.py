@@ -1,6 +1,6 @@
 from flow_workflow.entities.workflow.future_nets import WorkflowNet
-from flow_workflow.parallel_id import ParallelIdentifier
 from flow_workflow.adapter_base import AdapterBase
+from flow_workflow import io
 import flow_workflow.factory
 
 
@@ -32,11 +32,11 @@ class WorkflowAdapter(AdapterBase):
     def name(self):
         return 'Workflow'
 
-    def store_inputs(self, net):
-        input_storage_operation = flow_workflow.factory.load_operation(net,
-                self.inputs_storage_adapter.operation_id)
-        input_storage_operation.store_outputs(self.inputs,
-                parallel_id=ParallelIdentifier())
+    @property
+    def input_variables(self):
+        return io.output_variables(
+                operation_id=self.inputs_storage_adapter.operation_id,
+                outputs=self.inputs)
 
     @property
     def input_connections(self):
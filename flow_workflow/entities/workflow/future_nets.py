@@ -1,5 +1,5 @@
 from flow.petri_net import future
-from flow.petri_net.actions.expire import ExpireNetAction
+from flow_workflow.entities.workflow.actions import ExpireWorkflowNetAction
 from flow_workflow.entities.workflow.actions import NotificationAction
 from flow_workflow.historian.actions import UpdateOperationStatus
 
@@ -37,11 +37,11 @@ class WorkflowNet(future.FutureNet):
                 name='notify_failure_place')
 
         self.observe_transition(self.notify_success_transition,
-                observer_action=future.FutureAction(cls=ExpireNetAction,
-                    ttl_days='1'),
+                observer_action=future.FutureAction(
+                    cls=ExpireWorkflowNetAction, ttl_days='1'),
                 name='expire_on_success')
 
         self.observe_transition(self.notify_failure_transition,
-                observer_action=future.FutureAction(cls=ExpireNetAction,
-                    ttl_days='7'),
+                observer_action=future.FutureAction(
+                    cls=ExpireWorkflowNetAction, ttl_days='7'),
                 name='expire_on_failure')
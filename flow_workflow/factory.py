@@ -1,4 +1,4 @@
-from flow.util.containers import head
+from flow_workflow.lru_cache import LRUCache
 import pkg_resources
 import re
 import logging
@@ -9,15 +9,69 @@ LOG = logging.getLogger(__name__)
 _NEXT_OPERATION_ID = -1
 
 
+# Operation definitions never change once a net is constructed, so they are
+# shared by every action in this process that loads operations from the net.
+OPERATION_CACHE_SIZE = 10000
+_OPERATION_DEFINITIONS = LRUCache(OPERATION_CACHE_SIZE)
+
+
+class EntryPointRegistry(object):
+    """
+    Resolves the entry points of <group> by name.  Installed distributions
+    are only scanned once, and each entry point is loaded at most once,
+    until refresh is called.
+    """
+    def __init__(self, group):
+        self.group = group
+        self._entry_points = None
+        self._loaded = {}
+
+    def refresh(self):
+        entry_points = {}
+        for ep in pkg_resources.iter_entry_points(self.group):
+            # The first distribution providing a name wins, as with
+            # iter_entry_points(group, name).
+            entry_points.setdefault(ep.name, ep)
+
+        self._entry_points = entry_points
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            if self._entry_points is None:
+                self.refresh()
+
+            try:
+                ep = self._entry_points[name]
+            except KeyError:
+                raise KeyError("No entry point named '%s' in group '%s'" %
+                        (name, self.group))
+            self._loaded[name] = ep.load()
+
+        return self._loaded[name]
+
+
+ADAPTERS = EntryPointRegistry('flow_workflow.adapters')
+OPERATIONS = EntryPointRegistry('flow_workflow.operations')
+
+
+def refresh_entry_points():
+    """
+    Rescan installed distributions for adapters and operations, e.g. after
+    installing a plugin into a running process.
+    """
+    ADAPTERS.refresh()
+    OPERATIONS.refresh()
+    _OPERATION_DEFINITIONS.clear()
+
+
 def adapter(operation_type, *args, **kwargs):
     global _NEXT_OPERATION_ID
     _NEXT_OPERATION_ID += 1
     LOG.debug('Loading adapter for operation_type %s, '
             'with args: %s -- and kwargs: %s',
             operation_type, args, kwargs)
-    ep = head(pkg_resources.iter_entry_points('flow_workflow.adapters',
-        sanitize_operation_type(operation_type)))
-    cls = ep.load()
+    cls = ADAPTERS[sanitize_operation_type(operation_type)]
     obj = cls(operation_id=_NEXT_OPERATION_ID, *args, **kwargs)
 
     return obj
@@ -38,17 +92,33 @@ def sanitize_operation_type(operation_type_string):
 
 
 def load_operation(net, operation_id):
-    operation_dict = net.variables[operation_variable_name(operation_id)]
-    LOG.debug('Loading operation %s using dict: %s',
-            operation_id, operation_dict)
-
-    ep = head(pkg_resources.iter_entry_points(
-        'flow_workflow.operations', operation_dict.pop('_class')))
-    cls = ep.load()
+    cls, operation_dict = _operation_definition(net, operation_id)
     LOG.debug('Loaded operation %s (%r) from net %s: %s',
             operation_id, cls, net.key, operation_dict)
     return cls(net=net, **operation_dict)
 
 
+def _operation_definition(net, operation_id):
+    cache_key = (net.key, int(operation_id))
+    definition = _OPERATION_DEFINITIONS.get(cache_key)
+    if definition is None:
+        operation_dict = net.variables[operation_variable_name(operation_id)]
+        LOG.debug('Loading operation %s using dict: %s',
+                operation_id, operation_dict)
+
+        definition = (OPERATIONS[operation_dict.pop('_class')],
+                operation_dict)
+        _OPERATION_DEFINITIONS[cache_key] = definition
+
+    return definition
+
+
+def forget_operations(net_key):
+    """
+    Drop the cached operation definitions of <net_key>, e.g. when it expires.
+    """
+    _OPERATION_DEFINITIONS.discard_matching(lambda key: key[0] == net_key)
+
+
 def operation_variable_name(operation_id):
     return '_wf_op_%s' % operation_id
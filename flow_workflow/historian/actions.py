@@ -2,6 +2,7 @@ from abc import abstractmethod
 from flow.petri_net.actions.base import BasicActionBase
 from flow.util.containers import head
 from flow_workflow import factory
+from flow_workflow.historian.clock import CLOCK
 from flow_workflow.historian.operation_data import OperationData
 from flow_workflow.parallel_id import ParallelIdentifier
 from time import localtime, strftime
@@ -54,14 +55,25 @@ class HistorianActionBase(BasicActionBase):
 
     def update_operation_status(self, historian, net, operation,
             color_descriptor, parallel_id, token_data):
+        fields = self.operation_fields(operation, color_descriptor,
+                parallel_id, token_data)
+        fields['workflow_plan_id'] = net.constant('workflow_plan_id')
+        fields['user_name'] = net.constant('user_name')
+
+        return historian.update(**fields)
+
+    def operation_fields(self, operation, color_descriptor, parallel_id,
+            token_data):
+        """
+        Return the fields of an update of <operation> that are not shared by
+        every operation in the net.
+        """
         operation_data = OperationData(net_key=operation.net_key,
                 operation_id=operation.operation_id,
                 color=color_descriptor.color)
         fields = {
                 'operation_data': operation_data.to_dict,
                 'name': operation.name,
-                'workflow_plan_id': net.constant('workflow_plan_id'),
-                'user_name': net.constant('user_name'),
                 }
 
         fields.update(self.message_args)
@@ -72,7 +84,7 @@ class HistorianActionBase(BasicActionBase):
         fields.update(self.get_shell_command_fields(token_data))
         fields.update(self.get_log_fields(operation.log_manager, parallel_id))
 
-        return historian.update(**fields)
+        return fields
 
     def get_shell_command_fields(self, token_data):
         fields = {}
@@ -94,18 +106,18 @@ class HistorianActionBase(BasicActionBase):
 
     def get_log_fields(self, log_manager, parallel_id):
         fields = {}
-        if log_manager.stderr_log_path(parallel_id):
-            fields['stderr'] = log_manager.stderr_log_path(parallel_id)
-        if log_manager.stdout_log_path(parallel_id):
-            fields['stdout'] = log_manager.stdout_log_path(parallel_id)
+        stderr = log_manager.stderr_log_path(parallel_id)
+        if stderr:
+            fields['stderr'] = stderr
+        stdout = log_manager.stdout_log_path(parallel_id)
+        if stdout:
+            fields['stdout'] = stdout
 
         return fields
 
     @property
     def timestamp(self):
-        now = self.connection.time()
-        # convert (sec, microsec) from redis to floating point sec
-        now = now[0] + now[1] * 1e-6
+        now = CLOCK.time(self.connection)
 
         return strftime("%Y-%m-%d %H:%M:%S", localtime(now)).upper()
 
@@ -145,15 +157,17 @@ class UpdateChildrenStatuses(HistorianActionBase):
 
     def _execute(self, historian, net, color_descriptor, parallel_id,
             token_data):
-        deferreds = []
+        updates = []
         operation = self.operation(net)
         for child_operation in operation.iter_children():
-            deferred = self.update_operation_status(historian, net,
-                    child_operation, color_descriptor, parallel_id,
-                    token_data=token_data)
-            deferreds.append(deferred)
-
-        return defer.gatherResults(deferreds)
+            fields = self.operation_fields(child_operation, color_descriptor,
+                    parallel_id, token_data=token_data)
+            del fields['status']
+            updates.append(fields)
+
+        return historian.update_many(status=self.args['status'],
+                workflow_plan_id=net.constant('workflow_plan_id'),
+                user_name=net.constant('user_name'), updates=updates)
 
 
 class UpdateOperationStatus(HistorianActionBase):
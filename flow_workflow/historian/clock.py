@@ -0,0 +1,50 @@
+import time
+
+
+SYNC_INTERVAL = 60
+
+
+class RedisClock(object):
+    """
+    Tells the time of a redis server without a round trip per call.  The
+    offset between the server's clock and the local one is measured with a
+    single TIME command, and measured again once it is <sync_interval>
+    seconds old or the local clock has gone backwards.
+    """
+    def __init__(self, sync_interval=SYNC_INTERVAL, local_time=time.time):
+        self.sync_interval = sync_interval
+        self._local_time = local_time
+
+        self._offset = None
+        self._synced_at = None
+
+    def time(self, connection):
+        """
+        Return the server time in floating point seconds since the epoch.
+        """
+        now = self._local_time()
+        if self._needs_sync(now):
+            self.sync(connection)
+            now = self._local_time()
+
+        return now + self._offset
+
+    def _needs_sync(self, now):
+        if self._synced_at is None:
+            return True
+
+        return not 0 <= now - self._synced_at < self.sync_interval
+
+    def sync(self, connection):
+        before = self._local_time()
+        seconds, microseconds = connection.time()
+        after = self._local_time()
+
+        # assume the server read its clock halfway through the round trip
+        server_time = seconds + microseconds * 1e-6
+        self._offset = server_time - (before + after) / 2.0
+        self._synced_at = after
+
+
+# shared by every historian action in this process
+CLOCK = RedisClock()
@@ -1,15 +1,33 @@
 from flow.commands.service import ServiceCommand
 from flow.configuration.inject.broker import BrokerConfiguration
+from flow.configuration.settings.injector import setting
 from flow_workflow.configuration.inject.oltp import OLTPConfiguration
 from flow_workflow.historian import handler
+from flow_workflow.historian import sharding
+from injector import inject
 
 import logging
+import os
 
 
 LOG = logging.getLogger(__name__)
 
 
+@inject(shards=setting('workflow.historian.shards'),
+        exchange=setting('workflow.historian.exchange'),
+        update_routing_key=setting('workflow.historian.update_routing_key'),
+        bulk_update_routing_key=setting(
+            'workflow.historian.bulk_update_routing_key'),
+        bindings=setting('bindings'))
 class WorkflowHistorianCommand(ServiceCommand):
+    """
+    Consumes historian updates.  When workflow.historian.shards is greater
+    than one, each worker consumes the partition named by the
+    FLOW_WORKFLOW_HISTORIAN_SHARD environment variable.  Publishers then
+    send to sharded routing keys, so the worker refuses to start unless the
+    bindings setting routes its shard to its queues (see
+    sharding.sharded_bindings).
+    """
     injector_modules = [
             BrokerConfiguration,
             OLTPConfiguration,
@@ -18,6 +36,43 @@ class WorkflowHistorianCommand(ServiceCommand):
     def _setup(self, *args, **kwargs):
         self.handlers = [
             self.injector.get(handler.HistorianUpdateHandler),
+            self.injector.get(handler.HistorianBulkUpdateHandler),
         ]
 
+        if self.shards > 1:
+            shard = self.shard
+            routing_keys = [self.update_routing_key,
+                    self.bulk_update_routing_key]
+            expected_bindings = {}
+            for update_handler, routing_key in zip(self.handlers,
+                    routing_keys):
+                update_handler.queue_name = sharding.sharded_name(
+                        update_handler.queue_name, shard)
+                expected_bindings[update_handler.queue_name] = [
+                        sharding.sharded_name(routing_key, shard)]
+                LOG.info('Consuming historian shard %d of %d from queue %s',
+                        shard, self.shards, update_handler.queue_name)
+
+            missing = sharding.missing_bindings(self.bindings, self.exchange,
+                    expected_bindings)
+            if missing:
+                raise RuntimeError('Historian shard %d would never receive '
+                        'updates, the bindings setting lacks these bindings '
+                        'on exchange %s: %s' % (shard, self.exchange,
+                            ', '.join('%s -> %s' % binding
+                                for binding in missing)))
+
         return ServiceCommand._setup(self, *args, **kwargs)
+
+    @property
+    def shard(self):
+        string = os.environ.get('FLOW_WORKFLOW_HISTORIAN_SHARD')
+        if string is None:
+            raise RuntimeError('FLOW_WORKFLOW_HISTORIAN_SHARD must be set '
+                    'when workflow.historian.shards is %d' % self.shards)
+
+        shard = int(string)
+        if not 0 <= shard < self.shards:
+            raise ValueError('FLOW_WORKFLOW_HISTORIAN_SHARD must be in '
+                    '[0, %d), not %d' % (self.shards, shard))
+        return shard
@@ -0,0 +1,61 @@
+from twisted.internet import defer, reactor, threads
+from twisted.python.failure import Failure
+from twisted.python.threadpool import ThreadPool
+
+import logging
+
+
+LOG = logging.getLogger(__name__)
+
+
+class SynchronousExecutor(object):
+    """
+    Runs storage calls immediately, in the reactor thread.
+    """
+    def submit(self, key, function, *args, **kwargs):
+        return defer.maybeDeferred(function, *args, **kwargs)
+
+
+class ThreadPoolExecutor(object):
+    """
+    Runs storage calls in a pool of <size> threads.  Calls submitted with the
+    same key run one at a time, in the order they were submitted; calls with
+    different keys may run concurrently.
+    """
+    def __init__(self, size):
+        self.threadpool = ThreadPool(minthreads=size, maxthreads=size,
+                name='historian-storage')
+        self.threadpool.start()
+        reactor.addSystemEventTrigger('during', 'shutdown',
+                self.threadpool.stop)
+
+        # key -> Deferred that fires once the last call submitted with that
+        # key has finished
+        self._tails = {}
+
+    def submit(self, key, function, *args, **kwargs):
+        result = defer.Deferred()
+        tail = defer.Deferred()
+
+        def start(_):
+            deferred = threads.deferToThreadPool(reactor, self.threadpool,
+                    function, *args, **kwargs)
+            deferred.addBoth(finish)
+
+        def finish(outcome):
+            if self._tails.get(key) is tail:
+                del self._tails[key]
+            tail.callback(None)
+            if isinstance(outcome, Failure):
+                result.errback(outcome)
+            else:
+                result.callback(outcome)
+
+        previous = self._tails.get(key)
+        self._tails[key] = tail
+        if previous is None:
+            start(None)
+        else:
+            previous.addCallback(start)
+
+        return result
@@ -1,14 +1,18 @@
+from collections import OrderedDict
 from flow import exit_codes
 from flow.configuration.settings.injector import setting
 from flow.handler import Handler
 from flow.util.exit import exit_process
 from flow_workflow.historian import messages
+from flow_workflow.historian.executor import SynchronousExecutor
+from flow_workflow.historian.executor import ThreadPoolExecutor
 from flow_workflow.historian.operation_data import OperationData
 from flow_workflow.historian.oracle_exceptions import EXIT_ON
 from flow_workflow.historian.status import Status
 from flow_workflow.historian.storage import WorkflowHistorianStorage
-from injector import inject
-from twisted.internet import defer
+from injector import inject, singleton
+from twisted.internet import defer, reactor
+from twisted.python.failure import Failure
 
 import logging
 
@@ -16,41 +20,166 @@ import logging
 LOG = logging.getLogger(__name__)
 
 
-@inject(storage=WorkflowHistorianStorage)
-class HistorianHandlerBase(Handler):
-    def _handle_message(self, message):
+def validate_pool_size(pool_size, threads):
+    """
+    Raise ValueError unless each of <threads> writer threads can hold its
+    own connection from a pool of <pool_size> connections.
+    """
+    if threads > 0 and (pool_size <= 1 or pool_size < threads):
+        raise ValueError('workflow.historian.pool_size (%s) must be at '
+                'least workflow.historian.threads (%s) and greater than 1 '
+                'when threads are used; a pool_size of 1 shares a single '
+                'connection and requires threads to be 0' %
+                (pool_size, threads))
+
+
+@singleton
+@inject(storage=WorkflowHistorianStorage,
+        batch_size=setting('workflow.historian.batch_size'),
+        batch_window=setting('workflow.historian.batch_window'),
+        threads=setting('workflow.historian.threads'))
+class HistorianWriter(object):
+    """
+    Writes updates to the historian for the update handlers.  When
+    batch_size is greater than one, updates are held for at most
+    batch_window seconds, or until batch_size of them are pending, and then
+    committed in one transaction per workflow net.  The Deferred returned by
+    write only fires once the transaction containing the update has been
+    committed.
+
+    When threads is greater than zero, writes happen in a pool of that many
+    threads.  Writes for different nets run concurrently, while writes for
+    the same net are applied in the order they were received.  Every thread
+    needs its own database connection, so pool_size must be at least
+    threads, and the single shared connection used when pool_size is one
+    only works with threads set to zero.
+    """
+    def __init__(self):
+        self._pending = []
+        self._flush_call = None
+
+        validate_pool_size(self.storage.pool_size, self.threads)
+        if self.threads > 0:
+            self.executor = ThreadPoolExecutor(self.threads)
+        else:
+            self.executor = SynchronousExecutor()
+
+    def write(self, update):
+        deferred = defer.Deferred()
+        self._pending.append((update, deferred))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self._flush_call is None:
+            self._flush_call = reactor.callLater(self.batch_window,
+                    self.flush)
+
+        return deferred
+
+    def flush(self):
+        if self._flush_call is not None and self._flush_call.active():
+            self._flush_call.cancel()
+        self._flush_call = None
+
+        pending, self._pending = self._pending, []
+
+        batches = OrderedDict()
+        for update, deferred in pending:
+            batches.setdefault(update['operation_data'].net_key, []).append(
+                    (update, deferred))
+
+        for net_key, batch in batches.iteritems():
+            LOG.debug("Committing %d historian updates for net %s",
+                    len(batch), net_key)
+            write_deferred = self.executor.submit(net_key, self._write,
+                    [update for update, deferred in batch])
+            write_deferred.addCallbacks(self._written, self._write_failed,
+                    callbackArgs=(batch,), errbackArgs=(batch,))
+
+    def _write(self, updates):
+        """
+        Write <updates>, returning None for each one that was committed and
+        a Failure for each one that was not.  Runs in the executor.
+        """
+        if len(updates) == 1:
+            self.storage.update(updates[0])
+            return [None]
+
+        try:
+            self.storage.update_many(updates)
+            return [None] * len(updates)
+
+        except EXIT_ON:
+            raise
+
+        except Exception:
+            LOG.exception("Failed to commit batch of %d historian updates, "
+                    "retrying them one at a time.", len(updates))
+            return map(self._write_one, updates)
+
+    def _write_one(self, update):
         try:
-            self._handle_historian_message(message)
-            return defer.succeed(None)
+            self.storage.update(update)
 
         except EXIT_ON:
-            LOG.exception("This historian cannot handle messages anymore, "
-                    "because it lost access to Oracle... exiting.")
+            raise
+
+        except Exception:
+            return Failure()
+
+    def _written(self, outcomes, batch):
+        for (update, deferred), outcome in zip(batch, outcomes):
+            if outcome is None:
+                deferred.callback(None)
+            else:
+                deferred.errback(outcome)
+
+    def _write_failed(self, failure, batch):
+        if failure.check(*EXIT_ON):
+            LOG.critical("This historian cannot handle messages anymore, "
+                    "because it lost access to Oracle... exiting.\n%s",
+                    failure.getTraceback())
             exit_process(exit_codes.EXECUTE_FAILURE)
 
+        for update, deferred in batch:
+            deferred.errback(failure)
 
-@inject(queue_name=setting('workflow.historian.update_queue'))
-class HistorianUpdateHandler(HistorianHandlerBase):
-    message_class = messages.UpdateMessage
 
-    def _handle_historian_message(self, message):
-        message_dict = self._get_message_dict(message)
-        LOG.debug("Updating [net_key='%s', operation_id='%s']: %r",
-                message.operation_data['net_key'],
-                message.operation_data['operation_id'], message_dict)
-        self.storage.update(message_dict)
+def get_update_dict(message_dict):
+    update = dict(message_dict)
 
-    def _get_message_dict(self, message):
-        message_dict = message.to_dict()
+    update['status'] = Status(update['status'])
 
-        message_dict['status'] = Status(message_dict['status'])
+    OPERATION_DATA_FIELDS = ['operation_data', 'parent_operation_data',
+            'peer_operation_data']
+    for field in OPERATION_DATA_FIELDS:
+        if field in update:
+            update[field] = OperationData.from_dict(update[field])
 
-        OPERATION_DATA_FIELDS = ['operation_data', 'parent_operation_data',
-                'peer_operation_data']
-        for field in OPERATION_DATA_FIELDS:
-            if field in message_dict:
-                message_dict[field] = OperationData.from_dict(
-                        message_dict[field])
+    return update
 
-        return message_dict
 
+@inject(queue_name=setting('workflow.historian.update_queue'),
+        writer=HistorianWriter)
+class HistorianUpdateHandler(Handler):
+    message_class = messages.UpdateMessage
+
+    def _handle_message(self, message):
+        update = get_update_dict(message.to_dict())
+        LOG.debug("Updating [net_key='%s', operation_id='%s']: %r",
+                update['operation_data'].net_key,
+                update['operation_data'].operation_id, update)
+        return self.writer.write(update)
+
+
+@inject(queue_name=setting('workflow.historian.bulk_update_queue'),
+        writer=HistorianWriter)
+class HistorianBulkUpdateHandler(Handler):
+    message_class = messages.BulkUpdateMessage
+
+    def _handle_message(self, message):
+        updates = message.expand()
+        LOG.debug("Updating %d operations to status '%s'",
+                len(updates), message.status)
+        return defer.gatherResults([self.writer.write(get_update_dict(u))
+            for u in updates], consumeErrors=True)
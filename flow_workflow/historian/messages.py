@@ -34,3 +34,42 @@ class UpdateMessage(Message):
         Message.validate(self)
         Status(self.status) # throws ValueError if invalid
 
+
+class BulkUpdateMessage(Message):
+    """
+    Updates of several operations that share a status, plan and user.  Each
+    entry of updates holds the remaining fields of one UpdateMessage.
+    """
+    required_fields = {
+            'status': basestring,
+            'updates': list,
+            'user_name': basestring,
+            'workflow_plan_id': int,
+    }
+
+    def validate(self):
+        Message.validate(self)
+        Status(self.status) # throws ValueError if invalid
+
+        for update in self.updates:
+            for field in ['name', 'operation_data']:
+                if field not in update:
+                    raise ValueError("Every update in a BulkUpdateMessage "
+                            "requires '%s': %r" % (field, update))
+
+    def expand(self):
+        """
+        Return the UpdateMessage fields of each update.
+        """
+        common = {
+            'status': self.status,
+            'user_name': self.user_name,
+            'workflow_plan_id': self.workflow_plan_id,
+        }
+
+        result = []
+        for update in self.updates:
+            fields = dict(update)
+            fields.update(common)
+            result.append(fields)
+        return result
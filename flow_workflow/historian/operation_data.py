@@ -34,3 +34,9 @@ class OperationData(object):
 
     def __eq__(self, other):
         return self.to_dict == other.to_dict
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((str(self.net_key), self.operation_id, self.color))
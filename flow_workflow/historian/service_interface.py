@@ -1,5 +1,6 @@
 from flow.configuration.settings.injector import setting
 from flow_workflow.historian import messages
+from flow_workflow.historian import sharding
 from injector import inject
 from twisted.internet import defer
 
@@ -13,7 +14,10 @@ LOG = logging.getLogger(__name__)
 
 @inject(broker=flow.interfaces.IBroker,
         exchange=setting('workflow.historian.exchange'),
-        update_routing_key=setting('workflow.historian.update_routing_key'))
+        update_routing_key=setting('workflow.historian.update_routing_key'),
+        bulk_update_routing_key=setting(
+            'workflow.historian.bulk_update_routing_key'),
+        shards=setting('workflow.historian.shards'))
 class WorkflowHistorianServiceInterface(
         flow_workflow.interfaces.IWorkflowHistorian):
     def update(self, operation_data, name, workflow_plan_id, **kwargs):
@@ -31,5 +35,38 @@ class WorkflowHistorianServiceInterface(
                     operation_data, name, workflow_plan_id, kwargs)
             message = messages.UpdateMessage(operation_data=operation_data,
                     name=name, workflow_plan_id=workflow_plan_id, **kwargs)
-            return self.broker.publish(self.exchange, self.update_routing_key,
-                    message)
+            return self.broker.publish(self.exchange,
+                    self.routing_key(operation_data['net_key']), message)
+
+    def update_many(self, status, workflow_plan_id, user_name, updates):
+        """
+        Send one message updating several operations to <status>.  Each
+        entry of <updates> holds the operation_data, name and any optional
+        fields of one operation.
+        """
+        if workflow_plan_id is None or workflow_plan_id < 0:
+            LOG.debug("Received negative workflow_plan_id:%s, "
+                    "ignoring %d updates", workflow_plan_id, len(updates))
+            return defer.succeed(None)
+
+        if not updates:
+            return defer.succeed(None)
+
+        LOG.debug("Sending %d updates (status=%s, workflow_plan_id=%s)",
+                len(updates), status, workflow_plan_id)
+        message = messages.BulkUpdateMessage(status=status,
+                workflow_plan_id=workflow_plan_id, user_name=user_name,
+                updates=updates)
+        return self.broker.publish(self.exchange,
+                self.routing_key(updates[0]['operation_data']['net_key'],
+                    self.bulk_update_routing_key), message)
+
+    def routing_key(self, net_key, base_routing_key=None):
+        if base_routing_key is None:
+            base_routing_key = self.update_routing_key
+
+        if self.shards > 1:
+            return sharding.sharded_name(base_routing_key,
+                    sharding.shard_for(net_key, self.shards))
+        else:
+            return base_routing_key
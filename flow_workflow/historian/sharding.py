@@ -0,0 +1,41 @@
+import zlib
+
+
+def shard_for(net_key, shards):
+    """
+    Return the shard, in [0, shards), that handles updates for <net_key>.
+    The hash is stable across processes and hosts, so every update of a net
+    is routed to the same historian worker.
+    """
+    return (zlib.crc32(str(net_key)) & 0xffffffff) % shards
+
+
+def sharded_name(name, shard):
+    """
+    Return the routing key or queue name of <shard> derived from <name>.
+    """
+    return '%s.%d' % (name, shard)
+
+
+def sharded_bindings(queue_name, routing_key, shards):
+    """
+    Return the bindings, {queue_name: [routing_key]}, that deliver each
+    shard of <routing_key> to the same shard of <queue_name>.
+    """
+    if shards > 1:
+        return {sharded_name(queue_name, shard): [sharded_name(routing_key,
+            shard)] for shard in xrange(shards)}
+    else:
+        return {queue_name: [routing_key]}
+
+
+def missing_bindings(bindings, exchange, expected_bindings):
+    """
+    Return the (queue_name, routing_key) pairs of <expected_bindings> that
+    the 'bindings' setting, <bindings>, does not declare on <exchange>.
+    """
+    declared = bindings.get(exchange) or {}
+    return sorted((queue_name, routing_key)
+            for queue_name, routing_keys in expected_bindings.iteritems()
+            for routing_key in routing_keys
+            if routing_key not in (declared.get(queue_name) or []))
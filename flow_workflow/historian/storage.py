@@ -1,15 +1,17 @@
-from collections import defaultdict, namedtuple
+from collections import OrderedDict, defaultdict, deque, namedtuple
 from flow.configuration.settings.injector import setting
 from flow_workflow.historian.status import Status
+from flow_workflow.lru_cache import LRUCache
 from injector import inject
 from sqlalchemy import create_engine
 from sqlalchemy import event
 from sqlalchemy.dialects.oracle import dialect as oracle_dialect
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 
 import logging
 import re
+import threading
 
 
 class CannotInsertError(RuntimeError):
@@ -53,10 +55,47 @@ FOR UPDATE
 """
 
 
+# Insert a workflow_historian row unless it already exists, in a single
+# statement.  The row count tells whether a row was inserted.
+UPSERT_STATEMENTS_DICT = {}
+UPSERT_STATEMENTS_DICT['oracle'] = """
+MERGE INTO %s.workflow_historian existing
+USING (SELECT :net_key AS net_key, :operation_id AS operation_id,
+    :color AS color FROM DUAL) candidate
+ON (existing.net_key = candidate.net_key AND
+    existing.operation_id = candidate.operation_id AND
+    existing.color = candidate.color)
+WHEN NOT MATCHED THEN INSERT (net_key, operation_id, color)
+VALUES (candidate.net_key, candidate.operation_id, candidate.color)
+"""
+
+UPSERT_STATEMENTS_DICT['postgresql'] = """
+INSERT INTO %s.workflow_historian (net_key, operation_id, color)
+VALUES (:net_key, :operation_id, :color)
+ON CONFLICT (net_key, operation_id, color) DO NOTHING
+"""
+
+UPSERT_STATEMENTS_DICT['sqlite'] = UPSERT_STATEMENTS_DICT['postgresql']
+
+
+INSTANCE_ID_CACHE_SIZE = 100000
+SEQUENCE_BLOCK_SIZE = 50
+
+
 TABLES = namedtuple('Tables', ['historian', 'instance', 'execution'])
 SEQUENCES = namedtuple('Sequences', ['instance', 'execution'])
 STATEMENTS = namedtuple('Statements', STATEMENTS_DICT.keys())
 
+def _merge_ids(cached_ids, new_ids):
+    """
+    Combine (instance_id, execution_id) pairs, keeping a known execution_id
+    of the same instance when <new_ids> does not know it yet.
+    """
+    if (cached_ids is not None and new_ids[1] is None
+            and cached_ids[0] == new_ids[0]):
+        return cached_ids
+    return new_ids
+
 def on_oracle_connect(connection, record):
     cursor = connection.cursor()
     cursor.execute("alter session set NLS_DATE_FORMAT = "
@@ -66,7 +105,8 @@ def on_oracle_connect(connection, record):
     cursor.close()
 
 @inject(connection_string=setting('workflow.historian.connection_string'),
-        owner=setting('workflow.historian.owner'))
+        owner=setting('workflow.historian.owner'),
+        pool_size=setting('workflow.historian.pool_size'))
 class WorkflowHistorianStorage(object):
     def __init__(self):
         self.statements = STATEMENTS(**{k:v % self.owner
@@ -78,13 +118,39 @@ class WorkflowHistorianStorage(object):
                 instance='%s.workflow_instance_seq' % self.owner,
                 execution='%s.workflow_execution_seq' % self.owner)
 
-        self.engine = create_engine(self.connection_string,
-                case_sensitive=False, poolclass=StaticPool)
+        if self.pool_size > 1:
+            self.engine = create_engine(self.connection_string,
+                    case_sensitive=False, poolclass=QueuePool,
+                    pool_size=self.pool_size, max_overflow=0)
+        else:
+            # One connection shared by every update, e.g. for in-memory
+            # sqlite databases.
+            self.engine = create_engine(self.connection_string,
+                    case_sensitive=False, poolclass=StaticPool)
 
         # Oracle needs us to tell it to accept strings for dates/timestamps
         if isinstance(self.engine.dialect, oracle_dialect):
             event.listen(self.engine.pool, 'connect', on_oracle_connect)
 
+        upsert_statement = UPSERT_STATEMENTS_DICT.get(
+                self.engine.dialect.name)
+        if upsert_statement is not None:
+            self.upsert_statement = upsert_statement % self.owner
+        else:
+            self.upsert_statement = None
+
+        # OperationData -> (workflow_instance_id, current_execution_id) for
+        # committed rows.  These never change once created, so entries can
+        # only go stale if rows are deleted behind our back.
+        self._instance_ids = LRUCache(INSTANCE_ID_CACHE_SIZE)
+        self._instance_ids_lock = threading.Lock()
+
+        # Sequence values handed out one at a time from blocks fetched with
+        # a single query.  Oracle never reuses sequence values, so ids left
+        # unused by a rolled back transaction can still be handed out later.
+        self._prefetched_ids = defaultdict(deque)
+        self._prefetched_ids_lock = threading.Lock()
+
     def update(self, update_info):
         LOG.debug("Updating '%s'", update_info['name'])
 
@@ -95,16 +161,94 @@ class WorkflowHistorianStorage(object):
         except:
             transaction.rollback()
             raise
-        transaction.commit()
+        self._commit(transaction)
 
         return instance_id
 
+    def update_many(self, update_infos):
+        """
+        Apply several updates in a single transaction.  Updates to the same
+        operation instance are first merged, so that only their net effect
+        is written.
+        """
+        LOG.debug("Updating %d operations", len(update_infos))
+
+        transaction = SimpleTransaction(self.engine)
+        try:
+            instance_ids = []
+            for update_info in self._coalesce(update_infos):
+                instance_ids.append(self._recursive_insert_or_update(
+                    transaction, update_info))
+        except:
+            transaction.rollback()
+            raise
+        self._commit(transaction)
+
+        return instance_ids
+
+    def _commit(self, transaction):
+        transaction.commit()
+
+        # Only remember ids once they are committed, a rolled back
+        # transaction may have handed out ids that were never stored.
+        with self._instance_ids_lock:
+            for operation_data, ids in transaction.instance_ids.iteritems():
+                self._instance_ids[operation_data] = _merge_ids(
+                        self._instance_ids.get(operation_data), ids)
+
+    def _cached_ids(self, transaction, operation_data):
+        ids = transaction.instance_ids.get(operation_data)
+        if ids is None:
+            with self._instance_ids_lock:
+                ids = self._instance_ids.get(operation_data)
+        return ids
+
+    @staticmethod
+    def _cache_ids(transaction, operation_data, instance_id,
+            execution_id=None):
+        transaction.instance_ids[operation_data] = (instance_id, execution_id)
+
+    @classmethod
+    def _coalesce(cls, update_infos):
+        pending = OrderedDict()
+        for update_info in update_infos:
+            operation_data = update_info['operation_data']
+            if operation_data in pending:
+                pending[operation_data] = cls._merge_updates(
+                        pending[operation_data], update_info)
+            else:
+                pending[operation_data] = update_info
+
+        return pending.values()
+
+    @classmethod
+    def _merge_updates(cls, earlier, later):
+        """
+        Merge two updates of one operation instance the way applying them in
+        order would: fields of <later> fill in fields missing from <earlier>,
+        and replace them only if <later> has a more advanced status.
+        """
+        row = defaultdict(lambda: None, earlier)
+        should_overwrite = later['status'].should_overwrite(earlier['status'])
+
+        merged = dict(earlier)
+        merged.update(cls._generate_update_dict(later, row=row,
+                should_overwrite=should_overwrite))
+        return merged
+
     def _recursive_insert_or_update(self, transaction, update_info,
             recursion_level=0):
         LOG.debug("Attempting to insert or update '%s'", update_info['name'])
         if recursion_level > 1:
             raise RuntimeError("update should never recurse more than once!")
 
+        if self._cached_ids(transaction,
+                update_info['operation_data']) is not None:
+            instance_id = self._update(transaction, update_info,
+                    recursion_level)
+            LOG.debug("Updated '%s'", update_info['name'])
+            return instance_id
+
         try:
             instance_id = self._insert(transaction, update_info,
                     recursion_level)
@@ -124,6 +268,9 @@ class WorkflowHistorianStorage(object):
 
         instance_row, execution_row = self._get_rows(transaction,
                 instance_id)
+        self._cache_ids(transaction, update_info['operation_data'],
+                instance_id, instance_row['CURRENT_EXECUTION_ID'])
+
         stored_status = Status(execution_row['STATUS'])
         new_status = update_info['status']
         should_overwrite = new_status.should_overwrite(stored_status)
@@ -162,13 +309,8 @@ class WorkflowHistorianStorage(object):
                 update_id=execution_id)
 
     def _insert(self, transaction, update_info, recursion_level):
-        try:
-            execute_and_log(transaction,
-                    self.statements.insert_into_workflow_historian,
-                    operation_data = update_info['operation_data'])
-        except IntegrityError:
-            raise CannotInsertError("Couldn't insert into WORKFLOW_HISTORIAN "
-                    "with %s" % update_info['operation_data'])
+        self._insert_historian_row(transaction,
+                update_info['operation_data'])
 
         # update workflow_historian table
         instance_id = self.next_instance_id(transaction)
@@ -207,14 +349,46 @@ class WorkflowHistorianStorage(object):
                 {'CURRENT_EXECUTION_ID': execution_id},
                 instance_id)
 
+        self._cache_ids(transaction, update_info['operation_data'],
+                instance_id, execution_id)
+
         return instance_id
 
+    def _insert_historian_row(self, transaction, operation_data):
+        try:
+            if self.upsert_statement is not None:
+                result = execute_and_log(transaction, self.upsert_statement,
+                        operation_data=operation_data)
+                inserted = result.rowcount != 0
+            else:
+                execute_and_log(transaction,
+                        self.statements.insert_into_workflow_historian,
+                        operation_data=operation_data)
+                inserted = True
+
+        except IntegrityError:
+            # A concurrent transaction inserted the row first.
+            inserted = False
+
+        if not inserted:
+            raise CannotInsertError("Couldn't insert into WORKFLOW_HISTORIAN "
+                    "with %s" % operation_data)
+
+    def _next_id(self, transaction, sequence_name):
+        with self._prefetched_ids_lock:
+            ids = self._prefetched_ids[sequence_name]
+            if not ids:
+                ids.extend(self._fetch_ids(transaction, sequence_name,
+                    SEQUENCE_BLOCK_SIZE))
+            return ids.popleft()
+
     @staticmethod
-    def _next_id(transaction, sequence_name):
-        NEXT_ID = "SELECT %s.nextval FROM DUAL"
-        stmnt = NEXT_ID % sequence_name
-        result = execute_and_log(transaction, stmnt)
-        return result.fetchone()[0]
+    def _fetch_ids(transaction, sequence_name, count):
+        NEXT_IDS = ("SELECT %s.nextval FROM DUAL "
+                "CONNECT BY LEVEL <= :count")
+        stmnt = NEXT_IDS % sequence_name
+        result = execute_and_log(transaction, stmnt, count=count)
+        return sorted(row[0] for row in result.fetchall())
 
     def next_instance_id(self, transaction):
         return self._next_id(transaction, self.sequences.instance)
@@ -306,6 +480,10 @@ class WorkflowHistorianStorage(object):
         return update_dict
 
     def _select_instance_id(self, transaction, operation_data):
+        ids = self._cached_ids(transaction, operation_data)
+        if ids is not None:
+            return ids[0]
+
         result = execute_and_log(transaction,
                 self.statements.select_instance_id,
                 operation_data=operation_data)
@@ -313,6 +491,7 @@ class WorkflowHistorianStorage(object):
         if rows:
             instance_id = rows[0][0]
             if instance_id is not None:
+                self._cache_ids(transaction, operation_data, instance_id)
                 return instance_id
         return None
 
@@ -348,10 +527,17 @@ class WorkflowHistorianStorage(object):
                 operation_data   = operation_data,
                 workflow_plan_id = workflow_plan_id)
 
+        ids = self._cached_ids(transaction, operation_data)
+        if ids is not None and ids[1] is not None:
+            return ids[1]
+
         result = execute_and_log(transaction,
                 self.statements.select_execution_id,
                 workflow_instance_id=instance_id)
         execution_id = result.fetchone()[0]
+        if execution_id is not None:
+            self._cache_ids(transaction, operation_data, instance_id,
+                    execution_id)
         return execution_id
 
 
@@ -360,6 +546,7 @@ class SimpleTransaction(object):
         self.engine = engine
         self.conn = None
         self.trans = None
+        self.instance_ids = {}
 
         try:
             self.conn, self.trans = self.begin_transaction()
@@ -376,6 +563,13 @@ class SimpleTransaction(object):
 
     def execute(self, *args, **kwargs):
         statement_kwargs = get_updated_statement_kwargs(**kwargs)
+        return self.execute_normalized(*args, **statement_kwargs)
+
+    def execute_normalized(self, *args, **statement_kwargs):
+        """
+        Execute with kwargs already passed through
+        get_updated_statement_kwargs.
+        """
         return self.conn.execute(*args, **statement_kwargs)
 
     def commit(self, *args, **kwargs):
@@ -417,23 +611,62 @@ def get_updated_statement_kwargs(**kwargs):
 def execute_and_log(transaction, statement, **kwargs):
     statement_kwargs = get_updated_statement_kwargs(**kwargs)
     log_statement(statement, **statement_kwargs)
-    return transaction.execute(statement, **kwargs)
+    return transaction.execute_normalized(statement, **statement_kwargs)
 
 
 def log_statement(statement, **kwargs):
-    debug_statement = statement
-    for name, value in kwargs.items():
-        debug_statement = re.sub(r':' + name, str(value), debug_statement)
-    debug_statement = re.sub('\n', ' ', debug_statement)
-    LOG.debug("EXECUTING: %s", debug_statement)
+    # The statement is only formatted if the record is actually emitted.
+    LOG.debug("EXECUTING: %s", LoggedStatement(statement, kwargs))
 
 
-def _perform_insert(transaction, idict, table_name):
-    INSERT = " INSERT INTO %s (%s) VALUES (%s)"
+class LoggedStatement(object):
+    def __init__(self, statement, kwargs):
+        self.statement = statement
+        self.kwargs = kwargs
+
+    def __str__(self):
+        debug_statement = self.statement
+        for name, value in self.kwargs.items():
+            debug_statement = re.sub(r':' + name, str(value), debug_statement)
+        return re.sub('\n', ' ', debug_statement)
+
+
+# (table_name, sorted column names) -> SQL text.  Building the text once per
+# column set, with the columns in a canonical order, lets the database and
+# the driver's statement cache reuse their parse of it.
+_INSERT_STATEMENTS = {}
+_UPDATE_STATEMENTS = {}
+
+
+def _insert_statement(table_name, columns):
+    key = (table_name, columns)
+    statement = _INSERT_STATEMENTS.get(key)
+    if statement is None:
+        INSERT = " INSERT INTO %s (%s) VALUES (%s)"
+
+        names = ", ".join(columns)
+        place_holders = ", ".join([":%s" % x for x in columns])
+        statement = INSERT % (table_name, names, place_holders)
+        _INSERT_STATEMENTS[key] = statement
 
-    names = ", ".join(idict.keys())
-    place_holders = ", ".join([":%s" % x for x in idict.keys()])
-    cmd = INSERT % (table_name, names, place_holders)
+    return statement
+
+
+def _update_statement(table_name, columns, id_field):
+    key = (table_name, columns, id_field)
+    statement = _UPDATE_STATEMENTS.get(key)
+    if statement is None:
+        UPDATE = "    UPDATE %s SET %s WHERE %s=:%s"
+
+        set_portion = ", ".join(["%s=:%s" % (x, x) for x in columns])
+        statement = UPDATE % (table_name, set_portion, id_field, id_field)
+        _UPDATE_STATEMENTS[key] = statement
+
+    return statement
+
+
+def _perform_insert(transaction, idict, table_name):
+    cmd = _insert_statement(table_name, tuple(sorted(idict.keys())))
 
     execute_and_log(transaction, cmd, **idict)
 
@@ -442,12 +675,9 @@ def _perform_update(transaction, udict, table_name, id_field, update_id):
     if not udict:
         # nothing to update
         return None
-    UPDATE = "    UPDATE %s SET %s WHERE %s=:%s"
 
-    set_portion = ", ".join(["%s=:%s" % (x, x) for x in udict.keys()])
-    cmd = UPDATE % (table_name, set_portion, id_field, id_field)
+    cmd = _update_statement(table_name, tuple(sorted(udict.keys())),
+            id_field)
     udict[id_field] = update_id
 
     execute_and_log(transaction, cmd, **udict)
-
-
@@ -7,6 +7,10 @@ class IWorkflowHistorian(object):
     def update(self, operation_data, name, workflow_plan_id, **kwargs):
         pass
 
+    @abstractmethod
+    def update_many(self, status, workflow_plan_id, user_name, updates):
+        pass
+
 
 class IWorkflowCompletion(object):
     __metaclass__ = ABCMeta
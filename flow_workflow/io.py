@@ -1,9 +1,17 @@
+import json
 import logging
 
 
 LOG = logging.getLogger(__name__)
 
 
+# Maximum number of variables read or written by a single HMGET/HMSET
+_CHUNK_SIZE = 1000
+
+# Maximum number of HMGETs sent in a single pipeline
+_PIPELINE_DEPTH = 100
+
+
 def extract_workflow_data(net, token_indices):
     outputs = {}
 
@@ -31,37 +39,123 @@ def load_input(net, input_connections, property_name, parallel_id):
 def load_inputs(net, input_connections, parallel_id):
     LOG.debug('load_inputs(netkey=%r, %r, %r)',
             net.key, input_connections, parallel_id)
-    inputs = {}
+    sources = {}
     for src_id, prop_hash in input_connections.iteritems():
         for dest_prop_name, src_prop_name in prop_hash.iteritems():
-            inputs[dest_prop_name] = load_output(net=net, operation_id=src_id,
-                    property_name=src_prop_name, parallel_id=parallel_id)
+            sources[dest_prop_name] = (net, src_id, src_prop_name)
 
-    return inputs
+    return load_sources(sources, parallel_id)
 
 
 def load_output(net, operation_id, property_name, parallel_id):
-    for pid in parallel_id.stack_iterator:
-        varname = _output_variable_name(operation_id=operation_id,
-                property_name=property_name, parallel_id=list(pid))
-        try:
-            value = net.variables[varname]
-            LOG.debug('load_output(netkey=%r, %r, %r, %r) = %r',
-                    net.key, operation_id, property_name, parallel_id, value)
-            return value
-        except KeyError:
-            pass
-
-    raise KeyError("Output %s not found on operation %r, parallel_id %r" %
-            (property_name, operation_id, parallel_id))
+    value = load_sources({property_name: (net, operation_id, property_name)},
+            parallel_id)[property_name]
+    LOG.debug('load_output(netkey=%r, %r, %r, %r) = %r',
+            net.key, operation_id, property_name, parallel_id, value)
+    return value
 
 
 def load_outputs(net, operation_id, property_names, parallel_id):
-    outputs = {}
-    for output_name in property_names:
-        outputs[output_name] = load_output(net=net, operation_id=operation_id,
-                property_name=output_name, parallel_id=parallel_id)
-    return outputs
+    return load_sources({name: (net, operation_id, name)
+        for name in property_names}, parallel_id)
+
+
+def load_sources(sources, parallel_id):
+    """
+    Load several outputs using a single round trip to redis.
+
+    <sources> maps each result name to the (net, operation_id, property_name)
+    where that output is stored, or to None for outputs that are always None.
+    Every candidate variable along parallel_id's stack is fetched at once and
+    the most specific one found is used, just as load_output falls back from
+    the full parallel_id towards the root.
+    """
+    parallel_stack = [list(pid) for pid in parallel_id.stack_iterator]
+
+    candidates = {}
+    requests = {}
+    for name, source in sources.iteritems():
+        if source is None:
+            continue
+
+        net, operation_id, property_name = source
+        candidates[name] = _candidate_variable_names(operation_id,
+                property_name, parallel_stack)
+        _add_request(requests, net, candidates[name])
+
+    fetched = _fetch_variables(requests)
+
+    results = {}
+    for name, source in sources.iteritems():
+        if source is None:
+            results[name] = None
+        else:
+            net, operation_id, property_name = source
+            results[name] = _most_specific_value(fetched, net,
+                    candidates[name], operation_id, property_name,
+                    parallel_id)
+
+    return results
+
+
+def load_output_many(net, operation_id, property_name, parallel_ids):
+    """
+    Load <property_name> for each of <parallel_ids>, returning a list of
+    values in the same order.  The variables stored under the full
+    parallel_ids are fetched together, and ancestor lookups are only made for
+    the ones that were missing.
+    """
+    LOG.debug('load_output_many(netkey=%r, %r, %r, %d parallel_ids)',
+            net.key, operation_id, property_name, len(parallel_ids))
+    varnames = [_output_variable_name(operation_id=operation_id,
+            property_name=property_name, parallel_id=parallel_id)
+        for parallel_id in parallel_ids]
+    fetched = _fetch_variables({net.key: (net, varnames)})
+
+    results = []
+    ancestor_candidates = {}
+    requests = {}
+    for idx, (varname, parallel_id) in enumerate(zip(varnames,
+            parallel_ids)):
+        if (net.key, varname) in fetched:
+            results.append(fetched[net.key, varname])
+        else:
+            results.append(None)
+            parallel_stack = [list(pid)
+                    for pid in parallel_id.stack_iterator][1:]
+            ancestor_candidates[idx] = _candidate_variable_names(
+                    operation_id, property_name, parallel_stack)
+            _add_request(requests, net, ancestor_candidates[idx])
+
+    if ancestor_candidates:
+        fetched = _fetch_variables(requests)
+        for idx, candidates in ancestor_candidates.iteritems():
+            results[idx] = _most_specific_value(fetched, net, candidates,
+                    operation_id, property_name, parallel_ids[idx])
+
+    return results
+
+
+def _candidate_variable_names(operation_id, property_name, parallel_stack):
+    return [_output_variable_name(operation_id=operation_id,
+            property_name=property_name, parallel_id=pid)
+        for pid in parallel_stack]
+
+
+def _add_request(requests, net, varnames):
+    request_net, request_varnames = requests.setdefault(net.key,
+            (net, set()))
+    request_varnames.update(varnames)
+
+
+def _most_specific_value(fetched, net, candidates, operation_id,
+        property_name, parallel_id):
+    for varname in candidates:
+        if (net.key, varname) in fetched:
+            return fetched[net.key, varname]
+
+    raise KeyError("Output %s not found on operation %r, parallel_id %r" %
+            (property_name, operation_id, parallel_id))
 
 
 def store_output(net, operation_id, property_name, value, parallel_id=None):
@@ -82,12 +176,164 @@ def store_outputs(net, operation_id, outputs, parallel_id):
                 parallel_id=parallel_id)
 
 
+def output_variables(operation_id, outputs, parallel_id=None):
+    """
+    Return the net variables that store_outputs would set for <outputs>.
+    """
+    return {_output_variable_name(operation_id=operation_id,
+            property_name=name, parallel_id=parallel_id): value
+        for name, value in outputs.iteritems()}
+
+
+def store_variables(net, variables):
+    """
+    Set several net variables using a single pipelined transaction.
+    """
+    LOG.debug('store_variables(netkey=%r, %d variables)',
+            net.key, len(variables))
+    _store_encoded_variables(net, {name: json.dumps(value)
+        for name, value in variables.iteritems()})
+
+
+def store_output_many(net, operation_id, property_name, values,
+        parallel_ids):
+    """
+    Store one value of <property_name> per parallel_id, writing all of the
+    variables in a single pipelined transaction.
+    """
+    LOG.debug('store_output_many(netkey=%r, %r, %r, %d values)',
+            net.key, operation_id, property_name, len(values))
+    encoded_values = {}
+    for value, parallel_id in zip(values, parallel_ids):
+        varname = _output_variable_name(operation_id=operation_id,
+                property_name=property_name, parallel_id=parallel_id)
+        encoded_values[varname] = json.dumps(value)
+
+    _store_encoded_variables(net, encoded_values)
+
+
+def store_accumulated_outputs(net, operation_id, outputs, parallel_id):
+    """
+    Store the outputs of the parallel-by member at <parallel_id> so that an
+    incremental join can collect them without resolving each member's
+    outputs again.  They are kept with the net's variables, so they expire
+    with the net even if the join never runs.
+    """
+    LOG.debug('store_accumulated_outputs(netkey=%r, %r, %r, %r)',
+            net.key, operation_id, outputs, parallel_id)
+    _store_encoded_variables(net, {
+        _accumulator_variable_name(operation_id=operation_id,
+            property_name=name, parallel_id=parallel_id): json.dumps(value)
+        for name, value in outputs.iteritems()})
+
+
+def load_accumulated_outputs(net, operation_id, property_names, parallel_id,
+        parallel_size):
+    """
+    Collect the accumulated outputs of the <parallel_size> members of the
+    parallel-by of <operation_id> at <parallel_id> with pipelined HMGETs,
+    returning a dict of lists ordered by parallel_idx.
+    """
+    varnames = _accumulator_variable_names(operation_id, property_names,
+            parallel_id, parallel_size)
+    fetched = _fetch_variables({net.key: (net, [varname
+        for property_varnames in varnames.itervalues()
+        for varname in property_varnames])})
+
+    results = {}
+    for name, property_varnames in varnames.iteritems():
+        results[name] = []
+        for parallel_idx, varname in enumerate(property_varnames):
+            if (net.key, varname) not in fetched:
+                raise KeyError("Accumulated output %s not found on "
+                        "operation %r, parallel_id %r, parallel_idx %d" %
+                        (name, operation_id, parallel_id, parallel_idx))
+            results[name].append(fetched[net.key, varname])
+
+    return results
+
+
+def delete_accumulated_outputs(net, operation_id, property_names,
+        parallel_id, parallel_size):
+    varnames = [varname for property_varnames in _accumulator_variable_names(
+            operation_id, property_names, parallel_id,
+            parallel_size).itervalues()
+        for varname in property_varnames]
+    if not varnames:
+        return
+
+    pipe = net.connection.pipeline()
+    for begin in xrange(0, len(varnames), _CHUNK_SIZE):
+        pipe.hdel(net.variables.key, *varnames[begin:begin + _CHUNK_SIZE])
+    pipe.execute()
+
+
+def _accumulator_variable_names(operation_id, property_names, parallel_id,
+        parallel_size):
+    parallel_ids = [parallel_id.child_identifier(operation_id, parallel_idx)
+            for parallel_idx in xrange(parallel_size)]
+    return {name: [_accumulator_variable_name(operation_id=operation_id,
+            property_name=name, parallel_id=member_parallel_id)
+        for member_parallel_id in parallel_ids] for name in property_names}
+
+
+def store_shortcut_results(net, operation_id, results):
+    """
+    Record whether each parallel-by member of <operation_id> was shortcut by
+    a batched shortcut attempt.  <results> maps parallel_ids to booleans.
+    """
+    LOG.debug('store_shortcut_results(netkey=%r, %r, %d results)',
+            net.key, operation_id, len(results))
+    _store_encoded_variables(net, {
+        _shortcut_variable_name(operation_id=operation_id,
+            parallel_id=parallel_id): json.dumps(bool(shortcut))
+        for parallel_id, shortcut in results.iteritems()})
+
+
+def load_shortcut_result(net, operation_id, parallel_id):
+    """
+    Return whether a batched shortcut attempt shortcut <operation_id> at
+    <parallel_id>, or None if no batched attempt recorded a result.
+    """
+    varname = _shortcut_variable_name(operation_id=operation_id,
+            parallel_id=parallel_id)
+    return _fetch_variables({net.key: (net, [varname])}).get(
+            (net.key, varname))
+
+
+def _store_encoded_variables(net, encoded_values):
+    if not encoded_values:
+        return
+
+    varnames = encoded_values.keys()
+    pipe = net.connection.pipeline()
+    for begin in xrange(0, len(varnames), _CHUNK_SIZE):
+        pipe.hmset(net.variables.key, {varname: encoded_values[varname]
+            for varname in varnames[begin:begin + _CHUNK_SIZE]})
+    pipe.execute()
+
+
 def _output_variable_name(operation_id, property_name, parallel_id=None):
     """
     Operation outputs are stored on the net.  This constructs the name of
     the variable where they are stored.
     """
-    base = "_wf_outp_%s_%s" % (int(operation_id), property_name)
+    return _variable_name('_wf_outp', operation_id=operation_id,
+            property_name=property_name, parallel_id=parallel_id)
+
+
+def _accumulator_variable_name(operation_id, property_name, parallel_id):
+    return _variable_name('_wf_acc', operation_id=operation_id,
+            property_name=property_name, parallel_id=parallel_id)
+
+
+def _shortcut_variable_name(operation_id, parallel_id):
+    return _variable_name('_wf_shct', operation_id=operation_id,
+            property_name='shortcut', parallel_id=parallel_id)
+
+
+def _variable_name(prefix, operation_id, property_name, parallel_id):
+    base = "%s_%s_%s" % (prefix, int(operation_id), property_name)
 
     if parallel_id:
         parallel_part = '|' + '|'.join('%s:%s' % (op_id, par_idx)
@@ -96,3 +342,32 @@ def _output_variable_name(operation_id, property_name, parallel_id=None):
         parallel_part = ''
 
     return base + parallel_part
+
+
+def _fetch_variables(requests):
+    """
+    Fetch net variables from redis using pipelined HMGETs.  <requests> maps
+    net keys to (net, varnames) pairs.  Returns a dict keyed by
+    (net_key, varname) containing only the variables that exist.
+    """
+    commands = []
+    for net_key, (net, varnames) in requests.iteritems():
+        varnames = list(varnames)
+        for begin in xrange(0, len(varnames), _CHUNK_SIZE):
+            commands.append((net, varnames[begin:begin + _CHUNK_SIZE]))
+
+    fetched = {}
+    for begin in xrange(0, len(commands), _PIPELINE_DEPTH):
+        pipeline_commands = commands[begin:begin + _PIPELINE_DEPTH]
+
+        pipe = pipeline_commands[0][0].connection.pipeline(transaction=False)
+        for net, varnames in pipeline_commands:
+            pipe.hmget(net.variables.key, varnames)
+
+        for (net, varnames), raw_values in zip(pipeline_commands,
+                pipe.execute()):
+            for varname, raw_value in zip(varnames, raw_values):
+                if raw_value is not None:
+                    fetched[net.key, varname] = json.loads(raw_value)
+
+    return fetched
@@ -12,6 +12,9 @@ class LogManager(object):
         self.operation_id = operation_id
         self.operation_name = operation_name
 
+        self._base_name = None
+        self._log_paths = {}
+
     def stderr_log_path(self, parallel_id):
         return self._resolve_log_path(suffix='err', parallel_id=parallel_id)
 
@@ -20,14 +23,22 @@ class LogManager(object):
 
     @property
     def base_name(self):
-        bname = re.sub("[^A-Za-z0-9_.-]+", "_",
-                self.operation_name)[:MAX_BASE_NAME_LEN]
-        return re.sub("^_*|_*$", "", bname)
+        if self._base_name is None:
+            bname = re.sub("[^A-Za-z0-9_.-]+", "_",
+                    self.operation_name)[:MAX_BASE_NAME_LEN]
+            self._base_name = re.sub("^_*|_*$", "", bname)
+        return self._base_name
 
     def _resolve_log_path(self, suffix, parallel_id):
         if not self.log_dir:
             return None
 
+        cache_key = (suffix, parallel_id)
+        if cache_key not in self._log_paths:
+            self._log_paths[cache_key] = self._log_path(suffix, parallel_id)
+        return self._log_paths[cache_key]
+
+    def _log_path(self, suffix, parallel_id):
         template_args = {
                 'base_name': self.base_name,
                 'operation_id': self.operation_id,
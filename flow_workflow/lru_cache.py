@@ -0,0 +1,43 @@
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A dict-like cache holding at most <max_size> entries.  When it is full,
+    the least recently used entry is discarded to make room.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            return default
+
+        self._entries[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = value
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def pop(self, key, default=None):
+        return self._entries.pop(key, default)
+
+    def discard_matching(self, predicate):
+        for key in [k for k in self._entries if predicate(k)]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
@@ -26,6 +26,7 @@ class Operation(object):
         self.parent_operation_id = parent_operation_id
 
         self._cached_operations = {}
+        self._log_manager = None
 
     def _child_net_key_and_id_from(self, name):
         return self.children[name]
@@ -55,8 +56,11 @@ class Operation(object):
 
     @property
     def log_manager(self):
-        return flow_workflow.log_manager.LogManager(operation_name=self.name,
-                operation_id=self.operation_id, log_dir=self.log_dir)
+        if self._log_manager is None:
+            self._log_manager = flow_workflow.log_manager.LogManager(
+                    operation_name=self.name,
+                    operation_id=self.operation_id, log_dir=self.log_dir)
+        return self._log_manager
 
     @property
     def input_names(self):
@@ -87,21 +91,29 @@ class Operation(object):
         return self.net.connection
 
     def load_inputs(self, parallel_id):
-        results = {}
+        sources = {}
         for name in self.input_names:
             try:
-                results[name] = self.load_input(name=name,
-                        parallel_id=parallel_id)
+                sources[name] = self.input_source(name)
             except MissingInputError:
                 # this is to allow optional model inputs
                 # such as is done in InstrumentData::Composite::Workflow
                 pass
-        return results
+        return io.load_sources(sources, parallel_id)
 
     def load_outputs(self, parallel_id):
         return {name: self.load_output(name, parallel_id)
                 for name in self.output_properties}
 
+    def load_output_many(self, name, parallel_ids):
+        source = self.output_source(name)
+        if source is None:
+            return [None for parallel_id in parallel_ids]
+
+        net, operation_id, property_name = source
+        return io.load_output_many(net=net, operation_id=operation_id,
+                property_name=property_name, parallel_ids=parallel_ids)
+
     def store_outputs(self, outputs, parallel_id):
         for name, value in outputs.iteritems():
             self.store_output(name, value, parallel_id)
@@ -116,6 +128,24 @@ class Operation(object):
         source_op = self._load_operation(self.net_key, source_op_id)
         source_op.store_output(source_name, value, parallel_id)
 
+    def store_input_many(self, name, values, parallel_ids):
+        source_op_id, source_name = self._determine_input_source(name)
+        source_op = self._load_operation(self.net_key, source_op_id)
+        source_op.store_output_many(source_name, values, parallel_ids)
+
+    def input_source(self, name):
+        source_op_id, source_name = self._determine_input_source(name)
+        source_op = self._load_operation(self.net_key, source_op_id)
+        return source_op.output_source(source_name)
+
+    @abc.abstractmethod
+    def output_source(self, name):
+        """
+        Return the (net, operation_id, property_name) where the output <name>
+        is actually stored, or None if it always loads as None.
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def load_output(self, name, parallel_id):
         raise NotImplementedError()
@@ -124,6 +154,10 @@ class Operation(object):
     def store_output(self, name, value, parallel_id):
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def store_output_many(self, name, values, parallel_ids):
+        raise NotImplementedError()
+
 
 class NullOperation(Operation):
     def __init__(self, *args, **kwargs):
@@ -137,14 +171,23 @@ class NullOperation(Operation):
     def net_key(self):
         return None
 
+    def output_source(self, name):
+        return None
+
     def load_output(self, name, parallel_id):
         pass
 
     def store_output(self, name, value, parallel_id):
         pass
 
+    def store_output_many(self, name, values, parallel_ids):
+        pass
+
 
 class DirectStorageOperation(Operation):
+    def output_source(self, name):
+        return self.net, self.operation_id, name
+
     def load_output(self, name, parallel_id):
         return io.load_output(
                 net=self.net,
@@ -160,10 +203,24 @@ class DirectStorageOperation(Operation):
                 property_name=name,
                 value=value)
 
+    def store_output_many(self, name, values, parallel_ids):
+        io.store_output_many(
+                net=self.net,
+                operation_id=self.operation_id,
+                property_name=name,
+                values=values,
+                parallel_ids=parallel_ids)
+
 
 class PassThroughOperation(Operation):
+    def output_source(self, name):
+        return self.input_source(name)
+
     def load_output(self, name, parallel_id):
         return self.load_input(name, parallel_id)
 
     def store_output(self, name, value, parallel_id):
         return self.store_input(name, value, parallel_id)
+
+    def store_output_many(self, name, values, parallel_ids):
+        return self.store_input_many(name, values, parallel_ids)
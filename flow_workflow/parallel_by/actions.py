@@ -16,6 +16,12 @@ def _parallel_id_from_workflow_data(workflow_data):
 
 
 class ParallelBySplit(BasicActionBase):
+    """
+    Store each element of the parallel input and create a token for every
+    member.  With a <parallel_limit>, only the first parallel_limit members
+    are created at first, and ParallelByRelease creates the rest as earlier
+    ones succeed.
+    """
     requrired_arguments = ['parallel_property', 'operation_id']
 
     def execute(self, net, color_descriptor, active_tokens, service_interfaces):
@@ -44,33 +50,70 @@ class ParallelBySplit(BasicActionBase):
 
     def store_parallel_input(self, operation, parallel_property, parallel_input,
             parallel_id):
-        for parallel_idx, value in enumerate(parallel_input):
-            operation.store_input(name=parallel_property,
-                    value=value, parallel_id=parallel_id.child_identifier(
-                        operation.operation_id, parallel_idx))
+        parallel_ids = [parallel_id.child_identifier(operation.operation_id,
+            parallel_idx) for parallel_idx in xrange(len(parallel_input))]
+        operation.store_input_many(name=parallel_property,
+                values=parallel_input, parallel_ids=parallel_ids)
 
     def _create_tokens(self, num_tokens, color_descriptor, workflow_data, net):
         new_color_group = net.add_color_group(size=num_tokens,
                 parent_color=color_descriptor.color,
                 parent_color_group_idx=color_descriptor.group.idx)
 
-        this_workflow_data = copy.copy(workflow_data)
         parallel_id = _parallel_id_from_workflow_data(workflow_data)
+        operation_id = self.args['operation_id']
+
+        parallel_limit = self.args.get('parallel_limit')
+        if parallel_limit:
+            num_released = min(num_tokens, parallel_limit)
+        else:
+            num_released = num_tokens
+
+        return [_create_member_token(net, color_group=new_color_group,
+                    operation_id=operation_id, parallel_id=parallel_id,
+                    parallel_idx=parallel_idx, workflow_data=workflow_data)
+                for parallel_idx in xrange(num_released)]
+
 
+class ParallelByRelease(BasicActionBase):
+    """
+    Create the token of the next member of a parallel-by with a
+    <parallel_limit>, if any are left, when one of its members succeeds.
+
+    Member parallel_idx releases member parallel_idx + parallel_limit, so
+    that each member is released by exactly one predecessor, and executing
+    this action again for the same member releases the same successor
+    instead of skipping one.
+    """
+    requrired_arguments = ['operation_id', 'parallel_limit']
+
+    def execute(self, net, color_descriptor, active_tokens, service_interfaces):
+        workflow_data = io.extract_workflow_data(net, active_tokens)
+        finished_parallel_id = _parallel_id_from_workflow_data(workflow_data)
+        parallel_id = finished_parallel_id.parent_identifier
         operation_id = self.args['operation_id']
 
-        tokens = []
-        for parallel_idx in xrange(num_tokens):
-            color = new_color_group.begin + parallel_idx
+        parallel_idx = (finished_parallel_id.index +
+                self.args['parallel_limit'])
+        if parallel_idx >= color_descriptor.group.size:
+            return [], defer.succeed(None)
+
+        token = _create_member_token(net, color_group=color_descriptor.group,
+                operation_id=operation_id, parallel_id=parallel_id,
+                parallel_idx=parallel_idx, workflow_data=workflow_data)
+
+        return [token], defer.succeed(None)
 
-            this_workflow_data['parallel_id'] = list(
-                    parallel_id.child_identifier(operation_id, parallel_idx))
-            data = {'workflow_data': this_workflow_data}
 
-            tokens.append(net.create_token(color=color,
-                color_group_idx=new_color_group.idx, data=data))
+def _create_member_token(net, color_group, operation_id, parallel_id,
+        parallel_idx, workflow_data):
+    member_workflow_data = copy.copy(workflow_data)
+    member_workflow_data['parallel_id'] = list(
+            parallel_id.child_identifier(operation_id, parallel_idx))
 
-        return tokens
+    return net.create_token(color=color_group.begin + parallel_idx,
+            color_group_idx=color_group.idx,
+            data={'workflow_data': member_workflow_data})
 
 
 class ParallelByJoin(BarrierActionBase):
@@ -86,13 +129,21 @@ class ParallelByJoin(BarrierActionBase):
         parallel_id = _parallel_id_from_workflow_data(workflow_data)
         parent_parallel_id = parallel_id.parent_identifier
 
-        for property_name in op.output_properties:
-            array_value = self.collect_array_output(net=net,
+        if self.args.get('incremental_join', False):
+            outputs = self.collect_accumulated_outputs(net=net,
                     operation=op,
                     parallel_size=parallel_size,
-                    property_name=property_name,
                     parallel_id=parent_parallel_id)
-
+        else:
+            outputs = {}
+            for property_name in op.output_properties:
+                outputs[property_name] = self.collect_array_output(net=net,
+                        operation=op,
+                        parallel_size=parallel_size,
+                        property_name=property_name,
+                        parallel_id=parent_parallel_id)
+
+        for property_name, array_value in outputs.iteritems():
             op.store_output(property_name, value=array_value,
                     parallel_id=parent_parallel_id)
 
@@ -105,13 +156,48 @@ class ParallelByJoin(BarrierActionBase):
 
     def collect_array_output(self, net, property_name, parallel_size,
             operation, parallel_id):
-        result = []
-        for parallel_idx in xrange(parallel_size):
-            result.append(operation.load_output(name=property_name,
-                parallel_id=parallel_id.child_identifier(
-                    operation.operation_id, parallel_idx)))
+        parallel_ids = [parallel_id.child_identifier(operation.operation_id,
+            parallel_idx) for parallel_idx in xrange(parallel_size)]
+
+        return operation.load_output_many(name=property_name,
+                parallel_ids=parallel_ids)
+
+    def collect_accumulated_outputs(self, net, operation, parallel_size,
+            parallel_id):
+        outputs = io.load_accumulated_outputs(net=net,
+                operation_id=operation.operation_id,
+                property_names=operation.output_properties,
+                parallel_id=parallel_id,
+                parallel_size=parallel_size)
+        io.delete_accumulated_outputs(net=net,
+                operation_id=operation.operation_id,
+                property_names=operation.output_properties,
+                parallel_id=parallel_id,
+                parallel_size=parallel_size)
+
+        return outputs
+
+
+class ParallelByAccumulate(BasicActionBase):
+    requrired_arguments = ['operation_id']
+
+    def execute(self, net, color_descriptor, active_tokens, service_interfaces):
+        workflow_data = io.extract_workflow_data(net, active_tokens)
+        parallel_id = _parallel_id_from_workflow_data(workflow_data)
+
+        op = factory.load_operation(net, self.args['operation_id'])
+        outputs = io.load_sources({name: op.output_source(name)
+            for name in op.output_properties}, parallel_id)
+        io.store_accumulated_outputs(net=net,
+                operation_id=op.operation_id,
+                outputs=outputs,
+                parallel_id=parallel_id)
 
-        return result
+        token = net.create_token(color=color_descriptor.color,
+            color_group_idx=color_descriptor.group.idx,
+            data={'workflow_data': workflow_data})
+
+        return [token], defer.succeed(None)
 
 
 class ParallelByFail(BasicActionBase):
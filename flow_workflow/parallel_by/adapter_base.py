@@ -19,6 +19,41 @@ class ParallelXMLAdapterBase(flow_workflow.adapter_base.XMLAdapterBase):
     def parallel_by(self):
         return self.xml.attrib.get('parallelBy')
 
+    def incremental_join(self, resources):
+        return resources.get('incremental_join', False)
+
+    def parallel_by_limit(self, resources):
+        """
+        Return the maximum number of parallel-by members in flight, or None
+        when they are not limited.
+        """
+        limit = resources.get('parallel_by_limit',
+                self.xml.attrib.get('parallelByLimit'))
+        if limit is None:
+            return None
+
+        try:
+            value = int(limit)
+        except (TypeError, ValueError):
+            value = None
+
+        if (value is None or value < 1 or isinstance(limit, bool)
+                or (not isinstance(limit, basestring) and value != limit)):
+            raise ValueError('parallel_by_limit must be a positive integer, '
+                    'not %r' % (limit,))
+
+        return value
+
+    def batch_shortcut_net(self, resources):
+        """
+        Return a net that tries to shortcut every member of the parallel-by
+        before they are split, or None to let each member try on its own.
+        """
+        return None
+
     def _parallel_by_net(self, resources):
         target_net = self.single_future_net(resources=resources)
-        return future_nets.ParallelByNet(target_net, self.parallel_by)
+        return future_nets.ParallelByNet(target_net, self.parallel_by,
+                incremental_join=self.incremental_join(resources),
+                shortcut_net=self.batch_shortcut_net(resources),
+                parallel_limit=self.parallel_by_limit(resources))
@@ -8,8 +8,19 @@ class ParallelByNet(WorkflowNetBase):
     """
     Make a given <target_net> run parallel on the given <parallel_property>.
     The target_net must be a WorkflowNetBase net.
+
+    If <incremental_join> is set, each target_net success stores its outputs
+    in an accumulator as soon as it finishes, so that the join only has to
+    read the accumulated values back.
+
+    If a <shortcut_net> is given, it runs before the split, and the split
+    happens whether it succeeds or fails.
+
+    If <parallel_limit> is set, at most that many members are started at
+    first, and the next member is started whenever one succeeds.
     """
-    def __init__(self, target_net, parallel_property):
+    def __init__(self, target_net, parallel_property, incremental_join=False,
+            shortcut_net=None, parallel_limit=None):
 
         self.target_net = target_net
 
@@ -22,20 +33,53 @@ class ParallelByNet(WorkflowNetBase):
 
 
         # split_transition
+        split_args = {}
+        if parallel_limit:
+            split_args['parallel_limit'] = parallel_limit
         split_action = FutureAction(cls=actions.ParallelBySplit,
                 operation_id=operation_id,
-                parallel_property=parallel_property)
+                parallel_property=parallel_property, **split_args)
         self.split_transition = self.add_basic_transition(
                 name='ParallelBy(%s) split' % operation_id,
                 action=split_action)
-        self.starting_split_place = self.bridge_transitions(
-                self.internal_start_transition,
-                self.split_transition,
-                name='starting-split')
-        self.succeeding_split_place = self.bridge_transitions(
-                self.split_transition,
-                target_net.start_transition,
-                name='succeeding-split')
+        if shortcut_net is None:
+            self.starting_split_place = self.bridge_transitions(
+                    self.internal_start_transition,
+                    self.split_transition,
+                    name='starting-split')
+        else:
+            self.shortcut_net = shortcut_net
+            self.subnets.add(shortcut_net)
+
+            self.starting_shortcut_place = self.bridge_transitions(
+                    self.internal_start_transition,
+                    shortcut_net.start_transition,
+                    name='starting-shortcut')
+            self.starting_split_place = self.join_transitions_as_or(
+                    self.split_transition,
+                    [shortcut_net.success_transition,
+                        shortcut_net.failure_transition],
+                    name='starting-split')
+        # release_transition
+        if parallel_limit:
+            release_action = FutureAction(cls=actions.ParallelByRelease,
+                    operation_id=operation_id, parallel_limit=parallel_limit)
+            self.release_transition = self.add_basic_transition(
+                    name='ParallelBy(%s) release' % operation_id,
+                    action=release_action)
+            self.starting_release_place = self.bridge_transitions(
+                    target_net.success_transition,
+                    self.release_transition,
+                    name='starting-release')
+            self.succeeding_split_place = self.join_transitions_as_or(
+                    target_net.start_transition,
+                    [self.split_transition, self.release_transition],
+                    name='succeeding-split')
+        else:
+            self.succeeding_split_place = self.bridge_transitions(
+                    self.split_transition,
+                    target_net.start_transition,
+                    name='succeeding-split')
 
         # historian observers
         self.observe_transition(self.split_transition,
@@ -54,14 +98,30 @@ class ParallelByNet(WorkflowNetBase):
                     operation_id=self.operation_id, status='done',
                     name=display_name(name)))
 
+        # accumulate_transition
+        if incremental_join:
+            accumulate_action = FutureAction(cls=actions.ParallelByAccumulate,
+                    operation_id=operation_id)
+            self.accumulate_transition = self.add_basic_transition(
+                    name='ParallelBy(%s) accumulate' % operation_id,
+                    action=accumulate_action)
+            self.starting_accumulate_place = self.bridge_transitions(
+                    target_net.success_transition,
+                    self.accumulate_transition,
+                    name='starting-accumulate')
+            join_source_transition = self.accumulate_transition
+        else:
+            join_source_transition = target_net.success_transition
+
         # join_transition
         join_action = FutureAction(cls=actions.ParallelByJoin,
-                operation_id=operation_id)
+                operation_id=operation_id,
+                incremental_join=bool(incremental_join))
         self.join_transition = self.add_barrier_transition(
                 name='ParallelBy(%s) join' % operation_id,
                 action=join_action)
         self.starting_join_place = self.bridge_transitions(
-                target_net.success_transition,
+                join_source_transition,
                 self.join_transition,
                 name='starting-join')
         self.succeeding_join_place = self.bridge_transitions(
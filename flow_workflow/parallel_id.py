@@ -1,5 +1,3 @@
-from collections import OrderedDict
-
 import json
 import logging
 
@@ -8,51 +6,72 @@ LOG = logging.getLogger(__name__)
 
 
 class ParallelIdentifier(object):
-    def __init__(self, parallel_id=[]):
-        self._entries = OrderedDict([(int(op_id), int(par_idx))
-                for op_id, par_idx in parallel_id])
+    """
+    An immutable sequence of (operation_id, parallel_idx) pairs, outermost
+    parallel-by first.  Parents and the serialized form are computed at most
+    once per instance, and child identifiers share their parent instance.
+    """
+    __slots__ = ['_entries', '_hash', '_parent', '_serialized']
+
+    def __init__(self, parallel_id=()):
+        self._entries = tuple((int(op_id), int(par_idx))
+                for op_id, par_idx in parallel_id)
+        self._hash = None
+        self._parent = None
+        self._serialized = None
+
+    @classmethod
+    def _from_entries(cls, entries, parent=None):
+        result = cls.__new__(cls)
+        result._entries = entries
+        result._hash = None
+        result._parent = parent
+        result._serialized = None
+        return result
 
     @property
     def index(self):
         if self._entries:
-            return self._entries.values()[-1]
+            return self._entries[-1][1]
 
     def refers_to(self, operation):
-        return int(operation.operation_id) in self._entries
+        return self._contains_operation_id(int(operation.operation_id))
 
-    @property
-    def _parent_entries(self):
-        parent_entries = OrderedDict(self._entries)
-        parent_entries.popitem()
-        return parent_entries
+    def _contains_operation_id(self, operation_id):
+        for op_id, par_idx in self._entries:
+            if op_id == operation_id:
+                return True
+        return False
 
     @property
     def parent_identifier(self):
-        return ParallelIdentifier(self._parent_entries.iteritems())
-
-    def _child_entries(self, operation_id, parallel_idx):
-        if int(operation_id) in self._entries:
-            raise ValueError('operation_id already in ParallelIdentifier '
-                    'op_id (%r) in %r' % (operation_id, self._entries))
+        if not self._entries:
+            raise KeyError('ParallelIdentifier is empty, it has no parent')
 
-        child_entries = OrderedDict(self._entries)
-        child_entries[int(operation_id)] = int(parallel_idx)
-        return child_entries
+        if self._parent is None:
+            self._parent = self._from_entries(self._entries[:-1])
+        return self._parent
 
     def child_identifier(self, operation_id, parallel_idx):
-        return ParallelIdentifier(self._child_entries(
-            operation_id, parallel_idx).iteritems())
+        operation_id = int(operation_id)
+        if self._contains_operation_id(operation_id):
+            raise ValueError('operation_id already in ParallelIdentifier '
+                    'op_id (%r) in %r' % (operation_id, self))
+
+        return self._from_entries(
+                self._entries + ((operation_id, int(parallel_idx)),),
+                parent=self)
 
     @property
     def stack_iterator(self):
         current_id = self
-        while len(current_id):
+        while current_id._entries:
             yield current_id
             current_id = current_id.parent_identifier
         yield current_id
 
     def __iter__(self):
-        return self._entries.iteritems()
+        return iter(self._entries)
 
     def __len__(self):
         return len(self._entries)
@@ -60,11 +79,28 @@ class ParallelIdentifier(object):
     def __repr__(self):
         return 'ParallelIdentifier(%r)' % list(self)
 
+    def __eq__(self, other):
+        if not isinstance(other, ParallelIdentifier):
+            return NotImplemented
+        return self._entries == other._entries
+
+    def __ne__(self, other):
+        if not isinstance(other, ParallelIdentifier):
+            return NotImplemented
+        return self._entries != other._entries
+
     def __cmp__(self, other):
         return cmp(self._entries, other._entries)
 
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self._entries)
+        return self._hash
+
     def serialize(self):
-        return json.dumps(list(self))
+        if self._serialized is None:
+            self._serialized = json.dumps(list(self))
+        return self._serialized
 
     @classmethod
     def deserialize(cls, data='[]'):
@@ -57,6 +57,10 @@ class PerlAction(object):
         if len(parallel_id):
             cmd_line.extend(['--parallel-id', parallel_id.serialize()])
 
+        if 'shortcut_parallel_by' in self.args:
+            cmd_line.extend(['--shortcut-parallel-by',
+                self.args['shortcut_parallel_by']])
+
         return map(str, cmd_line)
 
     def get_parallel_id(self, token_data):
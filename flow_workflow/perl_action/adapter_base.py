@@ -45,6 +45,26 @@ class PerlActionAdapterBase(adapter_base.ParallelXMLAdapterBase):
     def job_group(self, resources):
         return resources.get('job_group')
 
+    def batch_shortcut(self, resources):
+        return resources.get('batch_shortcut', False)
+
+    def batch_shortcut_net(self, resources):
+        # events take no inputs, so only commands shortcut in batches
+        if self.action_type != 'command' or not self.batch_shortcut(resources):
+            return None
+
+        action_args = {}
+        if 'resources' in resources:
+            action_args['resources'] = resources['resources']
+        return future_nets.BatchShortcutShellCommandNet(
+                name='%s (batch shortcut)' % self.name,
+                operation_id=self.operation_id,
+                parallel_property=self.parallel_by,
+                dispatch_action_class=self.shortcut_action_class,
+                action_type=self.action_type,
+                action_id=self.action_id,
+                **action_args)
+
     def single_future_net(self, resources):
         return future_nets.PerlActionNet(
                 name=self.name,
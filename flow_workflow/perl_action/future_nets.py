@@ -15,6 +15,17 @@ class ShortcutShellCommandNet(ShellCommandNet):
                     calculate_start_time=True))
 
 
+class BatchShortcutShellCommandNet(ShellCommandNet):
+    """
+    Tries to shortcut every member of a parallel-by on <parallel_property>
+    in one workflow-wrapper process, before the members are created.
+    """
+    def __init__(self, operation_id, parallel_property, *args, **kwargs):
+        ShellCommandNet.__init__(self, *args,
+                operation_id=operation_id, method='shortcut',
+                shortcut_parallel_by=parallel_property, **kwargs)
+
+
 class ExecuteShellCommandNet(ShellCommandNet):
     def __init__(self, operation_id, *args, **kwargs):
         ShellCommandNet.__init__(self, *args,
@@ -0,0 +1,78 @@
+from twisted.internet import defer, protocol, reactor
+from twisted.protocols.basic import Int32StringReceiver
+
+import json
+import logging
+import os
+import sys
+
+
+LOG = logging.getLogger(__name__)
+
+
+class WorkerLostError(RuntimeError):
+    pass
+
+
+class PerlWorkerProtocol(Int32StringReceiver):
+    """
+    Client side of a workflow-wrapper.pl worker pool connection (see
+    'workflow-wrapper.pl serve').  Every frame is a 4 byte big-endian length
+    followed by that many bytes.  The client sends one JSON request; the
+    worker replies with frames starting with 'O' (stdout) or 'E' (stderr),
+    and finally with 'X' followed by the exit code.
+    """
+    MAX_LENGTH = 1 << 24
+
+    def __init__(self, request, finished, stdout, stderr):
+        self.request = request
+        self.finished = finished
+        self.streams = {'O': stdout, 'E': stderr}
+        self.exit_code = None
+
+    def connectionMade(self):
+        self.sendString(json.dumps(self.request))
+
+    def stringReceived(self, frame):
+        kind, data = frame[:1], frame[1:]
+        if kind == 'X':
+            self.exit_code = int(data)
+            self.transport.loseConnection()
+
+        elif kind in self.streams:
+            self.streams[kind].write(data)
+            self.streams[kind].flush()
+
+        else:
+            LOG.warning('Ignoring unknown frame from perl worker: %r', frame)
+
+    def connectionLost(self, reason):
+        if self.exit_code is None:
+            self.finished.errback(WorkerLostError(
+                'Perl worker exited without an exit code: %s' %
+                reason.getErrorMessage()))
+        else:
+            self.finished.callback(self.exit_code)
+
+
+def run(socket_path, argv, env=None, cwd=None, stdout=None, stderr=None):
+    """
+    Run 'workflow-wrapper.pl <argv>' in the worker pool listening on
+    <socket_path>, with the environment and working directory of this
+    process unless <env> or <cwd> are given.  The returned Deferred fires
+    with the exit code, or fails with ConnectError when no pool is
+    listening and with WorkerLostError when the worker disappears.
+    """
+    request = {
+        'argv': list(argv),
+        'env': dict(os.environ if env is None else env),
+        'cwd': os.getcwd() if cwd is None else cwd,
+    }
+
+    finished = defer.Deferred()
+    creator = protocol.ClientCreator(reactor, PerlWorkerProtocol, request,
+            finished, stdout or sys.stdout, stderr or sys.stderr)
+    connecting = creator.connectUNIX(socket_path)
+    connecting.addErrback(finished.errback)
+
+    return finished
@@ -0,0 +1,207 @@
+from StringIO import StringIO
+from flow.petri_net.net import Net
+from flow_workflow import io
+from flow_workflow.commands import workflow_wrapper
+from flow_workflow.parallel_id import ParallelIdentifier
+from test_helpers.fakeredistest import FakeRedisTest
+from twisted.internet import defer
+
+import argparse
+import json
+import mock
+import unittest
+
+
+class WorkflowWrapperTestBase(FakeRedisTest):
+    def setUp(self):
+        FakeRedisTest.setUp(self)
+
+        self.net = Net.create(self.conn, key='netkey')
+        self.operation_id = 12
+        self.parallel_ids = [ParallelIdentifier().child_identifier(
+            self.operation_id, i) for i in xrange(3)]
+
+        self.command = workflow_wrapper.WorkflowWrapperCommand(
+                perl_wrapper=['workflow-wrapper'], perl_worker_socket=None,
+                storage=self.conn)
+        self.command._run_wrapper = mock.Mock()
+
+        self.get_object_patcher = mock.patch(
+                'flow_workflow.commands.workflow_wrapper.rom.get_object',
+                return_value=self.net)
+        self.get_object_patcher.start()
+
+    def tearDown(self):
+        self.get_object_patcher.stop()
+        FakeRedisTest.tearDown(self)
+
+    def parse_args(self, *args):
+        parser = argparse.ArgumentParser()
+        self.command.annotate_parser(parser)
+        return parser.parse_args(['--action-type', 'command',
+            '--action-id', 'Some::Command', '--net-key', 'netkey',
+            '--operation-id', str(self.operation_id)] + list(args))
+
+
+class StoreShortcutOutputsTest(WorkflowWrapperTestBase):
+    def test_stores_outputs_of_shortcut_members(self):
+        outputs_file = StringIO(json.dumps([{'out': 'a'}, None,
+            {'out': 'c'}]))
+        workflow_wrapper.store_shortcut_outputs(outputs_file, net=self.net,
+                operation_id=self.operation_id,
+                parallel_ids=self.parallel_ids)
+
+        self.assertEqual('a', io.load_output(self.net, self.operation_id,
+            'out', self.parallel_ids[0]))
+        self.assertEqual('c', io.load_output(self.net, self.operation_id,
+            'out', self.parallel_ids[2]))
+        with self.assertRaises(KeyError):
+            io.load_output(self.net, self.operation_id, 'out',
+                    self.parallel_ids[1])
+
+        self.assertEqual([True, False, True],
+                [io.load_shortcut_result(self.net, self.operation_id, pid)
+                    for pid in self.parallel_ids])
+
+    def test_length_mismatch(self):
+        outputs_file = StringIO(json.dumps([{'out': 'a'}, None]))
+        with self.assertRaises(ValueError):
+            workflow_wrapper.store_shortcut_outputs(outputs_file,
+                    net=self.net, operation_id=self.operation_id,
+                    parallel_ids=self.parallel_ids)
+
+        self.assertEqual(None, io.load_shortcut_result(self.net,
+            self.operation_id, self.parallel_ids[0]))
+
+
+class BatchedShortcutResultTest(WorkflowWrapperTestBase):
+    def execute(self, shortcut):
+        io.store_shortcut_results(self.net, operation_id=self.operation_id,
+                results={self.parallel_ids[1]: shortcut})
+
+        deferred = self.command._execute(self.parse_args(
+            '--method', 'shortcut',
+            '--parallel-id', self.parallel_ids[1].serialize()))
+
+        results = []
+        deferred.addCallback(results.append)
+        self.assertEqual([None], results)
+        self.assertFalse(self.command._run_wrapper.called)
+
+    def test_shortcut(self):
+        self.execute(True)
+        self.assertEqual(0, self.command.exit_code)
+
+    def test_no_shortcut(self):
+        self.execute(False)
+        self.assertEqual(1, self.command.exit_code)
+
+
+class ShortcutParallelByTest(WorkflowWrapperTestBase):
+    def setUp(self):
+        WorkflowWrapperTestBase.setUp(self)
+
+        self.members = [(pid, {'pfoo': i})
+                for i, pid in enumerate(self.parallel_ids)]
+        self.members_patcher = mock.patch(
+                'flow_workflow.commands.workflow_wrapper.parallel_by_members',
+                return_value=self.members)
+        self.members_patcher.start()
+        self.factory_patcher = mock.patch(
+                'flow_workflow.commands.workflow_wrapper.factory')
+        self.factory_patcher.start()
+        self.chunk_size_patcher = mock.patch(
+                'flow_workflow.commands.workflow_wrapper.SHORTCUT_CHUNK_SIZE',
+                2)
+        self.chunk_size_patcher.start()
+
+    def tearDown(self):
+        self.chunk_size_patcher.stop()
+        self.factory_patcher.stop()
+        self.members_patcher.stop()
+        WorkflowWrapperTestBase.tearDown(self)
+
+    def run_wrapper(self, exit_codes, outputs):
+        exit_codes = list(exit_codes)
+        outputs = list(outputs)
+
+        def run_wrapper(wrapper_args):
+            with open(wrapper_args[3], 'w') as outputs_file:
+                json.dump(outputs.pop(0), outputs_file)
+            return defer.succeed(exit_codes.pop(0))
+        self.command._run_wrapper.side_effect = run_wrapper
+
+    def shortcut_parallel_by(self):
+        self.command._execute(self.parse_args('--method', 'shortcut',
+            '--shortcut-parallel-by', 'pfoo'))
+
+    def test_chunks(self):
+        self.run_wrapper([0, 0], [[{'out': 0}, None], [{'out': 2}]])
+        self.shortcut_parallel_by()
+
+        self.assertEqual(2, self.command._run_wrapper.call_count)
+        self.assertEqual('shortcut-batch',
+                self.command._run_wrapper.call_args[0][0][0])
+        self.assertEqual([True, False, True],
+                [io.load_shortcut_result(self.net, self.operation_id, pid)
+                    for pid in self.parallel_ids])
+        self.assertEqual(0, self.command.exit_code)
+
+    def test_failed_chunk_continues(self):
+        self.run_wrapper([1, 0], [[], [{'out': 2}]])
+        self.shortcut_parallel_by()
+
+        self.assertEqual(2, self.command._run_wrapper.call_count)
+        self.assertEqual([None, None, True],
+                [io.load_shortcut_result(self.net, self.operation_id, pid)
+                    for pid in self.parallel_ids])
+        self.assertEqual(2, io.load_output(self.net, self.operation_id,
+            'out', self.parallel_ids[2]))
+        self.assertEqual(1, self.command.exit_code)
+
+
+class RunInWorkerTest(WorkflowWrapperTestBase):
+    def test_output_annotated(self):
+        self.command.perl_worker_socket = '/private/pool.sock'
+        wrapper_args = ['command', 'execute', 'Some::Command', 'in', 'out']
+
+        with mock.patch('flow_workflow.commands.workflow_wrapper.perl_worker'
+                ) as perl_worker, mock.patch(
+                'flow_workflow.commands.workflow_wrapper.LogAnnotator'
+                ) as log_annotator:
+            self.command._run_in_worker(wrapper_args)
+
+        log_annotator.assert_called_once_with(
+                ['workflow-wrapper'] + wrapper_args)
+        annotator = log_annotator.return_value
+
+        args, kwargs = perl_worker.run.call_args
+        self.assertEqual(('/private/pool.sock', wrapper_args), args)
+        kwargs['stdout'].write('out\n')
+        kwargs['stderr'].write('err\n')
+        annotator.outReceived.assert_called_once_with('out\n')
+        annotator.errReceived.assert_called_once_with('err\n')
+
+
+class ParallelByMembersTest(unittest.TestCase):
+    def test_members(self):
+        operation = mock.Mock()
+        operation.operation_id = 42
+        operation.load_inputs.return_value = {
+            'pfoo': ['a', 'b', 'c'],
+            'bar': 'bar value',
+        }
+        parallel_id = ParallelIdentifier([[7, 1]])
+
+        members = workflow_wrapper.parallel_by_members(operation, 'pfoo',
+                parallel_id)
+
+        operation.load_inputs.assert_called_once_with(parallel_id)
+        expected_members = [(parallel_id.child_identifier(42, i),
+            {'pfoo': value, 'bar': 'bar value'})
+            for i, value in enumerate(['a', 'b', 'c'])]
+        self.assertEqual(expected_members, members)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -54,6 +54,20 @@ class ModelAdapterTest(unittest.TestCase):
         self.assertItemsEqual(['A', 'B', 'output connector',
             'output connector'], [l.to_operation for l in self.adapter.links])
 
+    def test_links_from(self):
+        self.assertItemsEqual(['A', 'B'], [l.to_operation
+            for l in self.adapter.links_from('input connector')])
+        self.assertEqual([], self.adapter.links_from('output connector'))
+
+    def test_links_to(self):
+        self.assertItemsEqual(['out_a', 'out_b'], [l.to_property
+            for l in self.adapter.links_to('output connector')])
+        self.assertEqual([], self.adapter.links_to('input connector'))
+
+    def test_output_properties(self):
+        self.assertItemsEqual(['out_a', 'out_b'],
+                self.adapter.output_properties)
+
     def test_edges(self):
         expected_edges = {
             'input connector': {'A', 'B'},
@@ -62,6 +76,20 @@ class ModelAdapterTest(unittest.TestCase):
         }
         self.assertEqual(expected_edges, self.adapter.edges)
 
+    def test_edges_copy(self):
+        edges = self.adapter.edges
+        edges['A'].add('B')
+        del edges['B']
+        with self.assertRaises(KeyError):
+            edges['missing']
+
+        expected_edges = {
+            'input connector': {'A', 'B'},
+            'A': {'output connector'},
+            'B': {'output connector'},
+        }
+        self.assertEqual(expected_edges, self.adapter.edges)
+
     def test_child_input_connections(self):
         input_connections = mock.Mock()
         ic_operation_id = self.adapter.child_operation_id('input connector')
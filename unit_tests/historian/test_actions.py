@@ -0,0 +1,82 @@
+from flow.petri_net import color
+from flow.petri_net.net import Net
+from flow_workflow import factory
+from flow_workflow import future_operation
+from flow_workflow.historian import actions
+from flow_workflow.parallel_id import ParallelIdentifier
+from test_helpers.fakeredistest import FakeRedisTest
+
+import mock
+import unittest
+
+
+class UpdateChildrenStatusesTest(FakeRedisTest):
+    def setUp(self):
+        FakeRedisTest.setUp(self)
+
+        self.net = Net.create(self.conn, key='netkey', _constants={
+            'user_name': 'flow_user',
+            'workflow_plan_id': 321,
+        })
+
+        parent = future_operation.FutureOperation(
+                operation_class='direct_storage', operation_id=1,
+                name='parent', parent=future_operation.NullFutureOperation(),
+                log_dir='/exciting/log/dir')
+        children = [future_operation.FutureOperation(
+                operation_class='direct_storage', operation_id=i,
+                name='child %d' % i, parent=parent,
+                log_dir='/exciting/log/dir') for i in [2, 3, 4]]
+        for fop in [parent] + children:
+            fop.save(self.net)
+
+        self.operation = factory.load_operation(self.net, 1)
+
+        self.color_group = self.net.add_color_group(size=1)
+        self.color_descriptor = color.ColorDescriptor(
+                color=self.color_group.begin, group=self.color_group)
+        self.token = self.net.create_token(color=self.color_group.begin,
+                color_group_idx=self.color_group.idx,
+                data={'workflow_data': {}})
+
+        self.historian = mock.Mock()
+        self.service_interfaces = {'workflow_historian': self.historian}
+
+        self.action = actions.UpdateChildrenStatuses.create(self.conn,
+                args={'operation_id': 1, 'status': 'running'})
+
+    def test_execute(self):
+        self.action.execute(net=self.net,
+                color_descriptor=self.color_descriptor,
+                active_tokens=[self.token.index],
+                service_interfaces=self.service_interfaces)
+
+        self.assertFalse(self.historian.update.called)
+        self.historian.update_many.assert_called_once_with(status='running',
+                workflow_plan_id=321, user_name='flow_user', updates=mock.ANY)
+
+        updates = self.historian.update_many.call_args[1]['updates']
+        self.assertEqual([2, 3, 4], sorted(
+            u['operation_data']['operation_id'] for u in updates))
+
+        expected_updates = []
+        for child in self.operation.iter_children():
+            fields = self.action.operation_fields(child,
+                    self.color_descriptor, ParallelIdentifier(),
+                    token_data={'workflow_data': {}})
+            del fields['status']
+            expected_updates.append(fields)
+
+        key = lambda u: u['operation_data']['operation_id']
+        self.assertEqual(sorted(expected_updates, key=key),
+                sorted(updates, key=key))
+
+        for update in updates:
+            self.assertNotIn('status', update)
+            self.assertEqual('child %d' % key(update), update['name'])
+            self.assertEqual(1,
+                    update['parent_operation_data']['operation_id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
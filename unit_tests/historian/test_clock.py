@@ -0,0 +1,48 @@
+from flow_workflow.historian.clock import RedisClock
+
+import unittest
+
+
+class FakeConnection(object):
+    def __init__(self, server_time):
+        self.server_time = server_time
+        self.calls = 0
+
+    def time(self):
+        self.calls += 1
+        seconds = int(self.server_time)
+        return seconds, int(round((self.server_time - seconds) * 1e6))
+
+
+class RedisClockTest(unittest.TestCase):
+    def setUp(self):
+        self.local_time = 1000.0
+        self.clock = RedisClock(sync_interval=60,
+                local_time=lambda: self.local_time)
+        self.connection = FakeConnection(5000.5)
+
+    def test_served_locally(self):
+        self.assertAlmostEqual(5000.5, self.clock.time(self.connection))
+
+        self.local_time += 10
+        self.assertAlmostEqual(5010.5, self.clock.time(self.connection))
+        self.assertEqual(1, self.connection.calls)
+
+    def test_resync_after_interval(self):
+        self.clock.time(self.connection)
+
+        self.local_time += 60
+        self.connection.server_time = 5070.5
+        self.assertAlmostEqual(5070.5, self.clock.time(self.connection))
+        self.assertEqual(2, self.connection.calls)
+
+    def test_resync_when_local_clock_goes_backwards(self):
+        self.clock.time(self.connection)
+
+        self.local_time -= 1
+        self.clock.time(self.connection)
+        self.assertEqual(2, self.connection.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+from flow_workflow.historian import executor
+from twisted.internet import defer
+
+import mock
+import unittest
+
+
+class SynchronousExecutorTest(unittest.TestCase):
+    def test_submit(self):
+        function = mock.Mock(return_value='result')
+        results = []
+        executor.SynchronousExecutor().submit('key', function, 1,
+                a=2).addCallback(results.append)
+
+        function.assert_called_once_with(1, a=2)
+        self.assertEqual(['result'], results)
+
+
+class ThreadPoolExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.patchers = [mock.patch.object(executor, name)
+                for name in ['ThreadPool', 'reactor', 'threads']]
+        for patcher in self.patchers:
+            patcher.start()
+
+        self.calls = []
+        executor.threads.deferToThreadPool.side_effect = self.defer_to_thread
+        self.executor = executor.ThreadPoolExecutor(4)
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def defer_to_thread(self, reactor, threadpool, function, *args):
+        deferred = defer.Deferred()
+        self.calls.append((args, deferred))
+        return deferred
+
+    def submit(self, key, value):
+        results = []
+        self.executor.submit(key, None, value).addBoth(results.append)
+        return results
+
+    def test_starts_threadpool(self):
+        executor.ThreadPool.assert_called_once_with(minthreads=4,
+                maxthreads=4, name='historian-storage')
+        self.executor.threadpool.start.assert_called_once_with()
+
+    def test_same_key_runs_in_order(self):
+        first = self.submit('a', 1)
+        second = self.submit('a', 2)
+        self.assertEqual([(1,)], [args for args, d in self.calls])
+
+        self.calls[0][1].callback('one')
+        self.assertEqual(['one'], first)
+        self.assertEqual([(1,), (2,)], [args for args, d in self.calls])
+
+        self.calls[1][1].callback('two')
+        self.assertEqual(['two'], second)
+        self.assertEqual({}, self.executor._tails)
+
+    def test_different_keys_run_concurrently(self):
+        self.submit('a', 1)
+        self.submit('b', 2)
+        self.assertEqual([(1,), (2,)], [args for args, d in self.calls])
+
+    def test_failure_does_not_block_key(self):
+        first = self.submit('a', 1)
+        second = self.submit('a', 2)
+
+        self.calls[0][1].errback(RuntimeError('failed'))
+        self.assertTrue(first[0].check(RuntimeError))
+
+        self.calls[1][1].callback('two')
+        self.assertEqual(['two'], second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+from flow_workflow.historian import handler
+from flow_workflow.historian.operation_data import OperationData
+from flow_workflow.historian.status import Status
+
+import mock
+import unittest
+
+
+class ValidatePoolSizeTest(unittest.TestCase):
+    def test_valid(self):
+        handler.validate_pool_size(pool_size=1, threads=0)
+        handler.validate_pool_size(pool_size=4, threads=0)
+        handler.validate_pool_size(pool_size=4, threads=4)
+        handler.validate_pool_size(pool_size=8, threads=4)
+
+    def test_shared_connection_with_threads(self):
+        with self.assertRaises(ValueError):
+            handler.validate_pool_size(pool_size=1, threads=1)
+
+    def test_fewer_connections_than_threads(self):
+        with self.assertRaises(ValueError):
+            handler.validate_pool_size(pool_size=2, threads=4)
+
+    def test_writer_validates(self):
+        storage = mock.Mock()
+        storage.pool_size = 2
+        with self.assertRaises(ValueError):
+            handler.HistorianWriter(storage=storage, batch_size=2,
+                    batch_window=0.5, threads=4)
+
+
+class HistorianUpdateHandlerBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.storage = mock.Mock()
+        self.storage.pool_size = 1
+        self.writer = handler.HistorianWriter(storage=self.storage,
+                batch_size=2, batch_window=0.5, threads=0)
+        self.handler = handler.HistorianUpdateHandler(writer=self.writer,
+                queue_name='queue')
+
+        self.reactor_patcher = mock.patch(
+                'flow_workflow.historian.handler.reactor')
+        self.reactor = self.reactor_patcher.start()
+
+    def tearDown(self):
+        self.reactor_patcher.stop()
+
+    def message(self, operation_id, status='new', net_key='netkey'):
+        message = mock.Mock()
+        message.operation_data = {'net_key': net_key,
+                'operation_id': operation_id, 'color': 0}
+        message.to_dict.return_value = {
+            'operation_data': dict(message.operation_data),
+            'status': status,
+        }
+        return message
+
+    def callbacks(self, deferred):
+        results = []
+        deferred.addCallbacks(lambda x: results.append('ok'),
+                lambda f: results.append('failed'))
+        return results
+
+    def test_flush_on_batch_size(self):
+        first = self.callbacks(self.handler._handle_message(self.message(1)))
+        self.reactor.callLater.assert_called_once_with(0.5, self.writer.flush)
+        self.assertEqual([], first)
+        self.assertFalse(self.storage.update_many.called)
+
+        second = self.callbacks(self.handler._handle_message(
+            self.message(2, 'done')))
+        self.assertEqual(['ok'], first)
+        self.assertEqual(['ok'], second)
+
+        updates = self.storage.update_many.call_args[0][0]
+        self.assertEqual([OperationData('netkey', 1, 0),
+            OperationData('netkey', 2, 0)],
+            [u['operation_data'] for u in updates])
+        self.assertEqual(['new', 'done'], [str(u['status']) for u in updates])
+        self.assertIsInstance(updates[0]['status'], Status)
+
+    def test_flush_on_window(self):
+        result = self.callbacks(self.handler._handle_message(self.message(1)))
+        self.writer.flush()
+
+        self.assertEqual(['ok'], result)
+        self.assertEqual(1, len(self.storage.update_many.call_args[0][0]))
+
+    def test_flush_batches_per_net(self):
+        first = self.callbacks(self.handler._handle_message(self.message(1)))
+        second = self.callbacks(self.handler._handle_message(
+            self.message(1, net_key='other')))
+
+        self.assertEqual(['ok'], first)
+        self.assertEqual(['ok'], second)
+        self.assertEqual(2, self.storage.update.call_count)
+        self.assertEqual(['netkey', 'other'],
+                [c[0][0]['operation_data'].net_key
+                    for c in self.storage.update.call_args_list])
+
+    def test_flush_nothing_pending(self):
+        self.writer.flush()
+        self.assertFalse(self.storage.update_many.called)
+
+    def test_failed_batch_retried_individually(self):
+        self.storage.update_many.side_effect = RuntimeError('batch')
+        self.storage.update.side_effect = [None, RuntimeError('single')]
+
+        first = self.callbacks(self.handler._handle_message(self.message(1)))
+        second = self.callbacks(self.handler._handle_message(self.message(2)))
+
+        self.assertEqual(2, self.storage.update.call_count)
+        self.assertEqual(['ok'], first)
+        self.assertEqual(['failed'], second)
+
+    def test_unbatched(self):
+        self.writer.batch_size = 1
+        result = self.callbacks(self.handler._handle_message(self.message(1)))
+
+        self.assertEqual(['ok'], result)
+        self.assertEqual(1, self.storage.update.call_count)
+        self.assertFalse(self.storage.update_many.called)
+
+
+class HistorianBulkUpdateHandlerTest(unittest.TestCase):
+    def setUp(self):
+        self.storage = mock.Mock()
+        self.storage.pool_size = 1
+        self.writer = handler.HistorianWriter(storage=self.storage,
+                batch_size=10, batch_window=0.5, threads=0)
+        self.handler = handler.HistorianBulkUpdateHandler(writer=self.writer,
+                queue_name='bulk queue')
+
+        self.reactor_patcher = mock.patch(
+                'flow_workflow.historian.handler.reactor')
+        self.reactor_patcher.start()
+
+    def tearDown(self):
+        self.reactor_patcher.stop()
+
+    def test_handle_message(self):
+        message = mock.Mock()
+        message.status = 'new'
+        message.expand.return_value = [{
+            'operation_data': {'net_key': 'netkey', 'operation_id': i,
+                'color': 0},
+            'name': 'child %d' % i,
+            'status': 'new',
+            'user_name': 'user',
+            'workflow_plan_id': 5,
+        } for i in xrange(3)]
+
+        results = []
+        self.handler._handle_message(message).addCallback(results.append)
+        self.assertEqual([], results)
+
+        self.writer.flush()
+        self.assertEqual([[None, None, None]], results)
+
+        updates = self.storage.update_many.call_args[0][0]
+        self.assertEqual([0, 1, 2],
+                [u['operation_data'].operation_id for u in updates])
+        self.assertEqual([Status('new')] * 3, [u['status'] for u in updates])
+
+
+if __name__ == '__main__':
+    unittest.main()
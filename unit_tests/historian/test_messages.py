@@ -0,0 +1,76 @@
+from flow_workflow.historian.messages import BulkUpdateMessage
+
+import unittest
+
+
+class BulkUpdateMessageTest(unittest.TestCase):
+    def setUp(self):
+        self.updates = [
+            {
+                'name': 'first',
+                'operation_data': {'net_key': 'netkey', 'operation_id': 1,
+                    'color': 0},
+            },
+            {
+                'name': 'second',
+                'operation_data': {'net_key': 'netkey', 'operation_id': 2,
+                    'color': 0},
+                'parallel_index': 3,
+            },
+        ]
+
+    def message(self, status='done', updates=None):
+        if updates is None:
+            updates = self.updates
+        return BulkUpdateMessage(status=status, workflow_plan_id=321,
+                user_name='flow_user', updates=updates)
+
+    def test_validate(self):
+        self.message().validate()
+
+    def test_validate_no_updates(self):
+        self.message(updates=[]).validate()
+
+    def test_validate_invalid_status(self):
+        with self.assertRaises(ValueError):
+            self.message(status='bogus').validate()
+
+    def test_validate_missing_update_fields(self):
+        for field in ['name', 'operation_data']:
+            update = dict(self.updates[0])
+            del update[field]
+            with self.assertRaises(ValueError):
+                self.message(updates=[update]).validate()
+
+    def test_expand(self):
+        expected_updates = [
+            {
+                'name': 'first',
+                'operation_data': {'net_key': 'netkey', 'operation_id': 1,
+                    'color': 0},
+                'status': 'done',
+                'user_name': 'flow_user',
+                'workflow_plan_id': 321,
+            },
+            {
+                'name': 'second',
+                'operation_data': {'net_key': 'netkey', 'operation_id': 2,
+                    'color': 0},
+                'parallel_index': 3,
+                'status': 'done',
+                'user_name': 'flow_user',
+                'workflow_plan_id': 321,
+            },
+        ]
+        self.assertEqual(expected_updates, self.message().expand())
+
+    def test_expand_does_not_modify_updates(self):
+        self.message().expand()
+        self.assertNotIn('status', self.updates[0])
+
+    def test_expand_no_updates(self):
+        self.assertEqual([], self.message(updates=[]).expand())
+
+
+if __name__ == '__main__':
+    unittest.main()
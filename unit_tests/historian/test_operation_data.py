@@ -35,5 +35,16 @@ class OperationDataTests(TestCase):
         operation_data = OperationData.loads(self.string)
         self.assertEqual(self.operation_data, operation_data)
 
+    def test_hash(self):
+        same = OperationData(net_key=self.net_key,
+                operation_id=str(self.operation_id), color=self.color)
+        other = OperationData(net_key=self.net_key,
+                operation_id=self.operation_id, color=self.color + 1)
+
+        self.assertEqual(hash(self.operation_data), hash(same))
+        self.assertFalse(self.operation_data != same)
+        self.assertTrue(self.operation_data != other)
+        self.assertEqual(2, len({self.operation_data, same, other}))
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,94 @@
+from flow_workflow.historian import sharding
+from flow_workflow.historian.messages import BulkUpdateMessage
+from flow_workflow.historian.service_interface import WorkflowHistorianServiceInterface
+
+import mock
+import unittest
+
+
+class UpdateManyTest(unittest.TestCase):
+    def setUp(self):
+        self.broker = mock.Mock()
+        self.updates = [
+            {
+                'name': 'first',
+                'operation_data': {'net_key': 'netkey', 'operation_id': 1,
+                    'color': 0},
+            },
+            {
+                'name': 'second',
+                'operation_data': {'net_key': 'netkey', 'operation_id': 2,
+                    'color': 0},
+            },
+        ]
+
+    def interface(self, shards=1):
+        return WorkflowHistorianServiceInterface(broker=self.broker,
+                exchange='workflow',
+                update_routing_key='workflow_historian.update',
+                bulk_update_routing_key='workflow_historian.bulk_update',
+                shards=shards)
+
+    def test_publishes_one_message(self):
+        self.interface().update_many(status='done', workflow_plan_id=321,
+                user_name='flow_user', updates=self.updates)
+
+        self.broker.publish.assert_called_once_with('workflow',
+                'workflow_historian.bulk_update', mock.ANY)
+        message = self.broker.publish.call_args[0][2]
+        self.assertIsInstance(message, BulkUpdateMessage)
+        self.assertEqual('done', message.status)
+        self.assertEqual(321, message.workflow_plan_id)
+        self.assertEqual('flow_user', message.user_name)
+        self.assertEqual(self.updates, message.updates)
+
+    def test_sharded_routing_key(self):
+        self.interface(shards=4).update_many(status='done',
+                workflow_plan_id=321, user_name='flow_user',
+                updates=self.updates)
+
+        self.broker.publish.assert_called_once_with('workflow',
+                sharding.sharded_name('workflow_historian.bulk_update',
+                    sharding.shard_for('netkey', 4)), mock.ANY)
+
+    def test_sharded_publish_reaches_sharded_queue(self):
+        shards = 4
+        bindings = sharding.sharded_bindings('workflow_historian_update',
+                'workflow_historian.update', shards)
+        bindings.update(sharding.sharded_bindings(
+            'workflow_historian_bulk_update',
+            'workflow_historian.bulk_update', shards))
+
+        interface = self.interface(shards=shards)
+        interface.update(operation_data=self.updates[0]['operation_data'],
+                name='first', workflow_plan_id=321, status='new',
+                user_name='flow_user')
+        interface.update_many(status='done', workflow_plan_id=321,
+                user_name='flow_user', updates=self.updates)
+
+        self.assertEqual(2, self.broker.publish.call_count)
+        shard = sharding.shard_for('netkey', shards)
+        expected_queues = [
+            sharding.sharded_name('workflow_historian_update', shard),
+            sharding.sharded_name('workflow_historian_bulk_update', shard),
+        ]
+        for (args, kwargs), expected_queue in zip(
+                self.broker.publish.call_args_list, expected_queues):
+            routing_key = args[1]
+            self.assertEqual([expected_queue], [queue_name
+                for queue_name, routing_keys in bindings.iteritems()
+                if routing_key in routing_keys])
+
+    def test_negative_workflow_plan_id(self):
+        self.interface().update_many(status='done', workflow_plan_id=-1,
+                user_name='flow_user', updates=self.updates)
+        self.assertFalse(self.broker.publish.called)
+
+    def test_no_updates(self):
+        self.interface().update_many(status='done', workflow_plan_id=321,
+                user_name='flow_user', updates=[])
+        self.assertFalse(self.broker.publish.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
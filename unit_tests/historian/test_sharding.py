@@ -0,0 +1,48 @@
+from flow_workflow.historian import sharding
+
+import unittest
+
+
+class ShardingTest(unittest.TestCase):
+    def test_shard_for_is_stable(self):
+        # Every publisher must agree on the shard, whatever its platform.
+        self.assertEqual(325, sharding.shard_for('some_net_key', 1000))
+        self.assertEqual(325, sharding.shard_for(u'some_net_key', 1000))
+        self.assertEqual(0, sharding.shard_for('some_net_key', 1))
+
+    def test_shard_for_in_range(self):
+        shards = set(sharding.shard_for('net_%d' % i, 4) for i in xrange(100))
+        self.assertEqual(set([0, 1, 2, 3]), shards)
+
+    def test_sharded_name(self):
+        self.assertEqual('workflow_historian.update.3',
+                sharding.sharded_name('workflow_historian.update', 3))
+
+    def test_sharded_bindings(self):
+        self.assertEqual({
+            'workflow_historian_update.0': ['workflow_historian.update.0'],
+            'workflow_historian_update.1': ['workflow_historian.update.1'],
+        }, sharding.sharded_bindings('workflow_historian_update',
+            'workflow_historian.update', 2))
+
+    def test_sharded_bindings_unsharded(self):
+        self.assertEqual({
+            'workflow_historian_update': ['workflow_historian.update'],
+        }, sharding.sharded_bindings('workflow_historian_update',
+            'workflow_historian.update', 1))
+
+    def test_missing_bindings(self):
+        expected_bindings = sharding.sharded_bindings('queue', 'key', 2)
+        bindings = {'flow': {'queue.0': ['key.0'], 'queue.1': ['other']}}
+
+        self.assertEqual([('queue.1', 'key.1')],
+                sharding.missing_bindings(bindings, 'flow',
+                    expected_bindings))
+        self.assertEqual([('queue.0', 'key.0'), ('queue.1', 'key.1')],
+                sharding.missing_bindings({}, 'flow', expected_bindings))
+        self.assertEqual([], sharding.missing_bindings(
+            {'flow': expected_bindings}, 'flow', expected_bindings))
+
+
+if __name__ == '__main__':
+    unittest.main()
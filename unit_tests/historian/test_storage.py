@@ -1,5 +1,6 @@
 import unittest
 import copy
+import mock
 import sqlite3
 from collections import defaultdict
 from flow_workflow.historian.storage import WorkflowHistorianStorage
@@ -80,7 +81,7 @@ CREATE TABLE WORKFLOW.WORKFLOW_PLAN (
 class TestStorage(unittest.TestCase):
     def setUp(self):
         self.s = TestHistorianStorage(connection_string="sqlite:///:memory:",
-                owner="WORKFLOW")
+                owner="WORKFLOW", pool_size=1)
         self.s.create_tables()
         self.e = self.s.engine
 
@@ -384,3 +385,236 @@ class TestStorage(unittest.TestCase):
                 {'name':'another-peer-guy', 'peer_instance_id':1},
         ]
         self._test_instance(rows=rows)
+
+    def test_upsert_statement_selected_by_dialect(self):
+        self.assertEqual(storage.UPSERT_STATEMENTS_DICT['sqlite'] % 'WORKFLOW',
+                self.s.upsert_statement)
+
+    def _test_update_existing(self):
+        self.s.update(self.update_info)
+        self.s._instance_ids.clear()
+        self.update_info['status'] = Status('done')
+        self.s.update(self.update_info)
+
+        self._test_historian(rows=self.hrows)
+        self._test_execution(status='done')
+
+    def test_update_existing_upsert(self):
+        self._test_update_existing()
+
+    def test_update_existing_without_upsert(self):
+        self.s.upsert_statement = None
+        self._test_update_existing()
+
+    def test_update_many(self):
+        u1 = copy.copy(self.update_info)
+        u1['status'] = Status('new')
+
+        u2 = copy.copy(self.update_info)
+        u2['status'] = Status('running')
+        u2['operation_data'] = OperationData(net_key=self.net_key,
+                operation_id=5678, color=self.color)
+
+        u3 = copy.copy(self.update_info)
+        u3['status'] = Status('done')
+
+        instance_ids = self.s.update_many([u1, u2, u3])
+        self.assertEqual([1, 2], instance_ids)
+
+        rows = [
+                {'status':'done'},
+                {'status':'running'}
+        ]
+        self._test_execution(rows=rows)
+
+    def test_update_many_rolls_back(self):
+        u1 = copy.copy(self.update_info)
+        u2 = copy.copy(self.update_info)
+        del u2['name']
+        u2['operation_data'] = OperationData(net_key=self.net_key,
+                operation_id=5678, color=self.color)
+
+        self.assertRaises(Exception, self.s.update_many, [u1, u2])
+        self._test_historian(rows=[])
+
+    def test_update_many_coalesces_statuses(self):
+        updates = []
+        for status, fields in [('running*', {}),
+                ('scheduled', {'dispatch_id': '7'}),
+                ('running', {'start_time': '2013-01-01 00:00:00'}),
+                ('done', {'end_time': '2013-01-01 00:01:00'}),
+                ('running', {'dispatch_id': '8', 'stdout': 'out'})]:
+            update_info = copy.copy(self.update_info)
+            update_info['status'] = Status(status)
+            update_info.update(fields)
+            updates.append(update_info)
+
+        self.s.update_many(updates)
+
+        self._test_instance(rows=self.irows)
+        self._test_execution(status='done', dispatch_id='7', stdout='out',
+                is_done=1, is_running=0)
+
+    def test_merge_updates_overwrite(self):
+        earlier = dict(self.update_info, stdout='1', parallel_index=9)
+        later = dict(self.update_info, status=Status('running'), stdout='X',
+                stderr='2')
+
+        merged = self.s._merge_updates(earlier, later)
+        self.assertEqual('running', str(merged['status']))
+        self.assertEqual('X', merged['stdout'])
+        self.assertEqual('2', merged['stderr'])
+        self.assertEqual(9, merged['parallel_index'])
+
+    def test_merge_updates_no_overwrite(self):
+        earlier = dict(self.update_info, status=Status('done'), stdout='1')
+        later = dict(self.update_info, status=Status('running'), stdout='X',
+                stderr='2')
+
+        merged = self.s._merge_updates(earlier, later)
+        self.assertEqual('done', str(merged['status']))
+        self.assertEqual('1', merged['stdout'])
+        self.assertEqual('2', merged['stderr'])
+
+    def test_instance_id_cache(self):
+        parent_operation_data = OperationData(net_key=self.net_key,
+                operation_id=4567, color=self.color)
+        self.update_info['parent_operation_data'] = parent_operation_data
+
+        self.s.update(self.update_info)
+
+        self.assertEqual((1, 1), self.s._instance_ids.get(
+            self.update_info['operation_data']))
+        self.assertEqual((2, 2), self.s._instance_ids.get(
+            parent_operation_data))
+
+    def test_instance_id_cache_skips_lookups(self):
+        self.update_info['parent_operation_data'] = OperationData(
+                net_key=self.net_key, operation_id=4567, color=self.color)
+        self.s.update(self.update_info)
+
+        sibling = copy.copy(self.update_info)
+        sibling['operation_data'] = OperationData(net_key=self.net_key,
+                operation_id=5678, color=self.color)
+
+        with mock.patch('flow_workflow.historian.storage.execute_and_log',
+                wraps=storage.execute_and_log) as execute:
+            self.s.update(sibling)
+            self.s.update(dict(self.update_info, status=Status('done')))
+
+        statements = [c[0][1] for c in execute.call_args_list]
+        self.assertNotIn(self.s.statements.select_instance_id, statements)
+        self.assertEqual(1, statements.count(
+            self.s.statements.insert_into_workflow_historian))
+        self._test_instance(rows=[
+            {'name':'test_name', 'parent_instance_id':2},
+            {'name':'unknown name operation_id=4567'},
+            {'name':'test_name', 'parent_instance_id':2},
+        ])
+
+    def test_instance_id_cache_keeps_execution_id(self):
+        operation_data = self.update_info['operation_data']
+        self.s._instance_ids[operation_data] = (1, 7)
+
+        transaction = mock.Mock()
+        transaction.instance_ids = {operation_data: (1, None)}
+        self.s._commit(transaction)
+        self.assertEqual((1, 7), self.s._instance_ids.get(operation_data))
+
+        transaction.instance_ids = {operation_data: (1, 8)}
+        self.s._commit(transaction)
+        self.assertEqual((1, 8), self.s._instance_ids.get(operation_data))
+
+    def test_instance_id_cache_ignores_rollback(self):
+        u2 = copy.copy(self.update_info)
+        del u2['name']
+        u2['operation_data'] = OperationData(net_key=self.net_key,
+                operation_id=5678, color=self.color)
+
+        self.assertRaises(Exception, self.s.update_many,
+                [self.update_info, u2])
+        self.assertEqual(0, len(self.s._instance_ids))
+
+
+class TestSequencePrefetch(unittest.TestCase):
+    def setUp(self):
+        self.s = WorkflowHistorianStorage(
+                connection_string="sqlite:///:memory:", owner="WORKFLOW",
+                pool_size=1)
+        self.blocks = defaultdict(lambda: 0)
+        self.s._fetch_ids = mock.Mock(side_effect=self._fetch_ids)
+
+    def _fetch_ids(self, transaction, sequence_name, count):
+        start = self.blocks[sequence_name] * count
+        self.blocks[sequence_name] += 1
+        return range(start + 1, start + count + 1)
+
+    def test_ids_handed_out_from_blocks(self):
+        count = storage.SEQUENCE_BLOCK_SIZE + 1
+        instance_ids = [self.s.next_instance_id(None) for i in xrange(count)]
+
+        self.assertEqual(range(1, count + 1), instance_ids)
+        self.assertEqual(2, self.s._fetch_ids.call_count)
+        self.s._fetch_ids.assert_called_with(None, self.s.sequences.instance,
+                storage.SEQUENCE_BLOCK_SIZE)
+
+    def test_sequences_are_independent(self):
+        self.assertEqual(1, self.s.next_instance_id(None))
+        self.assertEqual(1, self.s.next_execution_id(None))
+        self.assertEqual(2, self.s.next_instance_id(None))
+        self.assertEqual(2, self.s._fetch_ids.call_count)
+
+
+class TestExecuteAndLog(unittest.TestCase):
+    def test_kwargs_normalized_once(self):
+        transaction = mock.Mock()
+        operation_data = OperationData(net_key='net', operation_id=3,
+                color=4)
+
+        with mock.patch('flow_workflow.historian.storage.'
+                'get_updated_statement_kwargs',
+                wraps=storage.get_updated_statement_kwargs) as normalize:
+            storage.execute_and_log(transaction, 'STATEMENT',
+                    operation_data=operation_data, STATUS=Status('done'))
+
+        self.assertEqual(1, normalize.call_count)
+        transaction.execute_normalized.assert_called_once_with('STATEMENT',
+                net_key='net', operation_id=3, color=4, STATUS='done')
+
+    def test_statement_formatted_lazily(self):
+        statement = storage.LoggedStatement('SELECT *\nWHERE a=:a', {'a': 1})
+        with mock.patch('flow_workflow.historian.storage.re') as re_module:
+            with mock.patch.object(storage.LOG, 'isEnabledFor',
+                    return_value=False):
+                storage.log_statement('SELECT *\nWHERE a=:a', a=1)
+            self.assertFalse(re_module.sub.called)
+
+        self.assertEqual('SELECT * WHERE a=1', str(statement))
+
+
+class TestStatementCache(unittest.TestCase):
+    def test_insert_statement_cached_per_column_set(self):
+        transaction = mock.Mock()
+        storage._perform_insert(transaction, {'B': 1, 'A': 2}, 'T')
+        storage._perform_insert(transaction, {'A': 3, 'B': 4}, 'T')
+
+        first, second = transaction.execute_normalized.call_args_list
+        self.assertEqual(' INSERT INTO T (A, B) VALUES (:A, :B)', first[0][0])
+        self.assertIs(first[0][0], second[0][0])
+        self.assertEqual({'A': 3, 'B': 4}, second[1])
+
+    def test_update_statement_cached_per_column_set(self):
+        transaction = mock.Mock()
+        storage._perform_update(transaction, {'B': 1, 'A': 2}, 'T', 'ID', 7)
+        storage._perform_update(transaction, {'A': 3, 'B': 4}, 'T', 'ID', 8)
+
+        first, second = transaction.execute_normalized.call_args_list
+        self.assertEqual('    UPDATE T SET A=:A, B=:B WHERE ID=:ID',
+                first[0][0])
+        self.assertIs(first[0][0], second[0][0])
+        self.assertEqual({'A': 3, 'B': 4, 'ID': 8}, second[1])
+
+    def test_update_nothing(self):
+        transaction = mock.Mock()
+        storage._perform_update(transaction, {}, 'T', 'ID', 7)
+        self.assertFalse(transaction.execute_normalized.called)
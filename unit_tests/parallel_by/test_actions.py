@@ -1,5 +1,6 @@
 from flow_workflow import future_operation
 from flow_workflow import factory
+from flow_workflow import io
 from flow.petri_net import color
 from flow.petri_net.net import Net
 from flow_workflow.parallel_by import actions
@@ -98,6 +99,178 @@ class PBSplitExecuteTest(fakeredistest.FakeRedisTest):
                         parallel_id=ParallelIdentifier().child_identifier(
                             self.operation_id, i)))
 
+    def test_execute_parallel_limit(self):
+        self.args['parallel_limit'] = 2
+        action = actions.ParallelBySplit.create(self.conn, args=self.args)
+
+        tokens, deferred = action.execute(net=self.net,
+                color_descriptor=self.parent_color_descriptor,
+                active_tokens=set(),
+                service_interfaces=self.service_interfaces)
+
+        self.assertEqual([[[self.operation_id, 0]], [[self.operation_id, 1]]],
+                [t.data.value['workflow_data']['parallel_id'] for t in tokens])
+
+
+class PBReleaseExecuteTest(fakeredistest.FakeRedisTest):
+    def setUp(self):
+        fakeredistest.FakeRedisTest.setUp(self)
+
+        self.net = Net.create(self.conn)
+        self.operation_id = 42
+        self.action = actions.ParallelByRelease.create(self.conn,
+                args={'operation_id': self.operation_id, 'parallel_limit': 2})
+
+        self.color_group = self.net.add_color_group(size=3)
+        self.color_descriptor = color.ColorDescriptor(
+                color=self.color_group.begin, group=self.color_group)
+
+    def release(self, parallel_idx):
+        token = self.net.create_token(
+                color=self.color_group.begin + parallel_idx,
+                color_group_idx=self.color_group.idx,
+                data={'workflow_data': {
+                    'parallel_id': [[self.operation_id, parallel_idx]]}})
+        tokens, deferred = self.action.execute(net=self.net,
+                color_descriptor=color.ColorDescriptor(
+                    color=self.color_group.begin + parallel_idx,
+                    group=self.color_group),
+                active_tokens=[token.index],
+                service_interfaces={})
+        return [t.data.value['workflow_data']['parallel_id'] for t in tokens]
+
+    def test_execute(self):
+        self.assertEqual([[[self.operation_id, 2]]], self.release(0))
+        self.assertEqual([], self.release(1))
+        self.assertEqual([], self.release(2))
+
+    def test_execute_again(self):
+        self.assertEqual([[[self.operation_id, 2]]], self.release(0))
+        self.assertEqual([[[self.operation_id, 2]]], self.release(0))
+
+
+class LimitedParallelByTest(fakeredistest.FakeRedisTest):
+    """
+    Drives a parallel-by with a parallel_limit through split, release and
+    join, running the members as the target net would.
+    """
+    def setUp(self):
+        fakeredistest.FakeRedisTest.setUp(self)
+
+        self.net = Net.create(self.conn)
+
+        self.parallel_property = 'pfoo'
+        self.parallel_input = ['a', 'b', 'c', 'd', 'e']
+        self.output_properties = ['outfoo']
+        self.create_operations()
+
+        self.action = self.create_action()
+
+        self.parent_color_group = self.net.add_color_group(size=1)
+        self.parent_color_descriptor = color.ColorDescriptor(
+                color=self.parent_color_group.begin,
+                group=self.parent_color_group)
+
+        self.service_interfaces = {}
+
+    def create_operation(self, operation_id, name, **kwargs):
+        fop = future_operation.FutureOperation(
+                operation_class='direct_storage',
+                operation_id=operation_id,
+                name=name,
+                parent=future_operation.NullFutureOperation(),
+                log_dir='/exciting/log/dir',
+                **kwargs)
+        fop.save(self.net)
+
+        return factory.load_operation(self.net, operation_id)
+
+    def create_operations(self):
+        self.operation_id = 42
+
+        self.operation = self.create_operation(
+                operation_id=self.operation_id,
+                name='main operation',
+                input_connections={7: {self.parallel_property: 'foosource'}},
+                output_properties=self.output_properties)
+
+        parallel_input_operation = self.create_operation(
+                operation_id=7,
+                name='parallel input operation',
+                input_connections={},
+                output_properties='foosource')
+        parallel_input_operation.store_output(name='foosource',
+                value=self.parallel_input, parallel_id=ParallelIdentifier())
+
+    def create_action(self):
+        self.args = {
+            'parallel_property': self.parallel_property,
+            'operation_id': self.operation_id,
+            'parallel_limit': 2,
+        }
+        return actions.ParallelBySplit.create(self.conn, args=self.args)
+
+    def split(self):
+        color_groups = []
+        add_color_group = Net.add_color_group
+        def capture_color_group(net, *args, **kwargs):
+            color_group = add_color_group(net, *args, **kwargs)
+            color_groups.append(color_group)
+            return color_group
+
+        with mock.patch.object(Net, 'add_color_group', autospec=True,
+                side_effect=capture_color_group):
+            tokens, deferred = self.action.execute(net=self.net,
+                    color_descriptor=self.parent_color_descriptor,
+                    active_tokens=set(),
+                    service_interfaces=self.service_interfaces)
+
+        return tokens, color_groups[0]
+
+    def test_split_release_join(self):
+        release = actions.ParallelByRelease.create(self.conn,
+                args={'operation_id': self.operation_id, 'parallel_limit': 2})
+        join = actions.ParallelByJoin.create(self.conn,
+                args={'operation_id': self.operation_id})
+
+        running, color_group = self.split()
+        self.assertEqual(2, len(running))
+
+        started = []
+        finished = []
+        while running:
+            token = running.pop(0)
+            parallel_id = ParallelIdentifier(
+                    token.data.value['workflow_data']['parallel_id'])
+            started.append(parallel_id.index)
+            self.assertLessEqual(len(running), 1)
+
+            value = self.operation.load_input(self.parallel_property,
+                    parallel_id=parallel_id)
+            self.operation.store_output(name='outfoo', value=value.upper(),
+                    parallel_id=parallel_id)
+            finished.append(token)
+
+            tokens, deferred = release.execute(net=self.net,
+                    color_descriptor=color.ColorDescriptor(
+                        color=color_group.begin + parallel_id.index,
+                        group=color_group),
+                    active_tokens=[token.index],
+                    service_interfaces=self.service_interfaces)
+            running.extend(tokens)
+
+        self.assertEqual(range(len(self.parallel_input)), sorted(started))
+
+        tokens, deferred = join.execute(net=self.net,
+                color_descriptor=color.ColorDescriptor(
+                    color=color_group.begin, group=color_group),
+                active_tokens=[t.index for t in finished],
+                service_interfaces=self.service_interfaces)
+        self.assertEqual(1, len(tokens))
+        self.assertEqual(['A', 'B', 'C', 'D', 'E'],
+                self.operation.load_output('outfoo', ParallelIdentifier()))
+
+
 class PBJoinExecuteTest(fakeredistest.FakeRedisTest):
     def setUp(self):
         fakeredistest.FakeRedisTest.setUp(self)
@@ -188,6 +361,66 @@ class PBJoinExecuteTest(fakeredistest.FakeRedisTest):
                 self.operation.load_output('outfoo', ParallelIdentifier()))
 
 
+class PBIncrementalJoinExecuteTest(PBJoinExecuteTest):
+    def create_operations(self):
+        self.operation_id = 42
+        self.operation = self.create_operation(
+                operation_id=self.operation_id,
+                name='main operation',
+                input_connections=self.input_connections,
+                output_properties=self.output_properties)
+
+        for i, po in enumerate(self.parallel_output):
+            io.store_accumulated_outputs(net=self.net,
+                    operation_id=self.operation_id,
+                    outputs={self.output_properties[0]: po},
+                    parallel_id=ParallelIdentifier().child_identifier(
+                        self.operation_id, i))
+
+    def create_action(self):
+        self.args = {
+            'output_properties': self.output_properties,
+            'operation_id': self.operation_id,
+            'incremental_join': True,
+        }
+        return actions.ParallelByJoin.create(self.conn, args=self.args)
+
+    def test_execute_deletes_accumulated_outputs(self):
+        self.action.execute(net=self.net,
+                color_descriptor=self.color_descriptor,
+                active_tokens=set(t.index for t in self.tokens),
+                service_interfaces=self.service_interfaces)
+
+        self.assertEqual([], [name for name in self.net.variables.value
+            if name.startswith('_wf_acc')])
+
+
+class PBAccumulateExecuteTest(PBJoinExecuteTest):
+    def create_action(self):
+        self.args = {
+            'operation_id': self.operation_id,
+        }
+        return actions.ParallelByAccumulate.create(self.conn, args=self.args)
+
+    def test_execute(self):
+        for index, token in enumerate(self.tokens):
+            color_descriptor = color.ColorDescriptor(
+                    color=self.color_group.begin + index,
+                    group=self.color_group)
+            tokens, deferred = self.action.execute(net=self.net,
+                    color_descriptor=color_descriptor,
+                    active_tokens=[token.index],
+                    service_interfaces=self.service_interfaces)
+            self.assertEqual(1, len(tokens))
+
+        self.assertEqual({'outfoo': self.parallel_output},
+                io.load_accumulated_outputs(net=self.net,
+                    operation_id=self.operation_id,
+                    property_names=self.output_properties,
+                    parallel_id=ParallelIdentifier(),
+                    parallel_size=len(self.parallel_output)))
+
+
 class ParallelBySplitTest(fakeredistest.FakeRedisTest):
     def setUp(self):
         fakeredistest.FakeRedisTest.setUp(self)
@@ -229,11 +462,14 @@ class ParallelBySplitTest(fakeredistest.FakeRedisTest):
                 parallel_property=self.parallel_property,
                 parallel_id=self.parallel_id)
 
-        self.assertEqual(3, self.operation.store_input.call_count)
-        for pi in parallel_input:
-            self.operation.store_input.assert_any_call(
-                    name=self.parallel_property, value=pi,
-                    parallel_id=mock.ANY)
+        self.operation.store_input_many.assert_called_once_with(
+                name=self.parallel_property, values=parallel_input,
+                parallel_ids=mock.ANY)
+
+        parallel_ids = self.operation.store_input_many.call_args[1][
+                'parallel_ids']
+        self.assertEqual(len(parallel_input), len(parallel_ids))
+        self.assertEqual([0, 1, 2], [pi.index for pi in parallel_ids])
 
     def test_create_tokens(self):
         color_group = color.ColorGroup(idx=27, parent_color=892,
@@ -285,13 +521,16 @@ class ParallelByJoinTest(fakeredistest.FakeRedisTest):
                 operation=self.operation,
                 parallel_id=parallel_id)
 
-        self.assertEqual(parallel_size,
-                len(self.operation.load_output.mock_calls))
-        self.assertEqual([self.operation.load_output.return_value
-            for x in xrange(parallel_size)],
+        self.assertEqual(self.operation.load_output_many.return_value,
                 results)
-        self.operation.load_output.assert_any_call(
-                name=property_name, parallel_id=mock.ANY)
+        self.operation.load_output_many.assert_called_once_with(
+                name=property_name, parallel_ids=mock.ANY)
+
+        parallel_ids = self.operation.load_output_many.call_args[1][
+                'parallel_ids']
+        self.assertEqual(parallel_size, len(parallel_ids))
+        self.assertEqual(range(parallel_size),
+                [pi.index for pi in parallel_ids])
 
 
 class ParallelByFailTest(fakeredistest.FakeRedisTest):
@@ -53,10 +53,31 @@ class ParallelByPerlActionAdapterBaseTest(unittest.TestCase):
         self.assertEqual('foo', self.adapter.parallel_by)
 
     def test_future_net(self):
-        net = self.adapter.future_net(
-                resources=mock.Mock())
+        net = self.adapter.future_net(resources={})
         self.assertIsInstance(net, future_nets.ParallelByNet)
 
+    def test_parallel_by_limit(self):
+        self.assertEqual(None, self.adapter.parallel_by_limit({}))
+
+        self.adapter.xml.attrib['parallelByLimit'] = '50'
+        self.assertEqual(50, self.adapter.parallel_by_limit({}))
+        self.assertEqual(10, self.adapter.parallel_by_limit(
+            {'parallel_by_limit': 10}))
+
+    def test_parallel_by_limit_invalid(self):
+        for limit in [-1, 0, '-1', '0', '', 'ten', 2.5, True]:
+            with self.assertRaises(ValueError):
+                self.adapter.parallel_by_limit({'parallel_by_limit': limit})
+
+        self.adapter.xml.attrib['parallelByLimit'] = '0'
+        with self.assertRaises(ValueError):
+            self.adapter.parallel_by_limit({})
+
+    def test_future_net_parallel_by_limit(self):
+        net = self.adapter.future_net(resources={'parallel_by_limit': 10})
+        self.assertEqual(10,
+                net.split_transition.action.args['parallel_limit'])
+
 
 if __name__ == '__main__':
     unittest.main()
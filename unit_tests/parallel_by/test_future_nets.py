@@ -53,5 +53,88 @@ class ParallelByNetTest(unittest.TestCase):
                 self.net.failing_place.arcs_out)
 
 
+class IncrementalParallelByNetTest(unittest.TestCase):
+    def setUp(self):
+        self.operation_id = '12345'
+        self.target_net = WorkflowNetBase(name='supernet',
+                operation_id=self.operation_id)
+
+        self.net = future_nets.ParallelByNet(target_net=self.target_net,
+                parallel_property='foo', incremental_join=True)
+
+    def test_success_path(self):
+        self.assertIn(self.net.starting_accumulate_place,
+                self.target_net.success_transition.arcs_out)
+        self.assertIn(self.net.accumulate_transition,
+                self.net.starting_accumulate_place.arcs_out)
+        self.assertIn(self.net.starting_join_place,
+                self.net.accumulate_transition.arcs_out)
+        self.assertIn(self.net.join_transition,
+                self.net.starting_join_place.arcs_out)
+
+    def test_join_action_args(self):
+        self.assertTrue(self.net.join_transition.action.args[
+            'incremental_join'])
+
+
+class LimitedParallelByNetTest(unittest.TestCase):
+    def setUp(self):
+        self.operation_id = '12345'
+        self.target_net = WorkflowNetBase(name='supernet',
+                operation_id=self.operation_id)
+
+        self.net = future_nets.ParallelByNet(target_net=self.target_net,
+                parallel_property='foo', parallel_limit=10)
+
+    def test_release_path(self):
+        self.assertIn(self.net.starting_release_place,
+                self.target_net.success_transition.arcs_out)
+        self.assertIn(self.net.starting_join_place,
+                self.target_net.success_transition.arcs_out)
+        self.assertIn(self.net.release_transition,
+                self.net.starting_release_place.arcs_out)
+
+        self.assertIn(self.net.succeeding_split_place,
+                self.net.release_transition.arcs_out)
+        self.assertIn(self.net.succeeding_split_place,
+                self.net.split_transition.arcs_out)
+        self.assertIn(self.target_net.start_transition,
+                self.net.succeeding_split_place.arcs_out)
+
+    def test_split_action_args(self):
+        self.assertEqual(10,
+                self.net.split_transition.action.args['parallel_limit'])
+        self.assertEqual(10,
+                self.net.release_transition.action.args['parallel_limit'])
+
+
+class BatchShortcutParallelByNetTest(unittest.TestCase):
+    def setUp(self):
+        self.operation_id = '12345'
+        self.target_net = WorkflowNetBase(name='supernet',
+                operation_id=self.operation_id)
+        self.shortcut_net = WorkflowNetBase(name='supernet (batch shortcut)',
+                operation_id=self.operation_id)
+
+        self.net = future_nets.ParallelByNet(target_net=self.target_net,
+                parallel_property='foo', shortcut_net=self.shortcut_net)
+
+    def test_start_path(self):
+        self.assertIn(self.shortcut_net, self.net.subnets)
+        self.assertIn(self.net.starting_shortcut_place,
+                self.net.internal_start_transition.arcs_out)
+        self.assertIn(self.shortcut_net.start_transition,
+                self.net.starting_shortcut_place.arcs_out)
+
+    def test_split_after_shortcut(self):
+        self.assertIn(self.net.starting_split_place,
+                self.shortcut_net.success_transition.arcs_out)
+        self.assertIn(self.net.starting_split_place,
+                self.shortcut_net.failure_transition.arcs_out)
+        self.assertIn(self.net.split_transition,
+                self.net.starting_split_place.arcs_out)
+
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -87,6 +87,22 @@ class PerlActionTest(unittest.TestCase):
         self.assertEqual(expected_value, self.action.command_line(
             self.net, token_data))
 
+    def test_command_line_shortcut_parallel_by(self):
+        self.args['shortcut_parallel_by'] = 'foo'
+        expected_value = [
+            actions.FLOW_PATH, 'workflow-wrapper',
+            '--method', 'method',
+            '--action-type', 'action_type',
+            '--action-id', 'action_id',
+            '--net-key', 'netkey',
+            '--operation-id', '999',
+            '--shortcut-parallel-by', 'foo',
+        ]
+
+        token_data = {}
+        self.assertEqual(expected_value, self.action.command_line(
+            self.net, token_data))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -70,5 +70,25 @@ class NormalPerlActionAdapterBaseTest(unittest.TestCase):
         self.assertIsInstance(net, future_nets.PerlActionNet)
 
 
+class FakeCommandAdapter(FakeAdapter):
+    action_type = 'command'
+
+
+class ParallelByPerlActionAdapterBaseTest(unittest.TestCase):
+    def setUp(self):
+        self.adapter = FakeCommandAdapter(xml=etree.XML(PARALLEL_BY_XML),
+                operation_id=12345, log_dir='/exciting/log/dir',
+                parent=mock.Mock())
+
+    def test_batch_shortcut_net_disabled(self):
+        self.assertIsNone(self.adapter.batch_shortcut_net(resources={}))
+
+    def test_batch_shortcut_net(self):
+        net = self.adapter.future_net(resources={'batch_shortcut': True})
+        self.assertIsInstance(net.shortcut_net,
+                future_nets.BatchShortcutShellCommandNet)
+        self.assertIsInstance(net.target_net, future_nets.PerlActionNet)
+
+
 if __name__ == '__main__':
     unittest.main()
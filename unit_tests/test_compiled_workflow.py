@@ -0,0 +1,132 @@
+from flow_workflow import compiled_workflow as compiled_workflow_module
+from flow_workflow.compiled_workflow import CompiledWorkflow
+from flow_workflow.compiled_workflow import CompiledWorkflowCache
+from flow_workflow.future_operation import ForeignFutureOperation
+from flow_workflow.future_operation import FutureOperation
+from flow_workflow.future_operation import NullFutureOperation
+from flow_workflow.historian.operation_data import OperationData
+
+import mock
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def compiled_workflow():
+    root = NullFutureOperation()
+    top = FutureOperation(operation_class='model', operation_id=1,
+            name='top', parent=root)
+    child = FutureOperation(operation_class='command', operation_id=2,
+            name='child', parent=top)
+
+    return CompiledWorkflow(future_net={'start_place': 'start'},
+            future_operations=[top, child], root_operation=root,
+            input_storage_operation_id=0, operation_id=1,
+            output_properties=['out'])
+
+
+class CompiledWorkflowTest(unittest.TestCase):
+    def test_future_operations_reparented(self):
+        workflow = compiled_workflow()
+        parent = ForeignFutureOperation(OperationData(net_key='parent net',
+            operation_id=7, color=3))
+
+        top, child = workflow.future_operations(parent)
+
+        top_dict = top.as_dict(default_net_key='net')
+        self.assertEqual(7, top_dict['parent_operation_id'])
+        self.assertEqual('parent net', top_dict['parent_net_key'])
+
+        child_dict = child.as_dict(default_net_key='net')
+        self.assertEqual(1, child_dict['parent_operation_id'])
+        self.assertEqual('net', child_dict['parent_net_key'])
+
+    def test_input_variables(self):
+        workflow = compiled_workflow()
+        self.assertEqual({'_wf_outp_0_a': 'b'},
+                workflow.input_variables({'a': 'b'}))
+
+
+class CompiledWorkflowCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = CompiledWorkflowCache(os.path.join(self.directory,
+            'compiled'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_key(self):
+        key = CompiledWorkflowCache.key('<xml/>', {'a': 1}, ['x', 'y'], False)
+        self.assertEqual(key, CompiledWorkflowCache.key('<xml/>', {'a': 1},
+            ['y', 'x'], False))
+
+        self.assertNotEqual(key, CompiledWorkflowCache.key('<xml />',
+            {'a': 1}, ['x', 'y'], False))
+        self.assertNotEqual(key, CompiledWorkflowCache.key('<xml/>',
+            {'a': 2}, ['x', 'y'], False))
+        self.assertNotEqual(key, CompiledWorkflowCache.key('<xml/>',
+            {'a': 1}, ['x'], False))
+        self.assertNotEqual(key, CompiledWorkflowCache.key('<xml/>',
+            {'a': 1}, ['x', 'y'], True))
+
+    def test_key_code_version(self):
+        with mock.patch.object(compiled_workflow_module, 'code_version',
+                return_value='old code'):
+            key = CompiledWorkflowCache.key('<xml/>', {}, [], False)
+
+        with mock.patch.object(compiled_workflow_module, 'code_version',
+                return_value='new code'):
+            self.assertNotEqual(key,
+                    CompiledWorkflowCache.key('<xml/>', {}, [], False))
+
+    def test_code_version(self):
+        self.assertEqual(40, len(compiled_workflow_module.code_version()))
+        self.assertEqual(compiled_workflow_module.code_version(),
+                compiled_workflow_module.code_version())
+
+    def test_get_missing(self):
+        self.assertEqual(None, self.cache.get('missing'))
+
+    def test_put_then_get(self):
+        self.cache.put('key', compiled_workflow())
+
+        workflow = self.cache.get('key')
+        self.assertEqual({'start_place': 'start'}, workflow.future_net)
+        self.assertEqual(1, workflow.operation_id)
+        self.assertEqual(['out'], workflow.output_properties)
+
+        top, child = workflow.future_operations(NullFutureOperation())
+        self.assertIs(top, child.parent)
+
+    def test_put_private_directory(self):
+        self.cache.put('key', compiled_workflow())
+        self.assertEqual(0700, os.stat(self.cache.directory).st_mode & 0777)
+
+    def test_get_writable_by_others(self):
+        self.cache.put('key', compiled_workflow())
+
+        os.chmod(self.cache._path('key'), 0664)
+        self.assertEqual(None, self.cache.get('key'))
+
+        os.chmod(self.cache._path('key'), 0600)
+        os.chmod(self.cache.directory, 0777)
+        self.assertEqual(None, self.cache.get('key'))
+
+    def test_get_symlink(self):
+        self.cache.put('key', compiled_workflow())
+        os.symlink(self.cache._path('key'), self.cache._path('link'))
+
+        self.assertEqual(None, self.cache.get('link'))
+
+    def test_get_corrupt(self):
+        os.makedirs(self.cache.directory, 0700)
+        with open(self.cache._path('key'), 'w') as f:
+            f.write('not a pickle')
+
+        self.assertEqual(None, self.cache.get('key'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ from lxml import etree
 import mock
 import unittest
 import flow_workflow.factory
+import flow_workflow.operation_base
 
 
 VALID_XML = '''
@@ -20,5 +21,82 @@ class OperationTypeTest(unittest.TestCase):
                 flow_workflow.factory.get_operation_type(xml))
 
 
+class EntryPointRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = flow_workflow.factory.EntryPointRegistry('group')
+
+        self.first = mock.Mock()
+        self.first.name = 'foo'
+        self.duplicate = mock.Mock()
+        self.duplicate.name = 'foo'
+        self.other = mock.Mock()
+        self.other.name = 'bar'
+
+    def test_resolves_once(self):
+        with mock.patch('flow_workflow.factory.pkg_resources') as pr:
+            pr.iter_entry_points.return_value = [self.first, self.duplicate,
+                    self.other]
+
+            self.assertEqual(self.first.load.return_value,
+                    self.registry['foo'])
+            self.assertEqual(self.first.load.return_value,
+                    self.registry['foo'])
+            self.assertEqual(self.other.load.return_value,
+                    self.registry['bar'])
+
+            pr.iter_entry_points.assert_called_once_with('group')
+        self.assertEqual(1, self.first.load.call_count)
+        self.assertEqual(0, self.duplicate.load.call_count)
+
+    def test_missing(self):
+        with mock.patch('flow_workflow.factory.pkg_resources') as pr:
+            pr.iter_entry_points.return_value = []
+            with self.assertRaises(KeyError):
+                self.registry['foo']
+
+    def test_refresh(self):
+        with mock.patch('flow_workflow.factory.pkg_resources') as pr:
+            pr.iter_entry_points.return_value = [self.first]
+            self.registry['foo']
+
+            pr.iter_entry_points.return_value = [self.other]
+            self.registry.refresh()
+            self.assertEqual(self.other.load.return_value,
+                    self.registry['bar'])
+            with self.assertRaises(KeyError):
+                self.registry['foo']
+
+
+class LoadOperationTest(unittest.TestCase):
+    def setUp(self):
+        flow_workflow.factory._OPERATION_DEFINITIONS.clear()
+
+        self.net = mock.MagicMock()
+        self.net.key = 'netkey'
+        self.operation_dict = {'_class': 'null', 'name': 'foo'}
+        self.net.variables.__getitem__.side_effect = (
+                lambda name: dict(self.operation_dict))
+
+    def tearDown(self):
+        flow_workflow.factory._OPERATION_DEFINITIONS.clear()
+
+    def test_load_operation(self):
+        operation = flow_workflow.factory.load_operation(self.net, 12)
+        self.assertIsInstance(operation,
+                flow_workflow.operation_base.NullOperation)
+        self.net.variables.__getitem__.assert_called_once_with('_wf_op_12')
+
+    def test_load_operation_cached(self):
+        flow_workflow.factory.load_operation(self.net, 12)
+        flow_workflow.factory.load_operation(self.net, '12')
+        self.assertEqual(1, self.net.variables.__getitem__.call_count)
+
+    def test_forget_operations(self):
+        flow_workflow.factory.load_operation(self.net, 12)
+        flow_workflow.factory.forget_operations(self.net.key)
+        flow_workflow.factory.load_operation(self.net, 12)
+        self.assertEqual(2, self.net.variables.__getitem__.call_count)
+
+
 if __name__ == '__main__':
     unittest.main()
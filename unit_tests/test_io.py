@@ -152,6 +152,201 @@ class StoreLoadTest(FakeRedisTest):
         load_parallel_id = [[7, 24]]
         self.store_outputs_then_load_inputs(store_parallel_id, load_parallel_id)
 
+    def test_store_variables_output_variables(self):
+        outputs = {'bar1': 'value A', 'bar2': ['value', 'B']}
+        variables = io.output_variables(
+                operation_id=self.output_operation_id, outputs=outputs)
+        variables['other'] = {'x': 1}
+
+        io.store_variables(self.net, variables)
+
+        self.assertEqual(outputs, io.load_outputs(net=self.net,
+            operation_id=self.output_operation_id,
+            property_names=outputs.keys(), parallel_id=ParallelIdentifier()))
+        self.assertEqual({'x': 1}, self.net.variables['other'])
+
+    def test_store_output_many(self):
+        values = ['a', 'b', 'c']
+        parent_parallel_id = ParallelIdentifier([[7, 24]])
+        parallel_ids = [parent_parallel_id.child_identifier(12, i)
+                for i in xrange(len(values))]
+
+        io.store_output_many(net=self.net,
+                operation_id=self.output_operation_id,
+                property_name=self.output_property_name, values=values,
+                parallel_ids=parallel_ids)
+
+        for value, parallel_id in zip(values, parallel_ids):
+            self.assertEqual(value, io.load_output(net=self.net,
+                operation_id=self.output_operation_id,
+                property_name=self.output_property_name,
+                parallel_id=parallel_id))
+
+    def test_load_output_many(self):
+        parent_parallel_id = ParallelIdentifier([[7, 24]])
+        parallel_ids = [parent_parallel_id.child_identifier(12, i)
+                for i in xrange(3)]
+
+        io.store_output(net=self.net, operation_id=self.output_operation_id,
+                property_name=self.output_property_name, value='child',
+                parallel_id=parallel_ids[0])
+        io.store_output(net=self.net, operation_id=self.output_operation_id,
+                property_name=self.output_property_name, value='parent',
+                parallel_id=parent_parallel_id)
+        io.store_output(net=self.net, operation_id=self.output_operation_id,
+                property_name=self.output_property_name, value='root',
+                parallel_id=ParallelIdentifier())
+
+        self.assertEqual(['child', 'parent', 'parent'],
+                io.load_output_many(net=self.net,
+                    operation_id=self.output_operation_id,
+                    property_name=self.output_property_name,
+                    parallel_ids=parallel_ids))
+
+    def test_load_output_many_missing(self):
+        with self.assertRaises(KeyError):
+            io.load_output_many(net=self.net,
+                    operation_id=self.output_operation_id,
+                    property_name=self.output_property_name,
+                    parallel_ids=[ParallelIdentifier([[12, 0]])])
+
+
+class AccumulatedOutputsTest(FakeRedisTest):
+    def setUp(self):
+        FakeRedisTest.setUp(self)
+
+        self.net = Net.create(self.conn, key='netkey')
+        self.operation_id = 12
+        self.parent_parallel_id = ParallelIdentifier([[7, 24]])
+        self.parallel_ids = [self.parent_parallel_id.child_identifier(
+            self.operation_id, i) for i in xrange(3)]
+
+    def test_store_then_load(self):
+        for i, parallel_id in reversed(list(enumerate(self.parallel_ids))):
+            io.store_accumulated_outputs(net=self.net,
+                    operation_id=self.operation_id,
+                    outputs={'bar': 'bar %d' % i, 'baz': i},
+                    parallel_id=parallel_id)
+
+        expected_outputs = {
+            'bar': ['bar 0', 'bar 1', 'bar 2'],
+            'baz': [0, 1, 2],
+        }
+        self.assertEqual(expected_outputs, io.load_accumulated_outputs(
+            net=self.net, operation_id=self.operation_id,
+            property_names=['bar', 'baz'],
+            parallel_id=self.parent_parallel_id, parallel_size=3))
+
+    def test_store_with_net_variables(self):
+        io.store_accumulated_outputs(net=self.net,
+                operation_id=self.operation_id,
+                outputs={'bar': 'bar 0', 'baz': 0},
+                parallel_id=self.parallel_ids[0])
+
+        self.assertEqual(2, len(self.net.variables.value))
+        self.assertEqual([], self.conn.keys('%s:*' % self.net.variables.key))
+
+    def test_load_missing(self):
+        io.store_accumulated_outputs(net=self.net,
+                operation_id=self.operation_id, outputs={'bar': 'bar 0'},
+                parallel_id=self.parallel_ids[0])
+
+        with self.assertRaises(KeyError):
+            io.load_accumulated_outputs(net=self.net,
+                    operation_id=self.operation_id, property_names=['bar'],
+                    parallel_id=self.parent_parallel_id, parallel_size=3)
+
+    def test_delete(self):
+        for parallel_id in self.parallel_ids:
+            io.store_accumulated_outputs(net=self.net,
+                    operation_id=self.operation_id, outputs={'bar': 'value'},
+                    parallel_id=parallel_id)
+
+        io.delete_accumulated_outputs(net=self.net,
+                operation_id=self.operation_id, property_names=['bar'],
+                parallel_id=self.parent_parallel_id, parallel_size=3)
+        self.assertEqual({}, self.net.variables.value)
+
+
+class ShortcutResultsTest(FakeRedisTest):
+    def setUp(self):
+        FakeRedisTest.setUp(self)
+
+        self.net = Net.create(self.conn, key='netkey')
+        self.operation_id = 12
+        self.parent_parallel_id = ParallelIdentifier([[7, 24]])
+        self.parallel_ids = [self.parent_parallel_id.child_identifier(
+            self.operation_id, i) for i in xrange(3)]
+
+    def test_store_then_load(self):
+        io.store_shortcut_results(net=self.net,
+                operation_id=self.operation_id,
+                results={self.parallel_ids[0]: True,
+                    self.parallel_ids[1]: False})
+
+        self.assertEqual([True, False, None], [io.load_shortcut_result(
+            net=self.net, operation_id=self.operation_id,
+            parallel_id=parallel_id) for parallel_id in self.parallel_ids])
+
+
+class LoadSourcesTest(FakeRedisTest):
+    def setUp(self):
+        FakeRedisTest.setUp(self)
+
+        self.net = Net.create(self.conn, key='netkey')
+        self.other_net = Net.create(self.conn, key='other_netkey')
+
+    def test_most_specific_value_wins(self):
+        io.store_output(net=self.net, operation_id=4, property_name='bar',
+                value='general', parallel_id=ParallelIdentifier())
+        io.store_output(net=self.net, operation_id=4, property_name='bar',
+                value='specific', parallel_id=ParallelIdentifier([[7, 1]]))
+
+        sources = {
+            'foo1': (self.net, 4, 'bar'),
+        }
+        self.assertEqual({'foo1': 'specific'}, io.load_sources(sources,
+            ParallelIdentifier([[7, 1], [9, 3]])))
+        self.assertEqual({'foo1': 'general'}, io.load_sources(sources,
+            ParallelIdentifier([[7, 2], [9, 3]])))
+
+    def test_multiple_nets(self):
+        io.store_output(net=self.net, operation_id=4, property_name='bar',
+                value='value A', parallel_id=ParallelIdentifier())
+        io.store_output(net=self.other_net, operation_id=4,
+                property_name='bar', value='value B',
+                parallel_id=ParallelIdentifier([[7, 1]]))
+
+        sources = {
+            'foo1': (self.net, 4, 'bar'),
+            'foo2': (self.other_net, 4, 'bar'),
+            'foo3': None,
+        }
+        expected_results = {
+            'foo1': 'value A',
+            'foo2': 'value B',
+            'foo3': None,
+        }
+        self.assertEqual(expected_results, io.load_sources(sources,
+            ParallelIdentifier([[7, 1]])))
+
+    def test_stored_none(self):
+        io.store_output(net=self.net, operation_id=4, property_name='bar',
+                value=None, parallel_id=ParallelIdentifier([[7, 1]]))
+        io.store_output(net=self.net, operation_id=4, property_name='bar',
+                value='general', parallel_id=ParallelIdentifier())
+
+        self.assertEqual({'foo': None}, io.load_sources(
+            {'foo': (self.net, 4, 'bar')}, ParallelIdentifier([[7, 1]])))
+
+    def test_missing_output(self):
+        with self.assertRaises(KeyError):
+            io.load_sources({'foo': (self.net, 4, 'bar')},
+                    ParallelIdentifier([[7, 1]]))
+
+    def test_no_sources(self):
+        self.assertEqual({}, io.load_sources({}, ParallelIdentifier()))
+
 
 if __name__ == "__main__":
     unittest.main()
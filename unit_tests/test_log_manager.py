@@ -2,6 +2,8 @@ from unittest import TestCase, main
 from flow_workflow.log_manager import LogManager
 from flow_workflow.parallel_id import ParallelIdentifier
 
+import mock
+
 
 class LogManagerTests(TestCase):
     def setUp(self):
@@ -39,6 +41,18 @@ class LogManagerTests(TestCase):
                 '/exciting/log/dir/test_op_name.12345.4_3.5_7.out',
                 self.log_manager.stdout_log_path(parallel_id))
 
+    def test_log_path_memoized(self):
+        self.log_manager._log_path = mock.Mock(return_value='/path.err')
+        self.assertEqual('/path.err', self.log_manager.stderr_log_path(
+            ParallelIdentifier([(4, 3)])))
+        self.assertEqual('/path.err', self.log_manager.stderr_log_path(
+            ParallelIdentifier([(4, 3)])))
+        self.assertEqual(1, self.log_manager._log_path.call_count)
+
+        self.log_manager.stdout_log_path(ParallelIdentifier([(4, 3)]))
+        self.log_manager.stderr_log_path(ParallelIdentifier([(4, 4)]))
+        self.assertEqual(3, self.log_manager._log_path.call_count)
+
 
 if __name__ == '__main__':
     main()
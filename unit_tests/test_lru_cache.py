@@ -0,0 +1,46 @@
+from flow_workflow.lru_cache import LRUCache
+
+import unittest
+
+
+class LRUCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(max_size=2)
+
+    def test_get_missing(self):
+        self.assertEqual(None, self.cache.get('a'))
+        self.assertEqual('default', self.cache.get('a', 'default'))
+
+    def test_set_and_get(self):
+        self.cache['a'] = 1
+        self.assertEqual(1, self.cache.get('a'))
+        self.assertIn('a', self.cache)
+
+    def test_evicts_least_recently_used(self):
+        self.cache['a'] = 1
+        self.cache['b'] = 2
+        self.cache.get('a')
+        self.cache['c'] = 3
+
+        self.assertEqual(2, len(self.cache))
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertIn('c', self.cache)
+
+    def test_pop(self):
+        self.cache['a'] = 1
+        self.assertEqual(1, self.cache.pop('a'))
+        self.assertNotIn('a', self.cache)
+        self.assertEqual(None, self.cache.pop('a'))
+
+    def test_discard_matching(self):
+        self.cache[('net', 1)] = 1
+        self.cache[('other', 1)] = 2
+        self.cache.discard_matching(lambda key: key[0] == 'net')
+
+        self.assertNotIn(('net', 1), self.cache)
+        self.assertIn(('other', 1), self.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 from flow_workflow import operation_base
 from flow_workflow.log_manager import LogManager
 
+import collections
 import mock
 import unittest
 
@@ -83,19 +84,56 @@ class DirectStorageOperationTest(unittest.TestCase):
     def test_log_manager(self):
         self.assertIsInstance(self.operation.log_manager, LogManager)
         self.assertEqual(self.log_dir, self.operation.log_manager.log_dir)
+        self.assertIs(self.operation.log_manager,
+                self.operation.log_manager)
 
     def test_input_names(self):
         self.assertEqual(['in1', 'in2'], self.operation.input_names)
 
     def test_load_inputs(self):
         parallel_id = mock.Mock()
-        load_input = mock.Mock()
-        self.operation.load_input = load_input
+        input_source = mock.Mock()
+        self.operation.input_source = input_source
 
-        inputs = self.operation.load_inputs(parallel_id)
-        self.assertItemsEqual(['in1', 'in2'], inputs.keys())
-        self.assertEqual(2, load_input.call_count)
-        load_input.assert_any_call(name='in1', parallel_id=parallel_id)
+        with mock.patch('flow_workflow.operation_base.io') as io:
+            inputs = self.operation.load_inputs(parallel_id)
+            self.assertEqual(io.load_sources.return_value, inputs)
+            io.load_sources.assert_called_once_with({
+                'in1': input_source.return_value,
+                'in2': input_source.return_value,
+            }, parallel_id)
+
+        self.assertEqual(2, input_source.call_count)
+        input_source.assert_any_call('in1')
+
+    def test_load_inputs_skips_missing_inputs(self):
+        parallel_id = mock.Mock()
+        input_source = mock.Mock()
+        input_source.side_effect = [operation_base.MissingInputError,
+                'in2 source']
+        self.operation.input_source = input_source
+        self.operation.input_connections = collections.OrderedDict([
+            (3, {'in1': 'out1'}),
+            (4, {'in2': 'out2'}),
+        ])
+
+        with mock.patch('flow_workflow.operation_base.io') as io:
+            self.operation.load_inputs(parallel_id)
+            io.load_sources.assert_called_once_with({'in2': 'in2 source'},
+                    parallel_id)
+
+    def test_input_source(self):
+        load = mock.Mock()
+        self.operation._load_operation = load
+
+        source = self.operation.input_source('in1')
+        load.assert_called_once_with(self.net.key, 3)
+        load.return_value.output_source.assert_called_once_with('out1')
+        self.assertEqual(load.return_value.output_source.return_value, source)
+
+    def test_output_source(self):
+        self.assertEqual((self.net, self.operation_id, 'baz'),
+                self.operation.output_source('baz'))
 
     def test_load_outputs(self):
         parallel_id = mock.Mock()
@@ -124,6 +162,40 @@ class DirectStorageOperationTest(unittest.TestCase):
                     parallel_id=parallel_id,
                     operation_id=self.operation_id)
 
+    def test_load_output_many(self):
+        parallel_ids = [mock.Mock(), mock.Mock()]
+        with mock.patch('flow_workflow.operation_base.io') as io:
+            outputs = self.operation.load_output_many('buz', parallel_ids)
+            self.assertEqual(io.load_output_many.return_value, outputs)
+            io.load_output_many.assert_called_once_with(
+                    net=self.net,
+                    property_name='buz',
+                    parallel_ids=parallel_ids,
+                    operation_id=self.operation_id)
+
+    def test_store_input_many(self):
+        load = mock.Mock()
+        self.operation._load_operation = load
+        values = ['a', 'b']
+        parallel_ids = [mock.Mock(), mock.Mock()]
+
+        self.operation.store_input_many('in2', values, parallel_ids)
+        load.assert_called_once_with(self.net.key, 4)
+        load.return_value.store_output_many.assert_called_once_with('out2',
+                values, parallel_ids)
+
+    def test_store_output_many(self):
+        values = ['a', 'b']
+        parallel_ids = [mock.Mock(), mock.Mock()]
+        with mock.patch('flow_workflow.operation_base.io') as io:
+            self.operation.store_output_many('buz', values, parallel_ids)
+            io.store_output_many.assert_called_once_with(
+                    net=self.net,
+                    property_name='buz',
+                    values=values,
+                    parallel_ids=parallel_ids,
+                    operation_id=self.operation_id)
+
     def test_determine_input_source_success(self):
         self.assertEqual((3, 'out1'),  # Fakeredis makes these unicode..
                 self.operation._determine_input_source('in1'))
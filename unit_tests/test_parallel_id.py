@@ -106,5 +106,46 @@ class ParallelIdentifierIterationTest(unittest.TestCase):
         self.assertNotEqual(a, b)
 
 
+class ParallelIdentifierImmutabilityTest(unittest.TestCase):
+    def test_equal_identifiers_hash_equal(self):
+        a = ParallelIdentifier([[4, 7], [6, 2]])
+        b = ParallelIdentifier([(4, 7)]).child_identifier(6, 2)
+
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual({a: 'value'}, {b: 'value'})
+
+    def test_no_new_attributes(self):
+        pi = ParallelIdentifier([[4, 7]])
+        with self.assertRaises(AttributeError):
+            pi.foo = 'bar'
+
+    def test_parent_identifier_memoised(self):
+        pi = ParallelIdentifier([[4, 7], [6, 2]])
+        self.assertIs(pi.parent_identifier, pi.parent_identifier)
+
+    def test_child_shares_parent(self):
+        pi = ParallelIdentifier([[4, 7]])
+        self.assertIs(pi, pi.child_identifier(6, 2).parent_identifier)
+
+    def test_child_identifier_duplicate_operation(self):
+        pi = ParallelIdentifier([[4, 7]])
+        with self.assertRaises(ValueError):
+            pi.child_identifier(4, 2)
+
+
+class ParallelIdentifierSerializationTest(unittest.TestCase):
+    def test_serialize(self):
+        pi = ParallelIdentifier([[4, 7], [6, 2]])
+        self.assertEqual('[[4, 7], [6, 2]]', pi.serialize())
+
+    def test_round_trip(self):
+        pi = ParallelIdentifier([[4, 7], [6, 2]])
+        self.assertEqual(pi, ParallelIdentifier.deserialize(pi.serialize()))
+
+    def test_deserialize_default(self):
+        self.assertEqual(ParallelIdentifier(),
+                ParallelIdentifier.deserialize())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+from StringIO import StringIO
+from flow_workflow import perl_worker
+from twisted.internet import defer
+from twisted.python.failure import Failure
+from twisted.test.proto_helpers import StringTransport
+
+import json
+import struct
+import unittest
+
+
+def frame(data):
+    return struct.pack('!I', len(data)) + data
+
+
+class PerlWorkerProtocolTest(unittest.TestCase):
+    def setUp(self):
+        self.request = {'argv': ['command', 'execute', 'Some::Command',
+            'inputs.json', 'outputs.json'], 'env': {}, 'cwd': '/'}
+        self.finished = defer.Deferred()
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+
+        self.protocol = perl_worker.PerlWorkerProtocol(self.request,
+                self.finished, self.stdout, self.stderr)
+        self.transport = StringTransport()
+        self.protocol.makeConnection(self.transport)
+
+    def test_sends_request(self):
+        self.assertEqual(frame(json.dumps(self.request)),
+                self.transport.value())
+
+    def test_output_and_exit_code(self):
+        results = []
+        self.finished.addCallback(results.append)
+
+        self.protocol.dataReceived(frame('Oout 1\n') + frame('Eerr\n') +
+                frame('Oout 2\n') + frame('X3'))
+        self.assertTrue(self.transport.disconnecting)
+        self.protocol.connectionLost(Failure(RuntimeError('closed')))
+
+        self.assertEqual('out 1\nout 2\n', self.stdout.getvalue())
+        self.assertEqual('err\n', self.stderr.getvalue())
+        self.assertEqual([3], results)
+
+    def test_worker_lost(self):
+        failures = []
+        self.finished.addErrback(failures.append)
+
+        self.protocol.dataReceived(frame('Oout\n'))
+        self.protocol.connectionLost(Failure(RuntimeError('closed')))
+
+        self.assertEqual(1, len(failures))
+        self.assertTrue(failures[0].check(perl_worker.WorkerLostError))
+
+
+if __name__ == '__main__':
+    unittest.main()